@@ -0,0 +1 @@
+# Benchmarks de ModelosML: scripts independientes (python bench_*.py) y la suite completa (python suite.py)
@@ -0,0 +1,43 @@
+import argparse
+import json
+import sys
+import time
+
+from fixtures import DIR_MODELOS_ML, entrenar_modelo_predictivo, percentiles, serie_sintetica, ventanas
+
+sys.path.insert(0, DIR_MODELOS_ML)
+from Compartido.arboles_compilados import ArbolesCompilados, verificar
+
+# Latencia de sklearn contra el evaluador compilado, para una fila y para lotes
+# Uso: python bench_arboles.py [--repeticiones 200]
+
+def latencias(funcion, X, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(X)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return percentiles(tiempos)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de árboles compilados")
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--lotes", type=int, nargs="+", default=[1, 100, 10000])
+    args = parser.parse_args()
+
+    modelo = entrenar_modelo_predictivo()
+    compilado = ArbolesCompilados.desde_sklearn(modelo)
+    X_total, _ = ventanas(serie_sintetica(max(args.lotes) + 5, semilla=7))
+    diferencia = verificar(modelo, compilado, X_total)
+
+    resultados = []
+    for filas in args.lotes:
+        X = X_total[:filas]
+        repeticiones = max(5, args.repeticiones // max(1, filas // 100))
+        resultados.append({
+            "filas": filas,
+            "sklearn": latencias(modelo.predict, X, repeticiones),
+            "compilado": latencias(compilado.predict, X, repeticiones)
+        })
+
+    print(json.dumps({"diferencia_maxima": diferencia, "resultados": resultados}, indent=2))
@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from fixtures import DIR_MODELOS_ML, ModeloTemporal
+
+# Arranque en frío de predictor.py, Optimizador.py y Clasificador.py antes y después de
+# diferir las importaciones pesadas. "antes" es el árbol de ModelosML en la revisión de
+# referencia (git archive a una carpeta temporal) y "después" el árbol de trabajo.
+# Por escenario y script: mediana del tiempo total del proceso y, con -X importtime, el
+# costo acumulado de las importaciones de primer nivel y los módulos más pesados.
+# Uso: python bench_arranque.py [--referencia HEAD~1] [--repeticiones 10]
+
+SCRIPTS = {
+    "predictivo": os.path.join("Prediccion", "predictor.py"),
+    "optimizacion": os.path.join("Optimizacion", "Optimizador.py"),
+    "clasificacion": os.path.join("Clasificacion", "Clasificador.py")
+}
+VALORES = "[20.1, 21.3, 22.0, 21.7, 22.4, 23.0]"
+MODULOS_MOSTRADOS = 3
+
+def extraer_referencia(revision, destino):
+    """Copia ModelosML tal como estaba en la revisión; devuelve su ruta dentro de destino"""
+    raiz = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=DIR_MODELOS_ML,
+                          capture_output=True, text=True, check=True).stdout.strip()
+    prefijo = os.path.relpath(DIR_MODELOS_ML, raiz)
+    archivo = subprocess.run(["git", "archive", revision, prefijo], cwd=raiz, capture_output=True, check=True).stdout
+    subprocess.run(["tar", "-x", "-C", destino], input=archivo, check=True)
+    return os.path.join(destino, prefijo)
+
+def copiar_modelo(fixture, arbol):
+    """El .pkl y su artefacto de la fixture, en la misma ruta relativa dentro de otro árbol"""
+    relativa = os.path.relpath(fixture.ruta, DIR_MODELOS_ML)
+    destino = os.path.join(arbol, relativa)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    shutil.copy2(fixture.ruta, destino)
+    from Compartido.formato_modelo import ruta_artefacto
+    if os.path.isdir(ruta_artefacto(fixture.ruta)):
+        shutil.copytree(ruta_artefacto(fixture.ruta), ruta_artefacto(destino), dirs_exist_ok=True)
+
+def importaciones(stderr):
+    """(ms acumulados de las importaciones de primer nivel, módulos más pesados) de -X importtime"""
+    primer_nivel = []
+    for linea in stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea.split("|")
+        if nombre.startswith("   "):
+            continue  # Cada nivel de anidamiento agrega dos espacios: solo el primer nivel
+        primer_nivel.append((int(acumulado) / 1000, nombre.strip()))
+    primer_nivel.sort(reverse=True)
+    return round(sum(ms for ms, _ in primer_nivel), 1), [f"{nombre} ({ms:.1f} ms)" for ms, nombre in primer_nivel[:MODULOS_MOSTRADOS]]
+
+def medir_script(script, argumentos, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        salida = subprocess.run([sys.executable, script, *argumentos], cwd=os.path.dirname(script),
+                                capture_output=True, text=True)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    respuesta = json.loads(salida.stdout.strip().split("\n")[-1])
+
+    salida = subprocess.run([sys.executable, "-X", "importtime", script, *argumentos],
+                            cwd=os.path.dirname(script), capture_output=True, text=True)
+    total_importaciones, mas_pesados = importaciones(salida.stderr)
+    return {
+        "proceso_p50_ms": round(float(np.median(tiempos)), 1),
+        "importaciones_ms": total_importaciones,
+        "modulos_mas_pesados": mas_pesados,
+        "numpy_importado": "| numpy" in salida.stderr,
+        "success": respuesta["success"]
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de arranque en frío de los scripts ML")
+    parser.add_argument("--referencia", default="HEAD~1", help="Revisión de git usada como 'antes'")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as temporal:
+        arboles = {"antes": extraer_referencia(args.referencia, temporal), "despues": DIR_MODELOS_ML}
+        for tipo, script in SCRIPTS.items():
+            with ModeloTemporal(tipo, "arranque", artefacto=True) as fixture:
+                copiar_modelo(fixture, arboles["antes"])
+                escenarios = {
+                    "argumentos_invalidos": [],
+                    "sin_modelo": [fixture.usuario_id, "inexistente", VALORES],
+                    "con_modelo": [fixture.usuario_id, fixture.nombre_modelo, VALORES]
+                }
+                for escenario, argumentos in escenarios.items():
+                    fila = {"script": os.path.basename(script), "escenario": escenario}
+                    for version, arbol in arboles.items():
+                        fila[version] = medir_script(os.path.join(arbol, script), argumentos, args.repeticiones)
+                    fila["mejora_proceso_ms"] = round(fila["antes"]["proceso_p50_ms"] - fila["despues"]["proceso_p50_ms"], 1)
+                    resultados.append(fila)
+
+    print(json.dumps({"referencia": args.referencia, "resultados": resultados}, indent=2, ensure_ascii=False))
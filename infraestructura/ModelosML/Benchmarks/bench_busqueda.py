@@ -0,0 +1,58 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
+
+from fixtures import DIR_MODELOS_ML, datos_entrenamiento
+
+sys.path.insert(0, os.path.join(DIR_MODELOS_ML, "Entrenamiento", "GradientBoostingRegressor"))
+from GradientBoosting import crear_estimador
+from busqueda_hiperparametros import ESTRATEGIAS, buscar_hiperparametros
+
+# Modelo predictivo con los hiperparámetros fijos contra cada estrategia de búsqueda.
+# "r2_mezclado" es el R² con train_test_split mezclado (la evaluación original) y
+# "r2_cronologico" el R² sobre el 20% final de la serie, que es lo que importa al predecir.
+# Para cada estrategia se mide el tiempo con 1 proceso y con todos los núcleos.
+# Uso: python bench_busqueda.py [--muestras 2000] [--motor clasico] [--estrategias grid aleatoria halving]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda de hiperparámetros")
+    parser.add_argument("--muestras", type=int, default=2000)
+    parser.add_argument("--motor", choices=("clasico", "histograma"), default="clasico")
+    parser.add_argument("--estrategias", nargs="+", default=list(ESTRATEGIAS), choices=ESTRATEGIAS)
+    args = parser.parse_args()
+
+    X, y = datos_entrenamiento("predictivo", n=args.muestras)
+    corte = int(len(X) * 0.8)
+    X_train, X_test, y_train, y_test = X[:corte], X[corte:], y[:corte], y[corte:]
+
+    X_a, X_b, y_a, y_b = train_test_split(X, y, test_size=0.2, random_state=42)
+    mezclado = crear_estimador("predictivo", args.motor).fit(X_a, y_a)
+    inicio = time.perf_counter()
+    fijo = crear_estimador("predictivo", args.motor).fit(X_train, y_train)
+    resultados = [{
+        "estrategia": "fijos",
+        "tiempo_1_proceso_s": round(time.perf_counter() - inicio, 3),
+        "r2_mezclado": round(r2_score(y_b, mezclado.predict(X_b)), 4),
+        "r2_cronologico": round(r2_score(y_test, fijo.predict(X_test)), 4)
+    }]
+
+    for estrategia in args.estrategias:
+        fila = {"estrategia": estrategia}
+        for procesos, clave in ((1, "tiempo_1_proceso_s"), (-1, f"tiempo_{os.cpu_count()}_procesos_s")):
+            modelo, reporte = buscar_hiperparametros(crear_estimador("predictivo", args.motor), X_train, y_train,
+                                                     "predictivo", args.motor, estrategia, procesos=procesos)
+            fila[clave] = reporte["tiempo_s"]
+        fila.update({
+            "candidatos": reporte["candidatos"],
+            "mejores_parametros": reporte["mejores_parametros"],
+            "r2_cv": reporte["mejor_puntaje_cv"],
+            "r2_cronologico": round(r2_score(y_test, modelo.predict(X_test)), 4)
+        })
+        resultados.append(fila)
+
+    print(json.dumps(resultados, indent=2))
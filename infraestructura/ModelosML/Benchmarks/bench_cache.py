@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from fixtures import DIR_MODELOS_ML, ModeloPredictivoTemporal, serie_sintetica
+
+sys.path.insert(0, os.path.join(DIR_MODELOS_ML, "Prediccion"))
+from cache_resultados import CacheResultados
+from servidor_prediccion import ServidorPrediccion
+
+# Carga tipo tablero: varias pestañas piden el mismo pronóstico mientras los datos no cambian.
+# Compara el servidor en caliente con y sin cache de resultados y verifica que las
+# predicciones sean idénticas.
+# Uso: python bench_cache.py [--peticiones 2000] [--ventanas 50] [--artefacto]
+
+def peticiones_tablero(usuario_id, nombre_modelo, n_peticiones, n_ventanas, semilla=0):
+    """Peticiones sobre n_ventanas ventanas distintas, con n_pasos 7 o 14"""
+    rng = np.random.default_rng(semilla)
+    serie = serie_sintetica(n_ventanas + 5)
+    return [
+        {"usuario_id": usuario_id, "nombre_modelo": nombre_modelo,
+         "valores": serie[i:i + 5].round(2).tolist(), "n_pasos": int(rng.choice([7, 14]))}
+        for i in rng.integers(0, n_ventanas, n_peticiones)
+    ]
+
+def medir(servidor, peticiones):
+    respuestas = []
+    inicio = time.perf_counter()
+    for peticion in peticiones:
+        respuestas.append(servidor.atender(peticion))
+    return time.perf_counter() - inicio, respuestas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la cache de pronósticos")
+    parser.add_argument("--peticiones", type=int, default=2000)
+    parser.add_argument("--ventanas", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--artefacto", action="store_true", help="Usar el artefacto compilado en lugar del .pkl")
+    args = parser.parse_args()
+
+    resultados = []
+    with ModeloPredictivoTemporal("cache", artefacto=args.artefacto) as fixture:
+        for n_ventanas in args.ventanas:
+            peticiones = peticiones_tablero(fixture.usuario_id, fixture.nombre_modelo, args.peticiones, n_ventanas)
+            sin_cache = ServidorPrediccion()
+            con_cache = ServidorPrediccion(cache=CacheResultados())
+            # Cargar el modelo antes de medir
+            sin_cache.atender(peticiones[0])
+            con_cache.registro.obtener(fixture.usuario_id, fixture.nombre_modelo, "predictivo")
+
+            tiempo_sin, respuestas_sin = medir(sin_cache, peticiones)
+            tiempo_con, respuestas_con = medir(con_cache, peticiones)
+            diferencia = max(
+                float(np.max(np.abs(np.subtract(a["predicciones"], b["predicciones"]))))
+                for a, b in zip(respuestas_sin, respuestas_con)
+            )
+            estadisticas = con_cache.cache.estadisticas()
+            resultados.append({
+                "ventanas_distintas": n_ventanas,
+                "peticiones": args.peticiones,
+                "sin_cache_por_s": round(args.peticiones / tiempo_sin, 1),
+                "con_cache_por_s": round(args.peticiones / tiempo_con, 1),
+                "tasa_aciertos": estadisticas["tasa_aciertos"],
+                "tiempo_ahorrado_s": estadisticas["tiempo_ahorrado"],
+                "diferencia_maxima": diferencia
+            })
+
+    print(json.dumps(resultados, indent=2))
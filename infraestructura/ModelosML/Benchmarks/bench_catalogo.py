@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from fixtures import DIR_MODELOS_ML, percentiles
+
+sys.path.insert(0, DIR_MODELOS_ML)
+from Compartido.catalogo_modelos import CatalogoModelos
+from Compartido.registro_modelos import CARPETAS_TIPOS
+
+# Listado de modelos de un usuario recorriendo la carpeta (como lo hacía predictor.py) contra
+# el catálogo SQLite, sobre un árbol temporal con muchos usuarios y archivos .pkl vacíos.
+# Uso: python bench_catalogo.py [--usuarios 100 1000 5000] [--modelos-por-usuario 3]
+
+def crear_arbol(directorio, n_usuarios, modelos_por_usuario):
+    for carpeta_base, carpeta_modelos in CARPETAS_TIPOS.values():
+        os.makedirs(os.path.join(directorio, carpeta_base, carpeta_modelos), exist_ok=True)
+    for usuario in range(n_usuarios):
+        for tipo, (carpeta_base, carpeta_modelos) in CARPETAS_TIPOS.items():
+            for modelo in range(modelos_por_usuario):
+                ruta = os.path.join(directorio, carpeta_base, carpeta_modelos, f"u{usuario}_modelo{modelo}_{tipo}.pkl")
+                open(ruta, "wb").close()
+
+def listar_recorriendo(directorio, usuario_id):
+    """Listado original de predictor.py: listdir y filtro por prefijo en cada llamada"""
+    carpeta = os.path.join(directorio, *CARPETAS_TIPOS["predictivo"])
+    return [archivo.replace(".pkl", "").replace(f"{usuario_id}_", "").replace("_predictivo", "")
+            for archivo in os.listdir(carpeta)
+            if archivo.endswith("_predictivo.pkl") and archivo.startswith(f"{usuario_id}_")]
+
+def latencias(funcion, usuarios):
+    tiempos = []
+    for usuario_id in usuarios:
+        inicio = time.perf_counter()
+        funcion(usuario_id)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return percentiles(tiempos)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del catálogo de modelos")
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--modelos-por-usuario", type=int, default=3)
+    parser.add_argument("--consultas", type=int, default=200)
+    args = parser.parse_args()
+
+    resultados = []
+    for n_usuarios in args.usuarios:
+        with tempfile.TemporaryDirectory() as directorio:
+            crear_arbol(directorio, n_usuarios, args.modelos_por_usuario)
+            catalogo = CatalogoModelos(os.path.join(directorio, "catalogo.sqlite3"), directorio)
+            inicio = time.perf_counter()
+            total = catalogo.reconstruir()
+            reconstruccion = time.perf_counter() - inicio
+
+            usuarios = [f"u{i % n_usuarios}" for i in range(0, args.consultas * 7, 7)]
+            recorrido = latencias(lambda u: listar_recorriendo(directorio, u), usuarios)
+            con_catalogo = latencias(lambda u: [m["nombre_modelo"] for m in catalogo.listar(u, "predictivo")], usuarios)
+            busqueda = latencias(lambda u: catalogo.buscar(u, "modelo0", "predictivo"), usuarios)
+            assert sorted(listar_recorriendo(directorio, "u0")) == [m["nombre_modelo"] for m in catalogo.listar("u0", "predictivo")]
+            resultados.append({
+                "usuarios": n_usuarios,
+                "modelos": total,
+                "reconstruccion_s": round(reconstruccion, 3),
+                "listar_recorriendo_p50_ms": recorrido["p50_ms"],
+                "listar_catalogo_p50_ms": con_catalogo["p50_ms"],
+                "buscar_catalogo_p50_ms": busqueda["p50_ms"]
+            })
+
+    print(json.dumps(resultados, indent=2))
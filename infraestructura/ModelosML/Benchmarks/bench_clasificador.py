@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from fixtures import DIR_MODELOS_ML, serie_sintetica, ventanas
+
+sys.path.insert(0, DIR_MODELOS_ML)
+sys.path.insert(0, os.path.join(DIR_MODELOS_ML, "Clasificacion"))
+from Clasificador import clasificar_lote
+
+# Throughput de la clasificación original (reglas, una ventana por llamada) contra
+# clasificar_lote con reglas y con un GradientBoostingClassifier entrenado.
+# Uso: python bench_clasificador.py [--tamanos 1 10 100 1000 10000]
+
+# Versión original de Clasificador.py, como referencia
+
+def clasificar_simple(datos):
+    """Clasificación simple sin modelo - solo reglas lógicas"""
+    
+    # Calcular estadísticas
+    promedio = np.mean(datos)
+    variabilidad = np.std(datos)
+    tendencia = "ascendente" if datos[-1] > datos[0] else "descendente"
+    
+    # Reglas de clasificación basadas en temperatura
+    if promedio < 18:
+        clase_predicha = "Frio"
+        probabilidades = {"Frio": 0.85, "Normal": 0.12, "Caliente": 0.03}
+    elif promedio < 25:
+        clase_predicha = "Normal" 
+        probabilidades = {"Frio": 0.15, "Normal": 0.70, "Caliente": 0.15}
+    else:
+        clase_predicha = "Caliente"
+        probabilidades = {"Frio": 0.05, "Normal": 0.15, "Caliente": 0.80}
+    
+    # Ajustar probabilidades según variabilidad
+    if variabilidad > 2.0:  # Alta variabilidad
+        # Reducir confianza en la clase principal
+        factor_reduccion = 0.9
+        probabilidades[clase_predicha] *= factor_reduccion
+        # Redistribuir el resto
+        resto = (1 - probabilidades[clase_predicha]) / 2
+        for clase in probabilidades:
+            if clase != clase_predicha:
+                probabilidades[clase] = resto
+    
+    # Redondear probabilidades
+    for clase in probabilidades:
+        probabilidades[clase] = round(probabilidades[clase], 3)
+    
+    # Calcular nivel de confianza basado en consistencia de datos
+    confianza = max(0.6, 1.0 - (variabilidad / 10))  # Menos variabilidad = más confianza
+    
+    # Clasificación adicional por patrón
+    patron = "estable"
+    if variabilidad > 2:
+        patron = "variable"
+    elif abs(datos[-1] - datos[0]) > 3:
+        patron = "cambiante"
+    
+    return {
+        "clase_predicha": clase_predicha,
+        "probabilidades": probabilidades,
+        "confianza": round(confianza, 3),
+        "caracteristicas_detectadas": {
+            "temperatura_promedio": round(promedio, 2),
+            "variabilidad": round(variabilidad, 2),
+            "tendencia": tendencia,
+            "patron": patron,
+            "rango": f"{round(min(datos), 1)} - {round(max(datos), 1)}°C"
+        },
+        "reglas_aplicadas": [
+            f"Promedio {promedio:.1f}°C → Clase {clase_predicha}",
+            f"Variabilidad {variabilidad:.1f} → Confianza {confianza:.1f}",
+            f"Patrón detectado: {patron}"
+        ]
+    }
+
+
+def entrenar_clasificador():
+    from sklearn.ensemble import GradientBoostingClassifier
+    X, y = ventanas(serie_sintetica(1000))
+    return GradientBoostingClassifier(n_estimators=100, learning_rate=0.1, max_depth=3, random_state=42).fit(
+        X, np.digitize(y, [18, 25]))
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    funcion()
+    return time.perf_counter() - inicio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del clasificador por lotes")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1, 10, 100, 1000, 10000])
+    args = parser.parse_args()
+
+    modelo = entrenar_clasificador()
+    resultados = []
+    for n in args.tamanos:
+        X, _ = ventanas(serie_sintetica(n + 5, semilla=3))
+        series = X.tolist()
+        original = medir(lambda: [clasificar_simple(serie) for serie in series])
+        reglas = medir(lambda: clasificar_lote(series))
+        con_modelo = medir(lambda: clasificar_lote(series, modelo))
+        resultados.append({
+            "ventanas": n,
+            "original_por_s": round(n / original, 1),
+            "lote_reglas_por_s": round(n / reglas, 1),
+            "lote_modelo_por_s": round(n / con_modelo, 1)
+        })
+
+    print(json.dumps(resultados, indent=2))
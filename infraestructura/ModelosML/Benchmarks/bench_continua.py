@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from fixtures import DIR_MODELOS_ML, ModeloPredictivoTemporal, serie_sintetica
+
+DIR_PREDICCION = os.path.join(DIR_MODELOS_ML, "Prediccion")
+sys.path.insert(0, DIR_PREDICCION)
+from prediccion_continua import PrediccionContinua
+from servidor_prediccion import ServidorPrediccion
+
+# Throughput (mensajes por segundo) de la predicción continua contra reenviar la lista
+# completa de valores al servidor de predicción en cada lectura.
+# Uso: python bench_continua.py [--mensajes 2000] [--variables 1 4]
+
+def mensajes_lecturas(usuario_id, nombre_modelo, n_mensajes, n_variables):
+    series = [serie_sintetica(n_mensajes, semilla=v) for v in range(n_variables)]
+    return [
+        {"usuario_id": usuario_id, "nombre_modelo": nombre_modelo,
+         "lecturas": {f"Temp{v + 1}": float(series[v][i]) for v in range(n_variables)}}
+        for i in range(n_mensajes)
+    ]
+
+def medir_continua(mensajes):
+    servicio = PrediccionContinua()
+    servicio.recibir(mensajes[0])
+    inicio = time.perf_counter()
+    for mensaje in mensajes:
+        resultado = servicio.recibir(mensaje)
+    if not resultado["success"]:
+        raise Exception(resultado["error"])
+    return len(mensajes) / (time.perf_counter() - inicio)
+
+def medir_reenvio(mensajes, ventana=20):
+    """Servidor en caliente recibiendo las últimas `ventana` lecturas de cada variable por mensaje"""
+    servidor = ServidorPrediccion()
+    historial = {}
+    peticiones = []
+    for mensaje in mensajes:
+        for variable, valor in mensaje["lecturas"].items():
+            historial.setdefault(variable, []).append(valor)
+        peticiones.append({
+            "usuario_id": mensaje["usuario_id"], "nombre_modelo": mensaje["nombre_modelo"],
+            "valores": {variable: valores[-ventana:] for variable, valores in historial.items()}
+        })
+    # Las primeras peticiones tienen menos de 5 valores; se mide desde la ventana completa
+    peticiones = peticiones[ventana:]
+    servidor.procesar_linea(json.dumps(peticiones[0]))
+    inicio = time.perf_counter()
+    for peticion in peticiones:
+        servidor.procesar_linea(json.dumps(peticion))
+    return len(peticiones) / (time.perf_counter() - inicio)
+
+def medir_proceso(usuario_id, nombre_modelo, mensajes):
+    """Proceso prediccion_continua.py por stdin/stdout, de extremo a extremo"""
+    entrada = "".join(json.dumps(mensaje) + "\n" for mensaje in mensajes)
+    inicio = time.perf_counter()
+    salida = subprocess.run(
+        [sys.executable, os.path.join(DIR_PREDICCION, "prediccion_continua.py")],
+        input=entrada, cwd=DIR_PREDICCION, capture_output=True, text=True
+    )
+    transcurrido = time.perf_counter() - inicio
+    respuestas = salida.stdout.strip().split("\n")
+    if len(respuestas) != len(mensajes) or not json.loads(respuestas[-1])["success"]:
+        raise Exception(salida.stderr[-500:])
+    return len(mensajes) / transcurrido
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la predicción continua")
+    parser.add_argument("--mensajes", type=int, default=2000)
+    parser.add_argument("--variables", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    resultados = []
+    for artefacto in (False, True):
+        with ModeloPredictivoTemporal("continua", artefacto=artefacto) as fixture:
+            for n_variables in args.variables:
+                mensajes = mensajes_lecturas(fixture.usuario_id, fixture.nombre_modelo, args.mensajes, n_variables)
+                resultados.append({
+                    "modelo": "artefacto" if artefacto else "pkl",
+                    "variables": n_variables,
+                    "mensajes": args.mensajes,
+                    "continua_mensajes_por_s": round(medir_continua(mensajes), 1),
+                    "reenvio_lista_mensajes_por_s": round(medir_reenvio(mensajes), 1),
+                    # Incluye el arranque del proceso y la carga del modelo
+                    "proceso_stdin_mensajes_por_s": round(
+                        medir_proceso(fixture.usuario_id, fixture.nombre_modelo, mensajes), 1)
+                })
+
+    print(json.dumps(resultados, indent=2))
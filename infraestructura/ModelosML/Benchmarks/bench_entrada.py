@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from fixtures import DIR_MODELOS_ML, ModeloPredictivoTemporal, USUARIO_BENCHMARK, percentiles, serie_sintetica
+
+# Entrada de valores a los scripts ML por la línea de comandos (JSON escapado, como lo enviaba
+# EjecutorModeloPython) contra stdin (JSON y float64 crudo) y archivo .npy, para 10^2..10^6
+# valores. Por cada combinación: latencia del proceso, tiempo de parseo informado por el script
+# y bytes de stdout. La línea de comandos falla con E2BIG cuando el argumento pasa de 128 KB.
+# Uso: python bench_entrada.py [--tamanos 100 1000 10000 100000 1000000] [--repeticiones 5]
+#                              [--scripts predictor clasificador optimizador]
+
+SCRIPTS = {
+    "predictor": os.path.join(DIR_MODELOS_ML, "Prediccion", "predictor.py"),
+    "clasificador": os.path.join(DIR_MODELOS_ML, "Clasificacion", "Clasificador.py"),
+    "optimizador": os.path.join(DIR_MODELOS_ML, "Optimizacion", "Optimizador.py")
+}
+MODOS = ("argv_json", "stdin_json", "stdin_f64", "archivo_npy")
+
+def argumentos_modo(modo, serie, ruta_npy):
+    """(valor del argumento, bytes para stdin, opciones extra) de cada modo de entrada"""
+    if modo == "argv_json":
+        return json.dumps(serie.tolist()).replace('"', '\\"'), None, []
+    if modo == "stdin_json":
+        return "-", json.dumps(serie.tolist()).encode(), ["--silencioso"]
+    if modo == "stdin_f64":
+        return "-", serie.astype("<f8").tobytes(), ["--formato", "f64", "--silencioso"]
+    return "@" + ruta_npy, None, ["--silencioso"]
+
+def ejecutar(script, argumentos, entrada):
+    inicio = time.perf_counter()
+    salida = subprocess.run([sys.executable, script, *argumentos], input=entrada,
+                            cwd=os.path.dirname(script), capture_output=True)
+    transcurrido = (time.perf_counter() - inicio) * 1000
+    resultado = json.loads(salida.stdout.decode().strip().split("\n")[-1])
+    return resultado, transcurrido, len(salida.stdout)
+
+def medir_modo(script, modo, serie, ruta_npy, repeticiones, nombre_modelo):
+    valor, entrada, opciones = argumentos_modo(modo, serie, ruta_npy)
+    argumentos = [USUARIO_BENCHMARK, nombre_modelo, valor, *opciones]
+    tiempos, parseo = [], []
+    try:
+        for _ in range(repeticiones):
+            resultado, transcurrido, bytes_salida = ejecutar(script, argumentos, entrada)
+            if not resultado.get("success"):
+                return {"error": resultado.get("error")}
+            tiempos.append(transcurrido)
+            parseo.append(resultado["tiempos"].get("parseo_argumentos_ms", 0.0))
+    except OSError as e:
+        return {"error": f"{type(e).__name__}: {e.strerror}"}
+    return {
+        "proceso_p50_ms": percentiles(tiempos)["p50_ms"],
+        "parseo_p50_ms": percentiles(parseo)["p50_ms"],
+        "bytes_stdout": bytes_salida
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de los modos de entrada de los scripts ML")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[100, 1000, 10000, 100000, 1000000])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--scripts", nargs="+", choices=SCRIPTS, default=list(SCRIPTS))
+    args = parser.parse_args()
+
+    resultados = []
+    with ModeloPredictivoTemporal("entrada", artefacto=True) as modelo, tempfile.TemporaryDirectory() as directorio:
+        for tamano in args.tamanos:
+            serie = np.resize(serie_sintetica(), tamano)
+            ruta_npy = os.path.join(directorio, f"serie_{tamano}.npy")
+            np.save(ruta_npy, serie)
+            for nombre in args.scripts:
+                fila = {"script": nombre, "valores": tamano}
+                for modo in MODOS:
+                    fila[modo] = medir_modo(SCRIPTS[nombre], modo, serie, ruta_npy,
+                                            args.repeticiones, modelo.nombre_modelo)
+                resultados.append(fila)
+
+    print(json.dumps(resultados, indent=2))
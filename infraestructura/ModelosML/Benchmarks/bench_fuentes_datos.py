@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from fixtures import DIR_MODELOS_ML, serie_sintetica
+
+# Tiempo de carga y RSS pico de pd.read_excel (ruta anterior) contra fuentes_datos.py
+# Cada medición corre en un proceso nuevo para que el RSS pico no se mezcle.
+# Uso: python bench_fuentes_datos.py [--filas 10000 100000]
+
+DIR_ENTRENAMIENTO = os.path.join(DIR_MODELOS_ML, "Entrenamiento", "GradientBoostingRegressor")
+COLUMNA = "Temp1 - °C"
+
+def generar_archivos(carpeta, filas):
+    import pandas as pd
+    df = pd.DataFrame({
+        "Fecha": pd.date_range("2024-01-01", periods=filas, freq="min"),
+        COLUMNA: serie_sintetica(filas),
+        "Humedad": serie_sintetica(filas, semilla=1) * 2
+    })
+    rutas = {"xlsx": os.path.join(carpeta, "datos.xlsx"), "csv": os.path.join(carpeta, "datos.csv")}
+    df.to_excel(rutas["xlsx"], index=False)
+    df.to_csv(rutas["csv"], index=False)
+    try:
+        rutas["parquet"] = os.path.join(carpeta, "datos.parquet")
+        df.to_parquet(rutas["parquet"], index=False)
+    except ImportError:
+        del rutas["parquet"]
+    return rutas
+
+def medir_en_proceso(modo, ruta):
+    """Ejecuta una carga en un proceso hijo y devuelve tiempo y RSS pico"""
+    codigo = f"""
+import json, resource, sys, time
+sys.path.insert(0, {DIR_ENTRENAMIENTO!r})
+inicio = time.perf_counter()
+if {modo!r} == "pd.read_excel":
+    import pandas as pd
+    df = pd.read_excel({ruta!r})
+    df[{COLUMNA!r}] = pd.to_numeric(df[{COLUMNA!r}], errors="coerce")
+    n = len(df[{COLUMNA!r}].dropna().values)
+else:
+    from fuentes_datos import cargar_serie
+    n = len(cargar_serie({ruta!r}, {COLUMNA!r}, usar_cache={modo == "cache"!r}))
+tiempo = time.perf_counter() - inicio
+try:
+    # VmHWM se reinicia con exec; ru_maxrss puede heredar el pico del proceso padre
+    with open("/proc/self/status") as estado:
+        pico_kb = int(next(l for l in estado if l.startswith("VmHWM")).split()[1])
+except OSError:
+    pico_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"tiempo_s": round(tiempo, 4), "rss_pico_mb": round(pico_kb / 1024, 1), "registros": n}}))
+"""
+    salida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout.strip().split("\n")[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de carga de datos de entrenamiento")
+    parser.add_argument("--filas", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    sys.path.insert(0, DIR_ENTRENAMIENTO)
+    from fuentes_datos import cargar_serie
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        for filas in args.filas:
+            rutas = generar_archivos(carpeta, filas)
+            fila = {"filas": filas, "pd.read_excel": medir_en_proceso("pd.read_excel", rutas["xlsx"])}
+            for formato, ruta in rutas.items():
+                fila[formato] = medir_en_proceso("sin_cache", ruta)
+            # Poblar la cache y medir la recarga desde .npy
+            cargar_serie(rutas["xlsx"], COLUMNA)
+            fila["cache"] = medir_en_proceso("cache", rutas["xlsx"])
+            resultados.append(fila)
+
+    print(json.dumps(resultados, indent=2))
@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from fixtures import DIR_MODELOS_ML, serie_sintetica
+
+sys.path.insert(0, DIR_MODELOS_ML)
+sys.path.insert(0, os.path.join(DIR_MODELOS_ML, "Prediccion"))
+sys.path.insert(0, os.path.join(DIR_MODELOS_ML, "Entrenamiento", "GradientBoostingRegressor"))
+from GradientBoosting import crear_estimador, crear_secuencias_directas, crear_secuencias_temporales
+from predictor import predecir_lote
+
+from Compartido.arboles_compilados import ArbolesCompilados
+
+# Modelo predictivo recursivo (un predict por paso) contra el directo (un predict para todo
+# el horizonte), ambos compilados como los carga predictor.py:
+#   latencia de una petición para n_pasos = 1..horizonte
+#   MAE por horizonte sobre el 20% final de la serie
+# Uso: python bench_horizonte.py [--horizonte 50] [--muestras 3000] [--repeticiones 50]
+
+def latencia_ms(modelo, serie, n_pasos, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        predecir_lote(modelo, [serie], n_pasos)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return round(float(np.median(tiempos)), 3)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de predicción recursiva vs directa")
+    parser.add_argument("--horizonte", type=int, default=50)
+    parser.add_argument("--muestras", type=int, default=3000)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--motor", choices=("clasico", "histograma"), default="clasico")
+    args = parser.parse_args()
+
+    datos = serie_sintetica(args.muestras)
+    corte = int(len(datos) * 0.8)
+    entrenamiento, prueba = datos[:corte], datos[corte:]
+
+    inicio = time.perf_counter()
+    recursivo = crear_estimador("predictivo", args.motor).fit(*crear_secuencias_temporales(entrenamiento))
+    tiempo_recursivo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    directo = crear_estimador("predictivo", args.motor, args.horizonte).fit(
+        *crear_secuencias_directas(entrenamiento, horizonte=args.horizonte))
+    directo.horizonte_directo_ = args.horizonte
+    tiempo_directo = time.perf_counter() - inicio
+    modelos = {"recursivo": ArbolesCompilados.desde_sklearn(recursivo),
+               "directo": ArbolesCompilados.desde_sklearn(directo)}
+
+    serie = prueba[:5].tolist()
+    latencias = [{"n_pasos": n, **{nombre: latencia_ms(modelo, serie, n, args.repeticiones)
+                                   for nombre, modelo in modelos.items()}}
+                 for n in range(1, args.horizonte + 1)]
+
+    X_prueba, Y_prueba = crear_secuencias_directas(prueba, horizonte=args.horizonte)
+    error = {nombre: np.abs(np.array(predecir_lote(modelo, X_prueba.tolist(), args.horizonte)) - Y_prueba).mean(axis=0)
+             for nombre, modelo in modelos.items()}
+    precision = [{"horizonte": h + 1, "mae_recursivo": round(float(error["recursivo"][h]), 4),
+                  "mae_directo": round(float(error["directo"][h]), 4)} for h in range(args.horizonte)]
+
+    print(json.dumps({
+        "entrenamiento_s": {"recursivo": round(tiempo_recursivo, 3), "directo": round(tiempo_directo, 3)},
+        "arboles": {nombre: modelo.n_arboles for nombre, modelo in modelos.items()},
+        "latencia_ms": latencias,
+        "mae_por_horizonte": precision
+    }, indent=2))
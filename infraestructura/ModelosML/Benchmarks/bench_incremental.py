@@ -0,0 +1,90 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from fixtures import DIR_MODELOS_ML, USUARIO_BENCHMARK, serie_sintetica
+
+sys.path.insert(0, os.path.join(DIR_MODELOS_ML, "Entrenamiento", "GradientBoostingRegressor"))
+import fuentes_datos
+from GradientBoosting import crear_secuencias_temporales, entrenar_modelo_detallado
+
+from Compartido.formato_modelo import ruta_artefacto
+from Compartido.registro_modelos import ruta_modelo
+
+# Actualización incremental (warm_start sobre los valores nuevos) contra reentrenamiento
+# completo de un modelo predictivo cuya historia crece de 10^4 a 10^6 valores. Para cada
+# tamaño: entrenamiento inicial con la historia, se agregan --nuevos valores al CSV y se
+# mide actualizar_modelo y entrenar_modelo_detallado completo (tiempo de la llamada entera,
+# con lectura del archivo y guardado, y de la fase de entrenamiento). La precisión es el MAE
+# sobre los --futuros valores siguientes, que ningún modelo vio.
+# El catálogo y la caché de datos van a una carpeta temporal.
+# Uso: python bench_incremental.py [--tamanos 10000 100000 1000000] [--nuevos 1440] [--futuros 2000]
+
+COLUMNA = "Temp1 - °C"
+
+def escribir_csv(ruta, valores):
+    import pandas as pd
+    pd.DataFrame({COLUMNA: valores}).to_csv(ruta, index=False)
+
+def entrenar(ruta_csv, incremental):
+    """(detalle, segundos) de un entrenamiento sin la salida por consola"""
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        detalle = entrenar_modelo_detallado(ruta_csv, USUARIO_BENCHMARK, "incremental", "predictivo", COLUMNA,
+                                            permitir_simulados=False, incremental=incremental)
+    return detalle, time.perf_counter() - inicio
+
+def mae_futuro(modelo, serie, inicio):
+    X, y = crear_secuencias_temporales(serie[inicio - 5:])
+    return round(float(np.abs(modelo.predict(X) - y).mean()), 4)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de actualización incremental contra reentrenamiento")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--nuevos", type=int, default=1440, help="Valores agregados (un día a un valor por minuto)")
+    parser.add_argument("--futuros", type=int, default=2000)
+    args = parser.parse_args()
+
+    resultados = []
+    ruta_pkl = ruta_modelo(USUARIO_BENCHMARK, "incremental", "predictivo")
+    with tempfile.TemporaryDirectory() as directorio:
+        os.environ["ML_CATALOGO"] = os.path.join(directorio, "catalogo.sqlite3")
+        fuentes_datos.CARPETA_CACHE = os.path.join(directorio, "CacheDatos")
+        ruta_csv = os.path.join(directorio, "datos.csv")
+        try:
+            for tamano in args.tamanos:
+                serie = serie_sintetica(tamano + args.nuevos + args.futuros)
+                total = tamano + args.nuevos
+                escribir_csv(ruta_csv, serie[:tamano])
+                inicial, _ = entrenar(ruta_csv, incremental=False)
+
+                escribir_csv(ruta_csv, serie[:total])
+                incremental, tiempo_incremental = entrenar(ruta_csv, incremental=True)
+                completo, tiempo_completo = entrenar(ruta_csv, incremental=False)
+                resultados.append({
+                    "historia": tamano,
+                    "nuevos": args.nuevos,
+                    "modo": incremental["actualizacion"]["modo"],
+                    "incremental_s": round(tiempo_incremental, 3),
+                    "incremental_entrenamiento_ms": incremental["tiempos"].get("entrenamiento_ms"),
+                    "completo_s": round(tiempo_completo, 3),
+                    "completo_entrenamiento_ms": completo["tiempos"].get("entrenamiento_ms"),
+                    "aceleracion": round(tiempo_completo / tiempo_incremental, 1),
+                    "mae_futuro_sin_actualizar": mae_futuro(inicial["modelo"], serie, total),
+                    "mae_futuro_incremental": mae_futuro(incremental["modelo"], serie, total),
+                    "mae_futuro_completo": mae_futuro(completo["modelo"], serie, total)
+                })
+        finally:
+            if os.path.exists(ruta_pkl):
+                os.remove(ruta_pkl)
+            shutil.rmtree(ruta_artefacto(ruta_pkl), ignore_errors=True)
+
+    print(json.dumps(resultados, indent=2))
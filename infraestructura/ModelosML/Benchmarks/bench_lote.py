@@ -0,0 +1,42 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from fixtures import DIR_MODELOS_ML, entrenar_modelo_predictivo, serie_sintetica
+
+sys.path.insert(0, os.path.join(DIR_MODELOS_ML, "Prediccion"))
+from predictor import predecir_lote, predecir_multiples
+
+# Throughput de predecir_multiples serie por serie contra predecir_lote
+# Uso: python bench_lote.py [--n-pasos 7] [--tamanos 1 10 100 1000]
+
+def medir(funcion, repeticiones=3):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de predicción por lotes")
+    parser.add_argument("--n-pasos", type=int, default=7)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1, 10, 100, 1000])
+    args = parser.parse_args()
+
+    modelo = entrenar_modelo_predictivo()
+    resultados = []
+    for n in args.tamanos:
+        series = [serie_sintetica(20, semilla=i).tolist() for i in range(n)]
+        secuencial = medir(lambda: [predecir_multiples(modelo, serie, args.n_pasos) for serie in series])
+        lote = medir(lambda: predecir_lote(modelo, series, args.n_pasos))
+        resultados.append({
+            "n_series": n,
+            "secuencial_series_por_s": round(n / secuencial, 1),
+            "lote_series_por_s": round(n / lote, 1),
+            "aceleracion": round(secuencial / lote, 2)
+        })
+
+    print(json.dumps({"n_pasos": args.n_pasos, "resultados": resultados}, indent=2))
@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import joblib
+import numpy as np
+
+from fixtures import DIR_MODELOS_ML, TIPOS_MODELO, entrenar_modelo_fijo
+
+from Compartido.formato_modelo import cargar_artefacto, exportar_artefacto
+
+# Memoria por modelo con muchos usuarios: --cantidades copias de un mismo modelo en archivos
+# distintos (un modelo por usuario), cargadas en un proceso nuevo que mide la memoria residente
+# antes y después (RssAnon: memoria propia del proceso; RssFile: páginas de archivos mapeados,
+# compartibles entre procesos). Variantes:
+#   pkl             joblib.load del .pkl, como antes de los artefactos
+#   exacto          artefacto float64 cargado en memoria (mmap=False)
+#   compacto        artefacto compacto (float32) cargado en memoria
+#   podado          artefacto compacto sin los últimos árboles que aportan menos que --poda
+#   compacto_mmap   artefacto compacto mapeado (mmap=True), como lo abre predictor.py
+# Cada modelo se evalúa una vez al cargarlo, como en el primer uso. Antes de medir se carga una
+# copia más, para no contar las importaciones diferidas. Además por tipo: bytes en
+# disco y en arreglos de cada variante, árboles y diferencia máxima con modelo.predict.
+# Uso: python bench_memoria_modelos.py [--tipos predictivo ...] [--cantidades 100 1000] [--poda 0.05]
+
+VARIANTES = ("pkl", "exacto", "compacto", "podado", "compacto_mmap")
+MUESTRAS = 1000
+
+CODIGO_CARGA = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+variante, n_caracteristicas = sys.argv[2], int(sys.argv[3])
+rutas = json.loads(sys.stdin.read())
+import numpy as np
+if variante == "pkl":
+    import joblib, sklearn.ensemble
+else:
+    from Compartido.formato_modelo import cargar_artefacto
+
+def memoria_kb():
+    with open("/proc/self/status") as estado:
+        campos = dict(linea.split(":", 1) for linea in estado)
+    return {clave: int(campos[clave].split()[0]) for clave in ("VmRSS", "RssAnon", "RssFile")}
+
+def cargar(ruta):
+    modelo = joblib.load(ruta) if variante == "pkl" else cargar_artefacto(ruta, mmap=variante.endswith("_mmap"))
+    modelo.predict(X)
+    return modelo
+
+X = np.full((1, n_caracteristicas), 22.0)
+modelos = [cargar(rutas[0])]
+antes = memoria_kb()
+inicio = time.perf_counter()
+for ruta in rutas[1:]:
+    modelos.append(cargar(ruta))
+transcurrido = time.perf_counter() - inicio
+despues = memoria_kb()
+print(json.dumps({"carga_s": transcurrido, "antes_kb": antes, "despues_kb": despues}))
+"""
+
+def tamano_en_disco(ruta):
+    if os.path.isfile(ruta):
+        return os.path.getsize(ruta)
+    return sum(os.path.getsize(os.path.join(ruta, archivo)) for archivo in os.listdir(ruta))
+
+def preparar_variantes(modelo, directorio, poda):
+    """Ruta del .pkl o del artefacto de cada variante y su descripción"""
+    ruta_pkl = os.path.join(directorio, "modelo.pkl")
+    joblib.dump(modelo, ruta_pkl)
+    rutas = {"pkl": ruta_pkl}
+    for variante, opciones in (("exacto", {}), ("compacto", {"compacto": True}), ("podado", {"compacto": True, "poda": poda})):
+        # exportar_artefacto escribe junto al .pkl indicado: un nombre por variante
+        rutas[variante], _ = exportar_artefacto(modelo, os.path.join(directorio, f"{variante}.pkl"), **opciones)
+
+    rng = np.random.default_rng(1)
+    X = rng.uniform(10, 35, size=(MUESTRAS, modelo.n_features_in_))
+    original = modelo.predict_proba(X) if hasattr(modelo, "predict_proba") else modelo.predict(X)
+    descripcion = {}
+    for variante in ("pkl", "exacto", "compacto", "podado"):
+        fila = {"bytes_disco": tamano_en_disco(rutas[variante])}
+        if variante != "pkl":
+            compilado = cargar_artefacto(rutas[variante], mmap=False)
+            prediccion = compilado.predict_proba(X) if compilado.tipo == "clasificacion" else compilado.predict(X)
+            fila.update(bytes_arreglos=compilado.nbytes, arboles=compilado.n_arboles,
+                        diferencia_maxima=float(np.abs(prediccion - original).max()))
+        descripcion[variante] = fila
+    return rutas, descripcion
+
+def copiar(ruta, directorio, cantidad):
+    """cantidad copias independientes (sin enlaces: cada usuario tiene sus propios archivos)"""
+    copias = []
+    base = os.path.basename(ruta)
+    for i in range(cantidad):
+        destino = os.path.join(directorio, f"{i:05d}_{base}")
+        if os.path.isdir(ruta):
+            shutil.copytree(ruta, destino)
+        else:
+            shutil.copyfile(ruta, destino)
+        copias.append(destino)
+    return copias
+
+def medir_carga(variante, rutas, n_caracteristicas):
+    salida = subprocess.run([sys.executable, "-c", CODIGO_CARGA, DIR_MODELOS_ML, variante, str(n_caracteristicas)],
+                            input=json.dumps(rutas), capture_output=True, text=True, check=True)
+    medida = json.loads(salida.stdout.strip().split("\n")[-1])
+    antes, despues = medida["antes_kb"], medida["despues_kb"]
+    cantidad = len(rutas) - 1
+    return {
+        "carga_s": round(medida["carga_s"], 3),
+        "rss_mb": round(despues["VmRSS"] / 1024, 1),
+        "rss_por_modelo_kb": round((despues["VmRSS"] - antes["VmRSS"]) / cantidad, 1),
+        "anon_por_modelo_kb": round((despues["RssAnon"] - antes["RssAnon"]) / cantidad, 1),
+        "archivo_por_modelo_kb": round((despues["RssFile"] - antes["RssFile"]) / cantidad, 1)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de memoria con muchos modelos cargados")
+    parser.add_argument("--tipos", nargs="+", choices=TIPOS_MODELO, default=list(TIPOS_MODELO))
+    parser.add_argument("--cantidades", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--poda", type=float, default=0.05)
+    args = parser.parse_args()
+
+    resultados = []
+    for tipo in args.tipos:
+        modelo = entrenar_modelo_fijo(tipo)
+        with tempfile.TemporaryDirectory() as directorio:
+            rutas, descripcion = preparar_variantes(modelo, directorio, args.poda)
+            cargas, copias_por_origen = {}, {}
+            for variante in VARIANTES:
+                origen = variante.replace("_mmap", "")
+                if origen not in copias_por_origen:
+                    carpeta = os.path.join(directorio, f"copias_{origen}")
+                    os.makedirs(carpeta)
+                    copias_por_origen[origen] = copiar(rutas[origen], carpeta, max(args.cantidades) + 1)
+                copias = copias_por_origen[origen]
+                for cantidad in args.cantidades:
+                    cargas.setdefault(str(cantidad), {})[variante] = medir_carga(
+                        variante, copias[:cantidad + 1], modelo.n_features_in_)
+        resultados.append({"tipo": tipo, "poda": args.poda, "variantes": descripcion, "cargados": cargas})
+
+    print(json.dumps(resultados, indent=2))
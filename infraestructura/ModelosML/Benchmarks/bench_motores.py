@@ -0,0 +1,69 @@
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import joblib
+from sklearn.metrics import accuracy_score, r2_score
+
+from fixtures import DIR_MODELOS_ML, percentiles, serie_sintetica
+
+sys.path.insert(0, DIR_MODELOS_ML)
+sys.path.insert(0, os.path.join(DIR_MODELOS_ML, "Entrenamiento", "GradientBoostingRegressor"))
+from GradientBoosting import MOTORES, crear_datos_clasificacion, crear_estimador, crear_secuencias_temporales
+
+from Compartido.arboles_compilados import ArbolesCompilados
+
+# Compara los motores de entrenamiento (clasico vs histograma) por tamaño de datos:
+# tiempo de entrenamiento, tamaño del .pkl, latencia de predicción de una fila y R²/accuracy.
+# Uso: python bench_motores.py [--tamanos 1000 10000 100000] [--tipos predictivo clasificacion]
+
+CONSTRUCTORES = {"predictivo": crear_secuencias_temporales, "clasificacion": crear_datos_clasificacion}
+
+def latencia_una_fila(modelo, X, repeticiones=100):
+    tiempos = []
+    for i in range(repeticiones):
+        fila = X[i % len(X)].reshape(1, -1)
+        inicio = time.perf_counter()
+        modelo.predict(fila)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return percentiles(tiempos)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de motores de entrenamiento")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--tipos", nargs="+", default=list(CONSTRUCTORES), choices=list(CONSTRUCTORES))
+    args = parser.parse_args()
+
+    resultados = []
+    for tamano in args.tamanos:
+        datos = serie_sintetica(tamano)
+        for tipo in args.tipos:
+            X, y = CONSTRUCTORES[tipo](datos)
+            # Partición cronológica: el 20% final es prueba
+            corte = int(len(X) * 0.8)
+            X_train, X_test, y_train, y_test = X[:corte], X[corte:], y[:corte], y[corte:]
+            for motor in MOTORES:
+                modelo = crear_estimador(tipo, motor)
+                inicio = time.perf_counter()
+                modelo.fit(X_train, y_train)
+                tiempo_fit = time.perf_counter() - inicio
+
+                buffer = io.BytesIO()
+                joblib.dump(modelo, buffer)
+                y_pred = modelo.predict(X_test)
+                metrica = (accuracy_score if tipo == "clasificacion" else r2_score)(y_test, y_pred)
+                resultados.append({
+                    "muestras": tamano,
+                    "tipo": tipo,
+                    "motor": motor,
+                    "fit_s": round(tiempo_fit, 4),
+                    "pkl_bytes": buffer.getbuffer().nbytes,
+                    "prediccion_sklearn": latencia_una_fila(modelo, X_test),
+                    "prediccion_compilada": latencia_una_fila(ArbolesCompilados.desde_sklearn(modelo), X_test),
+                    "accuracy" if tipo == "clasificacion" else "r2": round(float(metrica), 4)
+                })
+
+    print(json.dumps(resultados, indent=2))
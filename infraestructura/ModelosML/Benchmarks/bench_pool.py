@@ -0,0 +1,189 @@
+import argparse
+import contextlib
+import json
+import os
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from fixtures import DIR_MODELOS_ML, TIPOS_MODELO, ModeloTemporal, entrenar_modelo_fijo, percentiles
+
+from Compartido.pool_inferencia import ClientePool
+
+# Prueba de carga del pool de inferencia (Compartido/pool_inferencia.py) con 1..64 clientes
+# concurrentes. Cada cliente tiene su conexión y envía peticiones de a una durante --duracion
+# segundos, rotando entre los tipos; los clientes se reparten entre --usuarios usuarios, cada uno
+# con sus propios modelos. Por nivel de concurrencia: peticiones por segundo, latencia
+# (p50/p99/máxima, total y por tipo) y rechazos por contrapresión.
+# Comparaciones:
+#   procesos   un proceso del script por petición, como EjecutorModeloPython sin pool (hasta
+#              --max-procesos clientes: cada proceso ocupa decenas de MB)
+#   equidad    con la concurrencia máxima, 7/8 de los clientes son de un mismo usuario y el resto
+#              de usuarios distintos: latencia de cada grupo
+#   memoria    RSS y PSS sumados de los procesos del pool (PSS reparte las páginas compartidas)
+# La cache de pronósticos del pool se desactiva: todas las peticiones se calculan.
+# Los clientes corren como hilos de este proceso y compiten por la CPU con el pool.
+# Uso: python bench_pool.py [--concurrencias 1 2 4 8 16 32 64] [--duracion 5] [--trabajadores N]
+#                           [--usuarios 8] [--tipos predictivo ...] [--max-procesos 16]
+
+SCRIPT_POOL = os.path.join(DIR_MODELOS_ML, "Compartido", "pool_inferencia.py")
+SCRIPTS = {
+    "predictivo": os.path.join(DIR_MODELOS_ML, "Prediccion", "predictor.py"),
+    "optimizacion": os.path.join(DIR_MODELOS_ML, "Optimizacion", "Optimizador.py"),
+    "clasificacion": os.path.join(DIR_MODELOS_ML, "Clasificacion", "Clasificador.py")
+}
+NOMBRE_MODELO = "pool"
+VALORES = [20.1, 21.3, 22.0, 21.7, 22.4, 23.0]
+
+def usuario(indice):
+    return f"pool{indice}"
+
+def peticion(tipo, usuario_id):
+    return {"tipo": tipo, "usuario_id": usuario_id, "nombre_modelo": NOMBRE_MODELO, "valores": VALORES, "n_pasos": 7}
+
+def en_pool(ruta, tipo, usuario_id, conexiones):
+    """Una petición por la conexión del hilo: (éxito, rechazada)"""
+    respuesta = conexiones.cliente.solicitar(peticion(tipo, usuario_id))
+    return respuesta["success"], bool(respuesta.get("reintentar"))
+
+def en_proceso(ruta, tipo, usuario_id, conexiones):
+    """Un proceso del script por petición, con los valores por stdin como EjecutorModeloPython"""
+    salida = subprocess.run(
+        [sys.executable, SCRIPTS[tipo], usuario_id, NOMBRE_MODELO, "-", "--formato", "f64", "--silencioso"],
+        input=struct.pack(f"<{len(VALORES)}d", *VALORES), cwd=os.path.dirname(SCRIPTS[tipo]), capture_output=True
+    )
+    return json.loads(salida.stdout.decode().strip().split("\n")[-1])["success"], False
+
+def cargar(ruta, usuarios_clientes, tipos, duracion, ejecutar):
+    """Clientes en hilos durante duracion segundos; devuelve (tipo, latencia_ms, éxito, rechazada, usuario)"""
+    registros = []
+    fin = time.perf_counter() + duracion
+    conexiones = threading.local()
+
+    def cliente(indice, usuario_id):
+        with contextlib.ExitStack() as pila:
+            if ejecutar is en_pool:
+                conexiones.cliente = pila.enter_context(ClientePool(ruta))
+            n = indice
+            while time.perf_counter() < fin:
+                tipo = tipos[n % len(tipos)]
+                n += 1
+                inicio = time.perf_counter()
+                exito, rechazada = ejecutar(ruta, tipo, usuario_id, conexiones)
+                registros.append((tipo, (time.perf_counter() - inicio) * 1000, exito, rechazada, usuario_id))
+
+    hilos = [threading.Thread(target=cliente, args=(i, u)) for i, u in enumerate(usuarios_clientes)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return registros, time.perf_counter() - inicio
+
+def latencias(registros):
+    resumen = percentiles([r[1] for r in registros if r[2]] or [0.0])
+    resumen["max_ms"] = round(max((r[1] for r in registros if r[2]), default=0.0), 3)
+    return resumen
+
+def resumir(registros, transcurrido, tipos):
+    exitosas = [r for r in registros if r[2]]
+    return {
+        "peticiones_por_s": round(len(exitosas) / transcurrido, 1),
+        "exitosas": len(exitosas),
+        "rechazadas": sum(1 for r in registros if r[3]),
+        "errores": sum(1 for r in registros if not r[2] and not r[3]),
+        "latencia": latencias(registros),
+        "por_tipo": {tipo: {clave: valor for clave, valor in latencias([r for r in registros if r[0] == tipo]).items()
+                            if clave in ("p50_ms", "p99_ms")} for tipo in tipos}
+    }
+
+def memoria_pool(pid):
+    """RSS y PSS sumados del proceso principal y sus hijos, en MB"""
+    with open(f"/proc/{pid}/task/{pid}/children") as archivo:
+        procesos = [pid] + [int(hijo) for hijo in archivo.read().split()]
+    total = {"Rss": 0, "Pss": 0}
+    for proceso in procesos:
+        with open(f"/proc/{proceso}/smaps_rollup") as archivo:
+            for linea in archivo:
+                campo = linea.split(":")[0]
+                if campo in total:
+                    total[campo] += int(linea.split()[1])
+    return {"procesos": len(procesos), "rss_suma_mb": round(total["Rss"] / 1024, 1),
+            "pss_suma_mb": round(total["Pss"] / 1024, 1)}
+
+def iniciar_pool(ruta, trabajadores, claves):
+    proceso = subprocess.Popen(
+        [sys.executable, SCRIPT_POOL, "--socket", ruta, "--trabajadores", str(trabajadores),
+         "--cache-max", "0", "--precargar-recientes", "0", "--precargar", *claves],
+        stderr=subprocess.DEVNULL
+    )
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        with contextlib.suppress(OSError):
+            with ClientePool(ruta) as cliente:
+                if cliente.solicitar({"operacion": "estadisticas"})["pool"]["trabajadores"] == trabajadores:
+                    return proceso
+        time.sleep(0.1)
+    proceso.kill()
+    raise Exception("El pool no quedó listo")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga del pool de inferencia")
+    parser.add_argument("--concurrencias", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--duracion", type=float, default=5.0, help="Segundos por nivel de concurrencia")
+    parser.add_argument("--trabajadores", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--usuarios", type=int, default=8)
+    parser.add_argument("--tipos", nargs="+", choices=TIPOS_MODELO, default=list(TIPOS_MODELO))
+    parser.add_argument("--max-procesos", type=int, default=16,
+                        help="Concurrencia máxima para la comparación con un proceso por petición (0 la omite)")
+    args = parser.parse_args()
+
+    ruta = os.path.join(tempfile.gettempdir(), f"bench_pool_{os.getpid()}.sock")
+    maximo = max(args.concurrencias)
+    # Usuarios del escenario de equidad: pool0 es el usuario con muchos clientes
+    n_usuarios = max(args.usuarios, maximo // 8 + 1)
+    resultados = {"trabajadores": args.trabajadores, "usuarios": args.usuarios, "tipos": args.tipos,
+                  "duracion_s": args.duracion, "pool": [], "procesos": []}
+
+    with contextlib.ExitStack() as pila:
+        for tipo in args.tipos:
+            modelo = entrenar_modelo_fijo(tipo)
+            for indice in range(n_usuarios):
+                pila.enter_context(ModeloTemporal(tipo, NOMBRE_MODELO, modelo, artefacto=True, usuario_id=usuario(indice)))
+        claves = [f"{usuario(i)}/{NOMBRE_MODELO}/{tipo}" for i in range(n_usuarios) for tipo in args.tipos]
+
+        inicio = time.perf_counter()
+        pool = iniciar_pool(ruta, args.trabajadores, claves)
+        resultados["arranque_pool_s"] = round(time.perf_counter() - inicio, 3)
+        try:
+            for concurrencia in args.concurrencias:
+                clientes = [usuario(i % args.usuarios) for i in range(concurrencia)]
+                registros, transcurrido = cargar(ruta, clientes, args.tipos, args.duracion, en_pool)
+                resultados["pool"].append(dict(clientes=concurrencia, **resumir(registros, transcurrido, args.tipos)))
+
+            # Equidad: 7/8 de los clientes de pool0; cada uno del resto, de un usuario distinto
+            livianos = max(1, maximo // 8)
+            clientes = [usuario(0)] * (maximo - livianos) + [usuario(1 + i) for i in range(livianos)]
+            registros, _ = cargar(ruta, clientes, args.tipos, args.duracion, en_pool)
+            resultados["equidad"] = {
+                "clientes": maximo,
+                "usuario_intensivo": {"clientes": maximo - livianos,
+                                      "latencia": latencias([r for r in registros if r[4] == usuario(0)])},
+                "otros_usuarios": {"clientes": livianos,
+                                   "latencia": latencias([r for r in registros if r[4] != usuario(0)])}
+            }
+            resultados["memoria"] = memoria_pool(pool.pid)
+        finally:
+            pool.send_signal(signal.SIGTERM)
+            pool.wait()
+
+        for concurrencia in [c for c in args.concurrencias if c <= args.max_procesos]:
+            clientes = [usuario(i % args.usuarios) for i in range(concurrencia)]
+            registros, transcurrido = cargar(ruta, clientes, args.tipos, args.duracion, en_proceso)
+            resultados["procesos"].append(dict(clientes=concurrencia, **resumir(registros, transcurrido, args.tipos)))
+
+    print(json.dumps(resultados, indent=2))
@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from fixtures import DIR_MODELOS_ML, ModeloPredictivoTemporal, percentiles
+
+# Compara la latencia de lanzar predictor.py por petición (arranque en frío)
+# contra el servidor de predicción ya iniciado (en caliente).
+# Uso: python bench_servidor.py [--peticiones 50]
+
+DIR_PREDICCION = os.path.join(DIR_MODELOS_ML, "Prediccion")
+VALORES = [20.1, 21.3, 22.0, 21.7, 22.4, 23.0]
+
+def medir_en_frio(usuario_id, nombre_modelo, peticiones):
+    """Latencia de un proceso python predictor.py por petición"""
+    script = os.path.join(DIR_PREDICCION, "predictor.py")
+    tiempos = []
+    for _ in range(peticiones):
+        inicio = time.perf_counter()
+        salida = subprocess.run(
+            [sys.executable, script, usuario_id, nombre_modelo, json.dumps(VALORES), "7"],
+            cwd=DIR_PREDICCION, capture_output=True, text=True
+        )
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        resultado = json.loads(salida.stdout.strip().split("\n")[-1])
+        if not resultado["success"]:
+            raise Exception(resultado["error"])
+    return tiempos
+
+def medir_en_caliente(usuario_id, nombre_modelo, peticiones):
+    """Latencia de ida y vuelta contra un único servidor_prediccion.py"""
+    servidor = subprocess.Popen(
+        [sys.executable, os.path.join(DIR_PREDICCION, "servidor_prediccion.py")],
+        cwd=DIR_PREDICCION, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL, text=True, bufsize=1
+    )
+    try:
+        peticion = {"usuario_id": usuario_id, "nombre_modelo": nombre_modelo, "valores": VALORES, "n_pasos": 7}
+        tiempos = []
+        # La primera petición carga el modelo; no se cuenta
+        for i in range(peticiones + 1):
+            peticion["id"] = i
+            inicio = time.perf_counter()
+            servidor.stdin.write(json.dumps(peticion) + "\n")
+            servidor.stdin.flush()
+            resultado = json.loads(servidor.stdout.readline())
+            if i > 0:
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            if not resultado["success"]:
+                raise Exception(resultado["error"])
+        return tiempos
+    finally:
+        servidor.stdin.close()
+        servidor.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark arranque en frío vs servidor en caliente")
+    parser.add_argument("--peticiones", type=int, default=50)
+    args = parser.parse_args()
+
+    with ModeloPredictivoTemporal("bench_servidor") as fixture:
+        frio = percentiles(medir_en_frio(fixture.usuario_id, fixture.nombre_modelo, args.peticiones))
+        caliente = percentiles(medir_en_caliente(fixture.usuario_id, fixture.nombre_modelo, args.peticiones))
+
+    print(json.dumps({"en_frio": frio, "en_caliente": caliente}, indent=2))
@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from fixtures import DIR_MODELOS_ML, serie_sintetica
+
+sys.path.insert(0, os.path.join(DIR_MODELOS_ML, "Entrenamiento", "GradientBoostingRegressor"))
+from GradientBoosting import crear_datos_clasificacion, crear_datos_optimizacion, crear_secuencias_temporales
+
+# Tiempo y memoria pico de los constructores de ventanas vectorizados contra la versión con bucles
+# Uso: python bench_ventanas.py [--max-exponente 7] [--max-exponente-bucles 6]
+
+def secuencias_bucle(datos, n_steps=5):
+    X, y = [], []
+    for i in range(len(datos) - n_steps):
+        X.append(datos[i:i + n_steps])
+        y.append(datos[i + n_steps])
+    return np.array(X), np.array(y)
+
+def optimizacion_bucle(datos):
+    X, y = [], []
+    for i in range(len(datos) - 5):
+        X.append(datos[i:i + 5])
+        y.append(np.max(datos[i + 1:i + 6]))
+    return np.array(X), np.array(y)
+
+def clasificacion_bucle(datos):
+    X, y = [], []
+    for i in range(len(datos) - 5):
+        X.append(datos[i:i + 5])
+        temp = datos[i + 5]
+        y.append(0 if temp < 18 else 1 if temp < 25 else 2)
+    return np.array(X), np.array(y)
+
+CONSTRUCTORES = {
+    "predictivo": (secuencias_bucle, crear_secuencias_temporales),
+    "optimizacion": (optimizacion_bucle, crear_datos_optimizacion),
+    "clasificacion": (clasificacion_bucle, crear_datos_clasificacion)
+}
+
+def medir(funcion, datos):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion(datos)
+    tiempo = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return resultado, {"tiempo_s": round(tiempo, 5), "memoria_pico_mb": round(pico / 1e6, 3)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de ventanas deslizantes")
+    parser.add_argument("--max-exponente", type=int, default=7)
+    parser.add_argument("--max-exponente-bucles", type=int, default=6,
+                        help="La versión con bucles es muy lenta en tamaños grandes")
+    args = parser.parse_args()
+
+    resultados = []
+    for exponente in range(3, args.max_exponente + 1):
+        datos = serie_sintetica(10 ** exponente)
+        for tipo, (bucle, vectorizado) in CONSTRUCTORES.items():
+            (X, y), medida_vectorizada = medir(vectorizado, datos)
+            fila = {"muestras": 10 ** exponente, "tipo": tipo, "vectorizado": medida_vectorizada}
+            if exponente <= args.max_exponente_bucles:
+                (X_bucle, y_bucle), fila["bucles"] = medir(bucle, datos)
+                fila["identicos"] = bool(np.array_equal(X, X_bucle) and np.array_equal(y, y_bucle))
+            resultados.append(fila)
+
+    print(json.dumps(resultados, indent=2))
@@ -0,0 +1,136 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import numpy as np
+import joblib
+
+# Utilidades compartidas por los benchmarks: datos sintéticos y modelos de prueba
+
+DIR_MODELOS_ML = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USUARIO_BENCHMARK = "benchmark"
+TIPOS_MODELO = ("predictivo", "optimizacion", "clasificacion")
+
+sys.path.insert(0, DIR_MODELOS_ML)
+sys.path.insert(0, os.path.join(DIR_MODELOS_ML, "Entrenamiento", "GradientBoostingRegressor"))
+
+from Compartido.registro_modelos import ruta_modelo
+
+def serie_sintetica(n=500, semilla=42):
+    """Serie de temperatura seno + ruido, igual que los datos simulados de entrenar_modelo"""
+    rng = np.random.default_rng(semilla)
+    datos = 20 + 5 * np.sin(np.arange(n) * 0.1) + rng.normal(0, 1, n)
+    return np.clip(datos, 15, 30)
+
+def ventanas(datos, n_steps=5):
+    """Ventanas de n_steps valores y el siguiente valor como objetivo"""
+    X = np.array([datos[i:i + n_steps] for i in range(len(datos) - n_steps)])
+    y = np.array(datos[n_steps:])
+    return X, y
+
+def datos_entrenamiento(tipo, n=500, semilla=42):
+    """X, y de la serie sintética con el mismo constructor que usa GradientBoosting.py"""
+    from GradientBoosting import crear_datos_clasificacion, crear_datos_optimizacion, crear_secuencias_temporales
+    constructores = {
+        "predictivo": crear_secuencias_temporales,
+        "optimizacion": crear_datos_optimizacion,
+        "clasificacion": crear_datos_clasificacion
+    }
+    return constructores[tipo](serie_sintetica(n, semilla))
+
+def entrenar_modelo_fijo(tipo, n=500, semilla=42, motor="clasico"):
+    """Modelo con los hiperparámetros de GradientBoosting.py y random_state fijo"""
+    from GradientBoosting import crear_estimador
+    X, y = datos_entrenamiento(tipo, n, semilla)
+    return crear_estimador(tipo, motor).fit(X, y)
+
+def entrenar_modelo_predictivo(n=500, semilla=42):
+    """Entrena un modelo predictivo con los mismos hiperparámetros que GradientBoosting.py"""
+    from sklearn.ensemble import GradientBoostingRegressor
+    X, y = ventanas(serie_sintetica(n, semilla))
+    modelo = GradientBoostingRegressor(n_estimators=100, learning_rate=0.1, max_depth=3, random_state=42)
+    modelo.fit(X, y)
+    return modelo
+
+class ModeloTemporal:
+    """Guarda un modelo de prueba en la carpeta de su tipo y lo elimina al salir"""
+
+    def __init__(self, tipo, nombre_modelo="fixture", modelo=None, artefacto=False, usuario_id=USUARIO_BENCHMARK):
+        self.tipo = tipo
+        self.usuario_id = usuario_id
+        self.nombre_modelo = nombre_modelo
+        self.modelo = modelo
+        self.artefacto = artefacto
+        self.ruta = ruta_modelo(self.usuario_id, nombre_modelo, tipo)
+
+    def entrenar(self):
+        return entrenar_modelo_fijo(self.tipo)
+
+    def __enter__(self):
+        if self.modelo is None:
+            self.modelo = self.entrenar()
+        os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        joblib.dump(self.modelo, self.ruta)
+        if self.artefacto:
+            # Igual que al entrenar: artefacto compilado junto al .pkl
+            from Compartido.formato_modelo import exportar_artefacto
+            exportar_artefacto(self.modelo, self.ruta)
+        return self
+
+    def __exit__(self, *args):
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
+        if self.artefacto:
+            from Compartido.formato_modelo import ruta_artefacto
+            shutil.rmtree(ruta_artefacto(self.ruta), ignore_errors=True)
+
+class ModeloPredictivoTemporal(ModeloTemporal):
+    """Guarda un modelo de prueba en ModelosPredictivos y lo elimina al salir"""
+
+    def __init__(self, nombre_modelo="fixture", modelo=None, artefacto=False):
+        super().__init__("predictivo", nombre_modelo, modelo, artefacto)
+
+    def entrenar(self):
+        return entrenar_modelo_predictivo()
+
+# Ejecuta un script como __main__ e informa en stderr su RSS pico (VmHWM se reinicia con exec;
+# ru_maxrss puede heredar el pico del proceso padre)
+CODIGO_PICO_RSS = """
+import json, runpy, sys
+ruta = sys.argv[1]
+sys.argv = sys.argv[1:]
+try:
+    runpy.run_path(ruta, run_name="__main__")
+finally:
+    try:
+        with open("/proc/self/status") as estado:
+            pico_kb = int(next(l for l in estado if l.startswith("VmHWM")).split()[1])
+    except OSError:
+        import resource
+        pico_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    sys.stderr.write("\\n" + json.dumps({"rss_pico_kb": pico_kb}) + "\\n")
+"""
+
+def ejecutar_script(script, argumentos, cwd=None):
+    """Corre un script en un proceso nuevo: (última línea JSON de stdout, segundos, RSS pico en MB)"""
+    inicio = time.perf_counter()
+    salida = subprocess.run(
+        [sys.executable, "-c", CODIGO_PICO_RSS, script, *argumentos],
+        cwd=cwd or os.path.dirname(script), capture_output=True, text=True
+    )
+    transcurrido = time.perf_counter() - inicio
+    resultado = json.loads(salida.stdout.strip().split("\n")[-1])
+    pico_kb = json.loads(salida.stderr.strip().split("\n")[-1])["rss_pico_kb"]
+    return resultado, transcurrido, pico_kb / 1024
+
+def percentiles(tiempos_ms):
+    """Resumen p50/p99/media de una lista de latencias en milisegundos"""
+    tiempos = np.asarray(tiempos_ms)
+    return {
+        "p50_ms": round(float(np.percentile(tiempos, 50)), 3),
+        "p99_ms": round(float(np.percentile(tiempos, 99)), 3),
+        "media_ms": round(float(tiempos.mean()), 3),
+        "n": int(tiempos.size)
+    }
@@ -0,0 +1,188 @@
+import os
+
+# Un solo hilo en BLAS/OpenMP, también para los procesos hijos: resultados comparables entre corridas
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from fixtures import (DIR_MODELOS_ML, TIPOS_MODELO, ModeloTemporal, datos_entrenamiento, ejecutar_script,
+                      entrenar_modelo_fijo, percentiles)
+
+for carpeta in ("Prediccion", "Optimizacion", "Clasificacion"):
+    sys.path.insert(0, os.path.join(DIR_MODELOS_ML, carpeta))
+import Clasificador
+import Optimizador
+import predictor
+
+# Suite de benchmarks reproducible de ModelosML.
+# Para cada tipo de modelo, con datos sintéticos y modelos de semilla fija:
+#   entrenamiento_s / entrenamiento_memoria_mb   fit del estimador y pico de tracemalloc
+#   arranque_frio_p50_ms / arranque_frio_rss_mb  script completo en un proceso nuevo
+#   caliente_p50_ms / caliente_p99_ms            una petición con el modelo ya cargado
+#   lote_por_s / lote_memoria_mb                 elementos por segundo en un lote
+# Las métricas terminadas en _por_s son mejores cuanto más altas; el resto, cuanto más bajas.
+# Uso:
+#   python suite.py [--tipos predictivo ...] [--salida resultados.json]
+#   python suite.py --comparar linea_base.json [--tolerancia 0.2]   (código 1 si hay regresiones)
+
+TAMANO_LOTE = {"predictivo": 1000, "optimizacion": 100, "clasificacion": 1000}
+SCRIPTS = {
+    "predictivo": os.path.join(DIR_MODELOS_ML, "Prediccion", "predictor.py"),
+    "optimizacion": os.path.join(DIR_MODELOS_ML, "Optimizacion", "Optimizador.py"),
+    "clasificacion": os.path.join(DIR_MODELOS_ML, "Clasificacion", "Clasificador.py")
+}
+VALORES = [20.1, 21.3, 22.0, 21.7, 22.4, 23.0]
+# Las colas de latencia varían más entre corridas: se les permite el triple de tolerancia
+FACTOR_TOLERANCIA = {"caliente_p99_ms": 3.0}
+
+def cargar_en_proceso(tipo, usuario_id, nombre_modelo):
+    """El modelo tal como lo carga cada script"""
+    if tipo == "predictivo":
+        return predictor.cargar_modelo(predictor.buscar_modelo_predictivo(usuario_id, nombre_modelo))
+    if tipo == "optimizacion":
+        return Optimizador.cargar_sustituto(usuario_id, nombre_modelo)
+    return Clasificador.cargar_clasificador(usuario_id, nombre_modelo)
+
+def ejecutar_en_proceso(tipo, modelo, series):
+    if tipo == "predictivo":
+        return predictor.predecir_lote(modelo, series, 7)
+    if tipo == "optimizacion":
+        return Optimizador.MotorOptimizacion(modelo).optimizar_lote(series)
+    return Clasificador.clasificar_lote(series, modelo)
+
+def con_pico_memoria(funcion):
+    """(segundos, MB pico de tracemalloc) de una llamada"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    try:
+        funcion()
+        return time.perf_counter() - inicio, tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+def medir_tipo(tipo, arranques, repeticiones):
+    X, _ = datos_entrenamiento(tipo)
+    tiempos = []
+    for _ in range(arranques):
+        inicio = time.perf_counter()
+        entrenar_modelo_fijo(tipo)
+        tiempos.append(time.perf_counter() - inicio)
+    _, memoria_entrenamiento = con_pico_memoria(lambda: entrenar_modelo_fijo(tipo))
+    resultado = {
+        "entrenamiento_s": round(float(np.median(tiempos)), 4),
+        "entrenamiento_memoria_mb": round(memoria_entrenamiento, 2)
+    }
+
+    with ModeloTemporal(tipo, "suite", artefacto=True) as fixture:
+        argumentos = [fixture.usuario_id, fixture.nombre_modelo, json.dumps(VALORES)]
+        tiempos, picos = [], []
+        for _ in range(arranques):
+            salida, transcurrido, pico = ejecutar_script(SCRIPTS[tipo], argumentos)
+            if not salida["success"]:
+                raise Exception(salida["error"])
+            tiempos.append(transcurrido * 1000)
+            picos.append(pico)
+        resultado["arranque_frio_p50_ms"] = round(float(np.median(tiempos)), 1)
+        resultado["arranque_frio_rss_mb"] = round(max(picos), 1)
+
+        modelo = cargar_en_proceso(tipo, fixture.usuario_id, fixture.nombre_modelo)
+        ejecutar_en_proceso(tipo, modelo, [VALORES])
+        tiempos = []
+        for i in range(repeticiones):
+            serie = X[i % len(X)].tolist()
+            inicio = time.perf_counter()
+            ejecutar_en_proceso(tipo, modelo, [serie])
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        latencias = percentiles(tiempos)
+        resultado["caliente_p50_ms"] = latencias["p50_ms"]
+        resultado["caliente_p99_ms"] = latencias["p99_ms"]
+
+        lote = X[np.arange(TAMANO_LOTE[tipo]) % len(X)].tolist()
+        _, memoria_lote = con_pico_memoria(lambda: ejecutar_en_proceso(tipo, modelo, lote))
+        # Sin tracemalloc, que agrega costo a cada reserva de memoria; el mejor de 3
+        segundos = []
+        for _ in range(3):
+            inicio = time.perf_counter()
+            ejecutar_en_proceso(tipo, modelo, lote)
+            segundos.append(time.perf_counter() - inicio)
+        segundos = min(segundos)
+        resultado["lote_por_s"] = round(len(lote) / segundos, 1)
+        resultado["lote_memoria_mb"] = round(memoria_lote, 2)
+    return resultado
+
+def entorno():
+    import sklearn
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+def comparar(actual, base, tolerancia):
+    """Cambio relativo de cada métrica; es regresión si empeora más que la tolerancia"""
+    filas = []
+    for tipo, metricas in actual.items():
+        for metrica, valor in metricas.items():
+            anterior = base.get(tipo, {}).get(metrica)
+            if not anterior:
+                continue
+            cambio = (valor - anterior) / anterior
+            empeora = -cambio if metrica.endswith("_por_s") else cambio
+            filas.append({
+                "tipo": tipo,
+                "metrica": metrica,
+                "base": anterior,
+                "actual": valor,
+                "cambio": round(cambio, 4),
+                "regresion": empeora > tolerancia * FACTOR_TOLERANCIA.get(metrica, 1.0)
+            })
+    return filas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de ModelosML")
+    parser.add_argument("--tipos", nargs="+", default=list(TIPOS_MODELO), choices=TIPOS_MODELO)
+    parser.add_argument("--arranques", type=int, default=5, help="Procesos en frío y entrenamientos por tipo")
+    parser.add_argument("--repeticiones", type=int, default=200, help="Peticiones en caliente por tipo")
+    parser.add_argument("--salida", default="resultados_benchmark.json")
+    parser.add_argument("--comparar", default=None, help="Resultados anteriores (JSON) usados como línea base")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento relativo permitido")
+    args = parser.parse_args()
+
+    resultados = {}
+    for tipo in args.tipos:
+        print(f" Midiendo {tipo}...", file=sys.stderr)
+        resultados[tipo] = medir_tipo(tipo, args.arranques, args.repeticiones)
+
+    reporte = {
+        "entorno": entorno(),
+        "parametros": {"arranques": args.arranques, "repeticiones": args.repeticiones, "tamano_lote": TAMANO_LOTE},
+        "resultados": resultados
+    }
+
+    regresiones = []
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            base = json.load(archivo)
+        reporte["comparacion"] = {"linea_base": args.comparar, "tolerancia": args.tolerancia,
+                                  "metricas": comparar(resultados, base["resultados"], args.tolerancia)}
+        regresiones = [fila for fila in reporte["comparacion"]["metricas"] if fila["regresion"]]
+        for fila in reporte["comparacion"]["metricas"]:
+            marca = "REGRESION" if fila["regresion"] else "ok"
+            print(f" {marca:>9} {fila['tipo']:<14} {fila['metrica']:<26} {fila['base']:>12} -> {fila['actual']:<12}"
+                  f" ({fila['cambio']:+.1%})", file=sys.stderr)
+
+    with open(args.salida, "w", encoding="utf-8") as archivo:
+        json.dump(reporte, archivo, indent=2)
+    print(json.dumps(reporte, indent=2))
+    sys.exit(1 if regresiones else 0)
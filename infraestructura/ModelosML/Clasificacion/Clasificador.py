@@ -1,108 +1,291 @@
-import numpy as np
+import time
+INICIO_NS = time.perf_counter_ns()  # Antes de las demás importaciones, para medir su costo
+import math
+import os
 import sys
-import json
+from functools import reduce
+from operator import add
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Compartido.entrada_datos import eco_entrada, es_serie, leer_argumentos, leer_valores, silenciar
+from Compartido.formato_modelo import artefacto_vigente, cargar_artefacto
+from Compartido.instrumentacion import Cronometro, activar_perfil, medir, serializar
+from Compartido.registro_modelos import ruta_modelo
+
+N_VALORES = 5  # Los modelos de clasificación usan ventanas de 5 valores
+NOMBRES_CLASES = ["Frio", "Normal", "Caliente"]  # Clases 0, 1 y 2 de crear_datos_clasificacion
+# Hasta esta cantidad de series y de valores en total, las reglas simples se evalúan en Python
+# puro sin importar NumPy
+UMBRAL_RAPIDO = 32
+VALORES_RAPIDO = 10000
+BLOQUE_PARES = 128  # Bloque de la suma por pares de NumPy (PW_BLOCKSIZE)
+
+# Probabilidades fijas de las reglas simples, por clase predicha
+PROBABILIDADES_REGLAS = [
+    [0.85, 0.12, 0.03],
+    [0.15, 0.70, 0.15],
+    [0.05, 0.15, 0.80]
+]
+
+def cargar_clasificador(usuario_id, nombre_modelo):
+    """GradientBoostingClassifier de ModelosClasificacion (artefacto o .pkl), o None"""
+    ruta = ruta_modelo(usuario_id, nombre_modelo, "clasificacion")
+    ruta_artefacto = artefacto_vigente(ruta)
+    if ruta_artefacto:
+        return cargar_artefacto(ruta_artefacto)
+    if os.path.exists(ruta):
+        import joblib
+        return joblib.load(ruta)
+    return None
+
+def obtener_clasificador(usuario_id, nombre_modelo, registro=None):
+    """Clasificador desde el registro de modelos de un proceso de larga duración, o cargado del disco"""
+    if registro is None:
+        return cargar_clasificador(usuario_id, nombre_modelo)
+    try:
+        return registro.obtener(usuario_id, nombre_modelo, "clasificacion")
+    except FileNotFoundError:
+        return None
+
+def caracteristicas_ventanas(ventanas):
+    """Promedio, variabilidad y tendencia de cada fila de un arreglo (n, longitud)"""
+    promedio = ventanas.mean(axis=1)
+    return {
+        "promedio": promedio,
+        "variabilidad": ventanas.std(axis=1),
+        "cambio": ventanas[:, -1] - ventanas[:, 0]
+    }
+
+def probabilidades_reglas(promedio, variabilidad):
+    """Reglas por umbral de temperatura; la alta variabilidad reduce la confianza"""
+    import numpy as np
+    clase = np.digitize(promedio, [18, 25])
+    probabilidades = np.array(PROBABILIDADES_REGLAS)[clase]
+    alta = variabilidad > 2.0
+    if alta.any():
+        filas = np.flatnonzero(alta)
+        principal = probabilidades[filas, clase[filas]] * 0.9
+        probabilidades[filas] = ((1 - principal) / 2)[:, None]
+        probabilidades[filas, clase[filas]] = principal
+    return probabilidades
+
+def probabilidades_modelo(modelo, ventanas):
+    """predict_proba sobre los últimos 5 valores de cada ventana, ordenado como NOMBRES_CLASES"""
+    import numpy as np
+    entrada = ventanas[:, -N_VALORES:]
+    if entrada.shape[1] < N_VALORES:
+        relleno = np.repeat(entrada[:, :1], N_VALORES - entrada.shape[1], axis=1)
+        entrada = np.hstack([relleno, entrada])
+    probabilidades_modelo = modelo.predict_proba(entrada)
+    probabilidades = np.zeros((len(ventanas), len(NOMBRES_CLASES)))
+    for columna, clase in enumerate(modelo.classes_):
+        probabilidades[:, int(clase)] = probabilidades_modelo[:, columna]
+    return probabilidades
+
+def suma_por_pares(valores):
+    """Suma en el mismo orden que np.sum (8 acumuladores por bloque), para que el camino en Python
+    puro dé los mismos promedios que NumPy"""
+    n = len(valores)
+    if n < 8:
+        return reduce(add, valores, 0.0)
+    if n > BLOQUE_PARES:
+        mitad = n // 2 - (n // 2) % 8
+        return suma_por_pares(valores[:mitad]) + suma_por_pares(valores[mitad:])
+    completos = n - n % 8
+    c = [reduce(add, valores[j:completos:8]) for j in range(8)]
+    return reduce(add, valores[completos:], ((c[0] + c[1]) + (c[2] + c[3])) + ((c[4] + c[5]) + (c[6] + c[7])))
+
+def redondear(valor, decimales):
+    """round() de un np.float64: NumPy escala, redondea al par más cercano y vuelve a dividir"""
+    escala = 10.0 ** decimales
+    return round(valor * escala) / escala
+
+def extremo_binario(valor):
+    """Mínimo o máximo de una entrada float64: sin decimales si es entero, como llega en JSON desde el backend"""
+    valor = float(valor)
+    return int(valor) if valor.is_integer() else valor
+
+def clasificar_reglas_simple(serie):
+    """Las mismas reglas que probabilidades_reglas para una sola serie, en Python puro"""
+    n = len(serie)
+    promedio = suma_por_pares(serie) / n
+    variabilidad = math.sqrt(suma_por_pares([(valor - promedio) * (valor - promedio) for valor in serie]) / n)
+    clase = int(promedio >= 18) + int(promedio >= 25)
+    probabilidades = list(PROBABILIDADES_REGLAS[clase])
+    if variabilidad > 2.0:
+        principal = probabilidades[clase] * 0.9
+        probabilidades = [(1 - principal) / 2] * len(probabilidades)
+        probabilidades[clase] = principal
+    caracteristicas = {
+        "promedio": promedio,
+        "variabilidad": variabilidad,
+        "cambio": serie[-1] - serie[0],
+        "minimo": min(serie) if isinstance(serie, list) else extremo_binario(min(serie)),
+        "maximo": max(serie) if isinstance(serie, list) else extremo_binario(max(serie))
+    }
+    return resumen_clasificacion(caracteristicas, probabilidades, clase, max(0.6, 1.0 - variabilidad / 10), False)
+
+def clasificar_lote(series, modelo=None):
+    """Clasifica varias series; las de igual longitud se procesan como un solo arreglo 2-D"""
+    if (modelo is None and len(series) <= UMBRAL_RAPIDO and sum(len(serie) for serie in series) <= VALORES_RAPIDO
+            and all(isinstance(serie, (list, memoryview)) for serie in series)):
+        return [clasificar_reglas_simple(serie) for serie in series]
+
+    import numpy as np
+    resultados = [None] * len(series)
+    grupos = {}
+    for indice, serie in enumerate(series):
+        grupos.setdefault(len(serie), []).append(indice)
+
+    for indices in grupos.values():
+        ventanas = np.array([series[i] for i in indices], dtype=float)
+        caracteristicas = caracteristicas_ventanas(ventanas)
+        if modelo is not None:
+            probabilidades = probabilidades_modelo(modelo, ventanas)
+            confianzas = probabilidades.max(axis=1)
+        else:
+            probabilidades = probabilidades_reglas(caracteristicas["promedio"], caracteristicas["variabilidad"])
+            confianzas = np.maximum(0.6, 1.0 - caracteristicas["variabilidad"] / 10)
+        clases = probabilidades.argmax(axis=1)
+        # Rango de todas las filas a la vez; la posición del extremo recupera el valor original
+        filas = np.arange(len(indices))
+        posicion_minimo, posicion_maximo = ventanas.argmin(axis=1), ventanas.argmax(axis=1)
+        minimos, maximos = ventanas[filas, posicion_minimo], ventanas[filas, posicion_maximo]
+
+        for fila, indice in enumerate(indices):
+            detalle = {nombre: valores[fila] for nombre, valores in caracteristicas.items()}
+            # El rango conserva el tipo de los datos de entrada (enteros se muestran sin decimales)
+            if isinstance(series[indice], list):
+                detalle["minimo"] = series[indice][posicion_minimo[fila]]
+                detalle["maximo"] = series[indice][posicion_maximo[fila]]
+            else:
+                detalle["minimo"], detalle["maximo"] = extremo_binario(minimos[fila]), extremo_binario(maximos[fila])
+            resultados[indice] = resumen_clasificacion(
+                detalle,
+                probabilidades[fila], int(clases[fila]), float(confianzas[fila]), modelo is not None
+            )
+    return resultados
+
+def resumen_clasificacion(caracteristicas, probabilidades, clase, confianza, con_modelo):
+    promedio = float(caracteristicas["promedio"])
+    variabilidad = float(caracteristicas["variabilidad"])
+    cambio = float(caracteristicas["cambio"])
+    clase_predicha = NOMBRES_CLASES[clase]
 
-def clasificar_simple(datos):
-    """Clasificación simple sin modelo - solo reglas lógicas"""
-    
-    # Calcular estadísticas
-    promedio = np.mean(datos)
-    variabilidad = np.std(datos)
-    tendencia = "ascendente" if datos[-1] > datos[0] else "descendente"
-    
-    # Reglas de clasificación basadas en temperatura
-    if promedio < 18:
-        clase_predicha = "Frio"
-        probabilidades = {"Frio": 0.85, "Normal": 0.12, "Caliente": 0.03}
-    elif promedio < 25:
-        clase_predicha = "Normal" 
-        probabilidades = {"Frio": 0.15, "Normal": 0.70, "Caliente": 0.15}
-    else:
-        clase_predicha = "Caliente"
-        probabilidades = {"Frio": 0.05, "Normal": 0.15, "Caliente": 0.80}
-    
-    # Ajustar probabilidades según variabilidad
-    if variabilidad > 2.0:  # Alta variabilidad
-        # Reducir confianza en la clase principal
-        factor_reduccion = 0.9
-        probabilidades[clase_predicha] *= factor_reduccion
-        # Redistribuir el resto
-        resto = (1 - probabilidades[clase_predicha]) / 2
-        for clase in probabilidades:
-            if clase != clase_predicha:
-                probabilidades[clase] = resto
-    
-    # Redondear probabilidades
-    for clase in probabilidades:
-        probabilidades[clase] = round(probabilidades[clase], 3)
-    
-    # Calcular nivel de confianza basado en consistencia de datos
-    confianza = max(0.6, 1.0 - (variabilidad / 10))  # Menos variabilidad = más confianza
-    
     # Clasificación adicional por patrón
     patron = "estable"
     if variabilidad > 2:
         patron = "variable"
-    elif abs(datos[-1] - datos[0]) > 3:
+    elif abs(cambio) > 3:
         patron = "cambiante"
-    
+
+    if con_modelo:
+        primera_regla = f"Modelo entrenado → Clase {clase_predicha} (p={probabilidades[clase]:.2f})"
+    else:
+        primera_regla = f"Promedio {promedio:.1f}°C → Clase {clase_predicha}"
+
     return {
         "clase_predicha": clase_predicha,
-        "probabilidades": probabilidades,
-        "confianza": round(confianza, 3),
+        "probabilidades": {nombre: round(float(p), 3) for nombre, p in zip(NOMBRES_CLASES, probabilidades)},
+        # Redondeo de NumPy, como cuando estos valores eran np.float64
+        "confianza": redondear(confianza, 3),
         "caracteristicas_detectadas": {
-            "temperatura_promedio": round(promedio, 2),
-            "variabilidad": round(variabilidad, 2),
-            "tendencia": tendencia,
+            "temperatura_promedio": redondear(promedio, 2),
+            "variabilidad": redondear(variabilidad, 2),
+            "tendencia": "ascendente" if cambio > 0 else "descendente",
             "patron": patron,
-            "rango": f"{round(min(datos), 1)} - {round(max(datos), 1)}°C"
+            "rango": f"{round(caracteristicas['minimo'], 1)} - {round(caracteristicas['maximo'], 1)}°C"
         },
         "reglas_aplicadas": [
-            f"Promedio {promedio:.1f}°C → Clase {clase_predicha}",
+            primera_regla,
             f"Variabilidad {variabilidad:.1f} → Confianza {confianza:.1f}",
             f"Patrón detectado: {patron}"
         ]
     }
 
-if __name__ == "__main__":
-    try:
-        if len(sys.argv) < 4:
-            raise Exception("Faltan argumentos: usuarioId, nombreModelo y datos")
-        
-        usuario_id = sys.argv[1]
-        nombre_modelo = sys.argv[2]
-        datos_str = sys.argv[3]
-        
-        print(f"CLASIFICADOR SIMPLE - Usuario: {usuario_id}, Algoritmo: {nombre_modelo}")
-        
-        # Parsear datos
-        datos = json.loads(datos_str.replace('\\"', '"'))
-        
-        if len(datos) < 2:
-            raise Exception("Se necesitan al menos 2 valores para clasificar")
-        
-        # Clasificar usando reglas simples
-        resultado_clasificacion = clasificar_simple(datos)
-        
-        # Resultado exitoso
-        respuesta = {
+def clasificar_simple(datos):
+    """Clasificación simple sin modelo - solo reglas lógicas"""
+    return clasificar_lote([datos])[0]
+
+def es_lote(datos):
+    return len(datos) > 0 and all(es_serie(d) for d in datos)
+
+def ejecutar_clasificacion(usuario_id, nombre_modelo, datos, registro=None, cronometro=None):
+    """Carga el clasificador, clasifica una serie o un lote y arma la respuesta"""
+    series = datos if es_lote(datos) else [datos]
+    if any(len(serie) < 2 for serie in series):
+        raise Exception("Se necesitan al menos 2 valores para clasificar")
+    if cronometro is not None:
+        cronometro.marcar("parseo_argumentos")
+
+    with medir(cronometro, "carga_modelo"):
+        modelo = obtener_clasificador(usuario_id, nombre_modelo, registro)
+    mensaje = ("Clasificación realizada con el modelo entrenado" if modelo is not None
+               else "Clasificación realizada con reglas lógicas simples")
+
+    with medir(cronometro, "clasificacion"):
+        clasificaciones = clasificar_lote(series, modelo)
+    resultados = [
+        {
             "success": True,
             "tipo": "clasificacion",
             "usuario_id": usuario_id,
             "nombre_modelo": nombre_modelo,
             "clasificacion": resultado_clasificacion,
-            "datos_entrada": datos,
-            "mensaje": "Clasificación realizada con reglas lógicas simples"
+            "datos_entrada": eco_entrada(serie),
+            "mensaje": mensaje
         }
-        print(json.dumps(respuesta))
-        
-    except Exception as e:
-        respuesta = {
-            "success": False,
+        for serie, resultado_clasificacion in zip(series, clasificaciones)
+    ]
+
+    if es_lote(datos):
+        return {
+            "success": True,
             "tipo": "clasificacion",
-            "error": str(e),
-            "usuario_id": usuario_id if 'usuario_id' in locals() else None,
-            "nombre_modelo": nombre_modelo if 'nombre_modelo' in locals() else None
+            "usuario_id": usuario_id,
+            "nombre_modelo": nombre_modelo,
+            "lote": True,
+            "resultados": resultados
         }
-        print(json.dumps(respuesta))
-        sys.exit(1)
\ No newline at end of file
+    return resultados[0]
+
+def respuesta_error(error, usuario_id=None, nombre_modelo=None):
+    return {
+        "success": False,
+        "tipo": "clasificacion",
+        "error": str(error),
+        "usuario_id": usuario_id,
+        "nombre_modelo": nombre_modelo
+    }
+
+if __name__ == "__main__":
+    cronometro = Cronometro(INICIO_NS)
+    cronometro.marcar("importaciones")
+    activar_perfil("clasificador")
+    salida = sys.stdout
+    try:
+        argumentos, silencioso, formato = leer_argumentos(sys.argv[1:])
+        if silencioso:
+            salida = silenciar()
+        if len(argumentos) < 3:
+            raise Exception("Faltan argumentos: usuarioId, nombreModelo y datos")
+
+        usuario_id = argumentos[0]
+        nombre_modelo = argumentos[1]
+
+        print(f"CLASIFICADOR - Usuario: {usuario_id}, Algoritmo: {nombre_modelo}")
+
+        # Datos (JSON, "-" para stdin o "@ruta"): una serie o una lista de series (lote)
+        datos = leer_valores(argumentos[2], formato)
+        respuesta = ejecutar_clasificacion(usuario_id, nombre_modelo, datos, cronometro=cronometro)
+        print(serializar(respuesta, cronometro), file=salida)
+
+    except Exception as e:
+        respuesta = respuesta_error(
+            e,
+            usuario_id if 'usuario_id' in locals() else None,
+            nombre_modelo if 'nombre_modelo' in locals() else None
+        )
+        print(serializar(respuesta, cronometro), file=salida)
+        sys.exit(1)
@@ -0,0 +1 @@
+# Módulos compartidos por los scripts de Prediccion, Optimizacion, Clasificacion y Entrenamiento
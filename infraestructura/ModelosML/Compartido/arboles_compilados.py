@@ -0,0 +1,301 @@
+import numpy as np
+
+# Evaluador de ensambles de árboles sobre arreglos planos de NumPy.
+# Convierte un (Hist)GradientBoostingRegressor/Classifier entrenado en arreglos (característica,
+# umbral, hijos y valor de hoja) de forma (n_arboles, max_nodos) y recorre todos los árboles
+# a la vez, un nivel por iteración. Evaluar no requiere importar sklearn.
+# Un MultiOutputRegressor de estos regresores (modelo predictivo directo) se compila en un solo
+# ensamble con una salida por horizonte.
+# compactar() reduce los arreglos a valor float32, hijos int32, característica uint8 y, si la
+# entrada es float32 (GradientBoosting clásico), umbral float32: 17 bytes por nodo en lugar de
+# 40. Con entrada float64 (HistGradientBoosting) el umbral sigue en float64, porque los valores
+# cercanos a un umbral cambiarían de rama. También puede descartar los últimos árboles de cada
+# salida mientras la suma de sus hojas de mayor valor absoluto no pase de una tolerancia.
+
+class ArbolesCompilados:
+    def __init__(self, caracteristica, umbral, izquierdo, derecho, valor, salida, base,
+                 profundidad, tipo="regresion", clases=None, dtype_entrada="float32"):
+        self.caracteristica = caracteristica  # (n_arboles, max_nodos) intp, 0 en hojas y relleno
+        self.umbral = umbral                  # (n_arboles, max_nodos) float64 (float32 si es compacto con entrada float32)
+        self.izquierdo = izquierdo            # (n_arboles, max_nodos) intp, índice global arbol * max_nodos + nodo
+        self.derecho = derecho                # (n_arboles, max_nodos) intp, las hojas apuntan a sí mismas
+        self.valor = valor                    # (n_arboles, max_nodos) float64, ya escalado por learning_rate
+        self.salida = salida                  # (n_arboles,) int32, columna de salida de cada árbol
+        self.base = base                      # (n_salidas,) predicción inicial
+        self.profundidad = int(profundidad)
+        self.tipo = tipo
+        self.clases = clases
+        # GradientBoosting compara en float32; HistGradientBoosting en float64
+        self.dtype_entrada = dtype_entrada
+        self._preparar()
+
+    def _preparar(self):
+        # Solo vistas planas de los arreglos: si vienen de un mmap las páginas se comparten
+        n_arboles, max_nodos = self.caracteristica.shape
+        self._inicio_arboles = np.arange(n_arboles, dtype=np.intp) * max_nodos
+        self._caracteristica_plana = self.caracteristica.ravel()
+        self._umbral_plano = self.umbral.ravel()
+        self._izquierdo_plano = self.izquierdo.ravel()
+        self._derecho_plano = self.derecho.ravel()
+        self._valor_plano = self.valor.ravel()
+        self._matriz_salida = np.zeros((n_arboles, self.base.shape[0]))
+        self._matriz_salida[np.arange(n_arboles), self.salida] = 1.0
+        # Con los árboles ordenados por salida (multisalida), las primeras k salidas solo
+        # necesitan los primeros _fin_salida[k - 1] árboles
+        if np.all(np.diff(self.salida) >= 0):
+            self._fin_salida = np.searchsorted(self.salida, np.arange(self.n_salidas), side="right")
+        else:
+            self._fin_salida = None
+
+    @property
+    def n_arboles(self):
+        return self.caracteristica.shape[0]
+
+    @property
+    def n_salidas(self):
+        return self.base.shape[0]
+
+    @classmethod
+    def desde_sklearn(cls, modelo):
+        """Convierte un GradientBoosting* o HistGradientBoosting* entrenado"""
+        nombre_clase = type(modelo).__name__
+        if nombre_clase == "MultiOutputRegressor":
+            return cls._desde_multisalida(modelo)
+        if nombre_clase in ("HistGradientBoostingRegressor", "HistGradientBoostingClassifier"):
+            return cls._desde_hist(modelo)
+        if nombre_clase not in ("GradientBoostingRegressor", "GradientBoostingClassifier"):
+            raise ValueError(f"Modelo no soportado para compilar: {nombre_clase}")
+
+        estimadores = modelo.estimators_
+        arboles = [(arbol.tree_, k) for fila in estimadores for k, arbol in enumerate(fila)]
+        escala = modelo.learning_rate
+        base = modelo._raw_predict_init(np.zeros((1, modelo.n_features_in_)))[0]
+
+        tipo = "clasificacion" if nombre_clase == "GradientBoostingClassifier" else "regresion"
+        clases = modelo.classes_ if tipo == "clasificacion" else None
+        return cls._desde_arboles(arboles, escala, base, tipo, clases)
+
+    @classmethod
+    def _desde_hist(cls, modelo):
+        """Los valores de hoja de HistGradientBoosting ya incluyen el learning_rate"""
+        if getattr(modelo, "is_categorical_", None) is not None and np.any(modelo.is_categorical_):
+            raise ValueError("No se pueden compilar modelos con características categóricas")
+        arboles = [
+            (NodosHist(predictor.nodes), k)
+            for iteracion in modelo._predictors
+            for k, predictor in enumerate(iteracion)
+        ]
+        base = np.asarray(modelo._baseline_prediction).ravel()
+        es_clasificador = type(modelo).__name__ == "HistGradientBoostingClassifier"
+        tipo = "clasificacion" if es_clasificador else "regresion"
+        clases = modelo.classes_ if es_clasificador else None
+        return cls._desde_arboles(arboles, 1.0, base, tipo, clases, dtype_entrada="float64")
+
+    @classmethod
+    def _desde_multisalida(cls, modelo):
+        """Un regresor por salida: los árboles del regresor h suman en la columna h"""
+        partes = [cls.desde_sklearn(estimador) for estimador in modelo.estimators_]
+        if any(parte.tipo != "regresion" or parte.n_salidas != 1 for parte in partes):
+            raise ValueError("Solo se compilan MultiOutputRegressor de regresores de una salida")
+        arboles = [
+            (ArbolCompilado(parte, i), h)
+            for h, parte in enumerate(partes)
+            for i in range(parte.n_arboles)
+        ]
+        base = np.array([parte.base[0] for parte in partes])
+        # Los valores de hoja de cada parte ya incluyen su learning_rate
+        return cls._desde_arboles(arboles, 1.0, base, "regresion", None, dtype_entrada=partes[0].dtype_entrada)
+
+    @classmethod
+    def _desde_arboles(cls, arboles, escala, base, tipo, clases, dtype_entrada="float32"):
+        n_arboles = len(arboles)
+        max_nodos = max(arbol.node_count for arbol, _ in arboles)
+        caracteristica = np.zeros((n_arboles, max_nodos), dtype=np.intp)
+        umbral = np.zeros((n_arboles, max_nodos))
+        valor = np.zeros((n_arboles, max_nodos))
+        # Por defecto cada nodo apunta a sí mismo: las hojas y el relleno no avanzan
+        propio = np.arange(n_arboles * max_nodos, dtype=np.intp).reshape(n_arboles, max_nodos)
+        izquierdo = propio.copy()
+        derecho = propio.copy()
+        salida = np.zeros(n_arboles, dtype=np.int32)
+        profundidad = 0
+
+        for i, (arbol, k) in enumerate(arboles):
+            n = arbol.node_count
+            inicio = i * max_nodos
+            es_hoja = arbol.children_left == -1
+            caracteristica[i, :n] = np.where(es_hoja, 0, arbol.feature)
+            umbral[i, :n] = arbol.threshold
+            valor[i, :n] = arbol.value[:, 0, 0] * escala
+            izquierdo[i, :n] = np.where(es_hoja, propio[i, :n], arbol.children_left + inicio)
+            derecho[i, :n] = np.where(es_hoja, propio[i, :n], arbol.children_right + inicio)
+            salida[i] = k
+            profundidad = max(profundidad, arbol.max_depth)
+
+        return cls(caracteristica, umbral, izquierdo, derecho, valor, salida,
+                   np.asarray(base, dtype=np.float64), profundidad, tipo, clases, dtype_entrada)
+
+    def aportes(self):
+        """Mayor valor absoluto de hoja de cada árbol: cota de lo que suma a su salida"""
+        max_nodos = self.caracteristica.shape[1]
+        propio = np.arange(self.n_arboles * max_nodos).reshape(self.n_arboles, max_nodos)
+        return np.where(self.izquierdo == propio, np.abs(self.valor), 0.0).max(axis=1)
+
+    def compactar(self, tolerancia_poda=0.0):
+        """Copia con arreglos reducidos; sin los últimos árboles de cada salida cuyos aportes
+        sumados no pasan de tolerancia_poda (la predicción cruda cambia a lo sumo eso)"""
+        aportes = self.aportes()
+        conservar = np.ones(self.n_arboles, dtype=bool)
+        for k in range(self.n_salidas):
+            acumulado = 0.0
+            for i in np.flatnonzero(self.salida == k)[::-1]:
+                acumulado += aportes[i]
+                if acumulado > tolerancia_poda:
+                    break
+                conservar[i] = False
+            # Cada salida conserva al menos un árbol
+            if not conservar[self.salida == k].any():
+                conservar[np.flatnonzero(self.salida == k)[0]] = True
+
+        indices = np.flatnonzero(conservar)
+        max_nodos = self.caracteristica.shape[1]
+        # Los hijos son índices globales: pasar del árbol anterior a su nueva posición
+        desplazamiento = ((np.arange(len(indices)) - indices) * max_nodos)[:, None]
+        caracteristica = self.caracteristica[indices]
+        tipo_caracteristica = np.uint8 if caracteristica.max(initial=0) <= np.iinfo(np.uint8).max else np.int32
+        return ArbolesCompilados(
+            np.ascontiguousarray(caracteristica, dtype=tipo_caracteristica),
+            umbral_float32(self.umbral[indices]) if self.dtype_entrada == "float32"
+            else np.ascontiguousarray(self.umbral[indices]),
+            np.ascontiguousarray(self.izquierdo[indices] + desplazamiento, dtype=np.int32),
+            np.ascontiguousarray(self.derecho[indices] + desplazamiento, dtype=np.int32),
+            np.ascontiguousarray(self.valor[indices], dtype=np.float32),
+            np.ascontiguousarray(self.salida[indices]),
+            self.base, self.profundidad, self.tipo, self.clases, self.dtype_entrada
+        )
+
+    @property
+    def nbytes(self):
+        return sum(arreglo.nbytes for arreglo in self.arreglos().values())
+
+    def predecir_crudo(self, X, n_salidas=None):
+        """Suma de la predicción inicial y las hojas alcanzadas: (n_filas, n_salidas)"""
+        # Mismo tipo con el que sklearn compara las características contra los umbrales
+        X = np.asarray(X, dtype=self.dtype_entrada)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_filas, n_caracteristicas = X.shape
+        X_plano = X.ravel()
+        inicio_filas = (np.arange(n_filas, dtype=np.intp) * n_caracteristicas)[:, None]
+        n_salidas = self.n_salidas if n_salidas is None else min(n_salidas, self.n_salidas)
+        n_arboles = self.n_arboles if self._fin_salida is None else int(self._fin_salida[n_salidas - 1])
+        nodos = np.broadcast_to(self._inicio_arboles[:n_arboles], (n_filas, n_arboles))
+
+        for _ in range(self.profundidad):
+            valores_x = np.take(X_plano, inicio_filas + np.take(self._caracteristica_plana, nodos))
+            ir_izquierda = valores_x <= np.take(self._umbral_plano, nodos)
+            nodos = np.where(ir_izquierda, np.take(self._izquierdo_plano, nodos), np.take(self._derecho_plano, nodos))
+
+        return self.base[:n_salidas] + np.take(self._valor_plano, nodos) @ self._matriz_salida[:n_arboles, :n_salidas]
+
+    @property
+    def horizonte_directo_(self):
+        """Horizonte de un modelo predictivo directo (una salida por paso), o None"""
+        return self.n_salidas if self.tipo == "regresion" and self.n_salidas > 1 else None
+
+    @property
+    def classes_(self):
+        """Mismo nombre que en sklearn, para usar el compilado en lugar del clasificador"""
+        return self.clases
+
+    def predecir_pasos(self, X, n_pasos):
+        """Primeros n_pasos de un modelo directo, evaluando solo los árboles de esos pasos"""
+        return self.predecir_crudo(X, n_pasos)
+
+    def predict(self, X):
+        crudo = self.predecir_crudo(X)
+        if self.tipo == "regresion":
+            return crudo[:, 0] if self.n_salidas == 1 else crudo
+        return self.clases[np.argmax(self.predict_proba(X, crudo), axis=1)]
+
+    def predict_proba(self, X, crudo=None):
+        if self.tipo != "clasificacion":
+            raise AttributeError("predict_proba solo está disponible para clasificadores")
+        crudo = self.predecir_crudo(X) if crudo is None else crudo
+        if self.n_salidas == 1:
+            positiva = 1.0 / (1.0 + np.exp(-crudo[:, 0]))
+            return np.column_stack([1.0 - positiva, positiva])
+        exponencial = np.exp(crudo - crudo.max(axis=1, keepdims=True))
+        return exponencial / exponencial.sum(axis=1, keepdims=True)
+
+    def arreglos(self):
+        """Arreglos que definen el modelo, para serializar"""
+        arreglos = {
+            "caracteristica": self.caracteristica, "umbral": self.umbral,
+            "izquierdo": self.izquierdo, "derecho": self.derecho, "valor": self.valor,
+            "salida": self.salida, "base": self.base
+        }
+        if self.clases is not None:
+            arreglos["clases"] = np.asarray(self.clases)
+        return arreglos
+
+    def parametros(self):
+        """Parámetros escalares que acompañan a los arreglos"""
+        return {"profundidad": self.profundidad, "tipo": self.tipo, "dtype_entrada": self.dtype_entrada}
+
+    @classmethod
+    def desde_arreglos(cls, arreglos, parametros):
+        return cls(
+            arreglos["caracteristica"], arreglos["umbral"], arreglos["izquierdo"], arreglos["derecho"],
+            arreglos["valor"], arreglos["salida"], arreglos["base"], parametros["profundidad"],
+            parametros["tipo"], arreglos.get("clases"), parametros.get("dtype_entrada", "float32")
+        )
+
+def umbral_float32(umbral):
+    """Umbrales float32 redondeados hacia abajo: para una entrada float32, x <= umbral da lo
+    mismo que con el umbral float64 original"""
+    umbral = np.asarray(umbral, dtype=np.float64)
+    reducido = umbral.astype(np.float32)
+    arriba = reducido.astype(np.float64) > umbral
+    reducido[arriba] = np.nextafter(reducido[arriba], np.float32(-np.inf))
+    return np.ascontiguousarray(reducido)
+
+class NodosHist:
+    """Adapta los nodos de un predictor de HistGradientBoosting a la interfaz de sklearn.tree.Tree"""
+
+    def __init__(self, nodos):
+        es_hoja = nodos["is_leaf"].astype(bool)
+        self.node_count = len(nodos)
+        self.children_left = np.where(es_hoja, -1, nodos["left"].astype(np.intp))
+        self.children_right = np.where(es_hoja, -1, nodos["right"].astype(np.intp))
+        self.feature = nodos["feature_idx"]
+        self.threshold = nodos["num_threshold"]
+        self.value = nodos["value"].reshape(-1, 1, 1)
+        self.max_depth = int(nodos["depth"].max())
+
+class ArbolCompilado:
+    """Un árbol de un ArbolesCompilados con la interfaz de sklearn.tree.Tree, para volver a compilarlo"""
+
+    def __init__(self, compilado, i):
+        max_nodos = compilado.caracteristica.shape[1]
+        inicio = i * max_nodos
+        izquierdo = compilado.izquierdo[i] - inicio
+        derecho = compilado.derecho[i] - inicio
+        es_hoja = izquierdo == np.arange(max_nodos)
+        self.node_count = max_nodos
+        self.children_left = np.where(es_hoja, -1, izquierdo)
+        self.children_right = np.where(es_hoja, -1, derecho)
+        self.feature = compilado.caracteristica[i]
+        self.threshold = compilado.umbral[i]
+        self.value = compilado.valor[i].reshape(-1, 1, 1)
+        self.max_depth = compilado.profundidad
+
+def verificar(modelo, compilado, X, tolerancia=1e-6):
+    """Máxima diferencia entre modelo.predict y el compilado; lanza error si supera la tolerancia"""
+    if compilado.tipo == "clasificacion":
+        diferencia = float(np.max(np.abs(modelo.predict_proba(X) - compilado.predict_proba(X))))
+    else:
+        diferencia = float(np.max(np.abs(modelo.predict(X) - compilado.predict(X))))
+    if diferencia > tolerancia:
+        raise ValueError(f"El modelo compilado difiere del original en {diferencia}")
+    return diferencia
@@ -0,0 +1,233 @@
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Compartido.formato_modelo import artefacto_vigente, leer_meta
+from Compartido.registro_modelos import CARPETAS_TIPOS, DIR_MODELOS_ML
+
+# Catálogo persistente de modelos entrenados en SQLite: (usuario, nombre, tipo, ruta, tamaño,
+# mtime, métricas). Buscar y listar los modelos de un usuario son consultas sobre la clave
+# primaria (usuario_id, tipo, nombre_modelo), sin recorrer las carpetas de modelos.
+# GradientBoosting.py registra cada modelo al guardarlo, en una transacción. Si el catálogo
+# no existe, se crea a partir de las carpetas en el primer registro y, mientras tanto, las
+# consultas recorren las carpetas como antes.
+# Uso: python catalogo_modelos.py --reconstruir
+#      python catalogo_modelos.py --verificar          (código 1 si hay diferencias)
+#      python catalogo_modelos.py --listar USUARIO [--tipo predictivo]
+#   ML_CATALOGO=/ruta/catalogo.sqlite3   (por defecto ModelosML/catalogo_modelos.sqlite3)
+
+VARIABLE_CATALOGO = "ML_CATALOGO"
+RUTA_CATALOGO = os.path.join(DIR_MODELOS_ML, "catalogo_modelos.sqlite3")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS modelos (
+    usuario_id TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    nombre_modelo TEXT NOT NULL,
+    ruta TEXT NOT NULL,
+    tamano INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    metricas TEXT,
+    actualizado TEXT NOT NULL,
+    PRIMARY KEY (usuario_id, tipo, nombre_modelo)
+) WITHOUT ROWID
+"""
+COLUMNAS = ("usuario_id", "tipo", "nombre_modelo", "ruta", "tamano", "mtime_ns", "metricas", "actualizado")
+
+def interpretar_nombre(archivo):
+    """(usuario_id, nombre_modelo, tipo) de un {usuario}_{nombre}_{tipo}.pkl, o None"""
+    for tipo in CARPETAS_TIPOS:
+        sufijo = f"_{tipo}.pkl"
+        if archivo.endswith(sufijo):
+            usuario_id, _, nombre_modelo = archivo[:-len(sufijo)].partition("_")
+            if usuario_id and nombre_modelo:
+                return usuario_id, nombre_modelo, tipo
+    return None
+
+def metricas_artefacto(ruta_pkl):
+    """Métricas guardadas al entrenar en meta.json del artefacto, si está vigente"""
+    ruta = artefacto_vigente(ruta_pkl)
+    if ruta is None:
+        return None
+    try:
+        return leer_meta(ruta).get("metadatos", {}).get("metricas")
+    except (OSError, ValueError):
+        return None
+
+class CatalogoModelos:
+    def __init__(self, ruta=None, directorio=DIR_MODELOS_ML):
+        self.ruta = ruta or os.environ.get(VARIABLE_CATALOGO) or RUTA_CATALOGO
+        self.directorio = directorio
+
+    def existe(self):
+        return os.path.exists(self.ruta)
+
+    def registrar(self, usuario_id, nombre_modelo, tipo, ruta_pkl, metricas=None):
+        """Agrega o reemplaza un modelo con el tamaño y mtime actuales de su .pkl"""
+        fila = self._fila(usuario_id, nombre_modelo, tipo, ruta_pkl, os.stat(ruta_pkl), metricas)
+        with self._conectar() as conexion, conexion:
+            conexion.execute(f"INSERT OR REPLACE INTO modelos VALUES ({', '.join('?' * len(COLUMNAS))})", fila)
+        return self._como_dict(fila)
+
+    def eliminar(self, usuario_id, nombre_modelo, tipo):
+        with self._conectar() as conexion, conexion:
+            cursor = conexion.execute(
+                "DELETE FROM modelos WHERE usuario_id = ? AND tipo = ? AND nombre_modelo = ?",
+                (usuario_id, tipo, nombre_modelo))
+        return cursor.rowcount > 0
+
+    def buscar(self, usuario_id, nombre_modelo, tipo):
+        """Entrada del modelo o None; si no está catalogado se consulta directamente su archivo"""
+        if self.existe():
+            with self._conectar() as conexion:
+                fila = conexion.execute(
+                    "SELECT * FROM modelos WHERE usuario_id = ? AND tipo = ? AND nombre_modelo = ?",
+                    (usuario_id, tipo, nombre_modelo)).fetchone()
+            if fila and os.path.exists(fila[3]):
+                return self._como_dict(fila)
+        carpeta_base, carpeta_modelos = CARPETAS_TIPOS[tipo]
+        ruta_pkl = os.path.join(self.directorio, carpeta_base, carpeta_modelos, f"{usuario_id}_{nombre_modelo}_{tipo}.pkl")
+        try:
+            return self._como_dict(self._fila(usuario_id, nombre_modelo, tipo, ruta_pkl, os.stat(ruta_pkl), None))
+        except FileNotFoundError:
+            return None
+
+    def listar(self, usuario_id, tipo=None):
+        """Modelos de un usuario (de un tipo o de todos), ordenados por tipo y nombre"""
+        if not self.existe():
+            return self._escanear(tipo, usuario_id)
+        consulta = "SELECT * FROM modelos WHERE usuario_id = ?"
+        parametros = [usuario_id]
+        if tipo is not None:
+            consulta += " AND tipo = ?"
+            parametros.append(tipo)
+        with self._conectar() as conexion:
+            filas = conexion.execute(consulta + " ORDER BY tipo, nombre_modelo", parametros).fetchall()
+        # Un .pkl borrado sin pasar por el catálogo no se lista; --verificar lo informa
+        return [entrada for entrada in map(self._como_dict, filas) if os.path.exists(entrada["ruta"])]
+
+    def recientes(self, limite, tipo=None):
+        """Los `limite` modelos entrenados más recientemente, de todos los usuarios"""
+        if not self.existe():
+            modelos = sorted(self._escanear(tipo), key=lambda m: m["mtime_ns"], reverse=True)
+            return modelos[:limite]
+        consulta = "SELECT * FROM modelos"
+        parametros = []
+        if tipo is not None:
+            consulta += " WHERE tipo = ?"
+            parametros.append(tipo)
+        with self._conectar() as conexion:
+            filas = conexion.execute(consulta + " ORDER BY mtime_ns DESC LIMIT ?", parametros + [limite]).fetchall()
+        return [entrada for entrada in map(self._como_dict, filas) if os.path.exists(entrada["ruta"])]
+
+    def reconstruir(self):
+        """Reemplaza el contenido del catálogo por lo que hay en las carpetas de modelos"""
+        with self._conectar(poblar=False) as conexion, conexion:
+            return self._poblar(conexion)
+
+    def verificar(self):
+        """Diferencias entre el catálogo y las carpetas de modelos"""
+        en_disco = {(m["usuario_id"], m["tipo"], m["nombre_modelo"]): m for m in self._escanear()}
+        with self._conectar() as conexion:
+            en_catalogo = {(f[0], f[1], f[2]): self._como_dict(f) for f in conexion.execute("SELECT * FROM modelos")}
+        return {
+            "modelos_en_disco": len(en_disco),
+            "modelos_en_catalogo": len(en_catalogo),
+            "faltantes": sorted(m["ruta"] for c, m in en_disco.items() if c not in en_catalogo),
+            "huerfanos": sorted(m["ruta"] for c, m in en_catalogo.items() if c not in en_disco),
+            "desactualizados": sorted(
+                m["ruta"] for c, m in en_disco.items()
+                if c in en_catalogo and (m["tamano"], m["mtime_ns"]) !=
+                (en_catalogo[c]["tamano"], en_catalogo[c]["mtime_ns"]))
+        }
+
+    @contextlib.contextmanager
+    def _conectar(self, poblar=True):
+        nuevo = not self.existe()
+        conexion = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            # WAL: las lecturas no esperan a un entrenamiento que está registrando su modelo
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute(ESQUEMA)
+            if nuevo and poblar:
+                with conexion:
+                    self._poblar(conexion)
+            yield conexion
+        finally:
+            conexion.close()
+
+    def _poblar(self, conexion):
+        # Las métricas solo se conocen al entrenar: se conservan si el .pkl no cambió
+        anteriores = {
+            (f[0], f[1], f[2]): (f[5], f[6]) for f in conexion.execute("SELECT * FROM modelos")
+        }
+        filas = []
+        for m in self._escanear():
+            mtime_anterior, metricas = anteriores.get((m["usuario_id"], m["tipo"], m["nombre_modelo"]), (None, None))
+            if mtime_anterior != m["mtime_ns"] or metricas in (None, "null"):
+                metricas = json.dumps(metricas_artefacto(m["ruta"]))
+            filas.append(tuple(m[c] for c in COLUMNAS[:6]) + (metricas, m["actualizado"]))
+        conexion.execute("DELETE FROM modelos")
+        conexion.executemany(f"INSERT INTO modelos VALUES ({', '.join('?' * len(COLUMNAS))})", filas)
+        return len(filas)
+
+    def _escanear(self, tipo=None, usuario_id=None):
+        """Recorre las carpetas de modelos: lo que el catálogo evita en cada consulta"""
+        modelos = []
+        for tipo_carpeta, (carpeta_base, carpeta_modelos) in CARPETAS_TIPOS.items():
+            if tipo is not None and tipo != tipo_carpeta:
+                continue
+            carpeta = os.path.join(self.directorio, carpeta_base, carpeta_modelos)
+            try:
+                entradas = list(os.scandir(carpeta))
+            except FileNotFoundError:
+                continue
+            for entrada in entradas:
+                partes = interpretar_nombre(entrada.name)
+                if partes is None or partes[2] != tipo_carpeta or (usuario_id is not None and partes[0] != usuario_id):
+                    continue
+                fila = self._fila(*partes, entrada.path, entrada.stat(), None)
+                modelos.append(self._como_dict(fila))
+        return sorted(modelos, key=lambda m: (m["tipo"], m["nombre_modelo"]))
+
+    def _fila(self, usuario_id, nombre_modelo, tipo, ruta_pkl, stat, metricas):
+        return (usuario_id, tipo, nombre_modelo, os.path.abspath(ruta_pkl), stat.st_size, stat.st_mtime_ns,
+                json.dumps(metricas), time.strftime("%Y-%m-%dT%H:%M:%S"))
+
+    @staticmethod
+    def _como_dict(fila):
+        entrada = dict(zip(COLUMNAS, fila))
+        entrada["metricas"] = json.loads(entrada["metricas"]) if entrada["metricas"] else None
+        return entrada
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Catálogo de modelos entrenados")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--reconstruir", action="store_true", help="Volver a crear el catálogo desde las carpetas")
+    grupo.add_argument("--verificar", action="store_true", help="Comparar el catálogo con las carpetas")
+    grupo.add_argument("--listar", metavar="USUARIO", help="Modelos de un usuario")
+    parser.add_argument("--tipo", choices=list(CARPETAS_TIPOS), default=None)
+    parser.add_argument("--catalogo", default=None, help=f"Archivo SQLite (por defecto ${VARIABLE_CATALOGO} o {RUTA_CATALOGO})")
+    args = parser.parse_args()
+
+    catalogo = CatalogoModelos(args.catalogo)
+    if args.reconstruir:
+        inicio = time.perf_counter()
+        total = catalogo.reconstruir()
+        print(json.dumps({"success": True, "catalogo": catalogo.ruta, "modelos": total,
+                          "tiempo_ejecucion": round(time.perf_counter() - inicio, 4)}))
+    elif args.verificar:
+        diferencias = catalogo.verificar()
+        consistente = not (diferencias["faltantes"] or diferencias["huerfanos"] or diferencias["desactualizados"])
+        print(json.dumps({"success": True, "catalogo": catalogo.ruta, "consistente": consistente, **diferencias},
+                         indent=2, ensure_ascii=False))
+        sys.exit(0 if consistente else 1)
+    else:
+        print(json.dumps({"success": True, "usuario_id": args.listar,
+                          "modelos": catalogo.listar(args.listar, args.tipo)}, indent=2, ensure_ascii=False))
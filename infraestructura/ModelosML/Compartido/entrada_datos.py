@@ -0,0 +1,163 @@
+import io
+import json
+import math
+import mmap
+import os
+import sys
+
+# Entrada de valores para predictor.py, Optimizador.py y Clasificador.py.
+# El argumento de valores puede ser:
+#   JSON en la línea de comandos (como siempre; limitado por el tamaño máximo de argv)
+#   -        leer de stdin
+#   @ruta    leer de un archivo (.json, .npy, o .f64/.bin con float64 little-endian)
+# Por stdin el formato se detecta: .npy por su cabecera, JSON si empieza con [ o {, y si no
+# float64 little-endian crudo; --formato json|npy|f64 lo fija. Los binarios se leen sin copia:
+#   f64  memoryview de los bytes recibidos (o del mmap del archivo), sin importar NumPy
+#   npy  np.frombuffer sobre los bytes (o np.load con mmap); 1-D es una serie y 2-D (n, k) un
+#        lote de n series
+# Se rechazan los valores no numéricos (null, texto) y no finitos (NaN, infinito): el evaluador
+# compilado no falla con NaN como sklearn y devolvería una predicción sin sentido.
+# --silencioso: stdout solo lleva el objeto JSON del resultado, sin los mensajes de progreso.
+# La respuesta repite la entrada completa (valores_entrada, datos_entrada...).
+
+OPCION_SILENCIOSO = "--silencioso"
+OPCION_FORMATO = "--formato"
+FORMATOS = ("json", "npy", "f64")
+EXTENSIONES = {".json": "json", ".npy": "npy", ".f64": "f64", ".bin": "f64"}
+MAGIA_NPY = b"\x93NUMPY"
+
+def leer_argumentos(argv):
+    """(argumentos posicionales, silencioso, formato) de sys.argv[1:]"""
+    posicionales = []
+    silencioso = False
+    formato = None
+    i = 0
+    while i < len(argv):
+        if argv[i] == OPCION_SILENCIOSO:
+            silencioso = True
+        elif argv[i] == OPCION_FORMATO or argv[i].startswith(OPCION_FORMATO + "="):
+            if "=" in argv[i]:
+                formato = argv[i].split("=", 1)[1]
+            else:
+                i += 1
+                formato = argv[i] if i < len(argv) else None
+            if formato not in FORMATOS:
+                raise Exception(f"Formato inválido: {formato}. Use {', '.join(FORMATOS)}")
+        else:
+            posicionales.append(argv[i])
+        i += 1
+    return posicionales, silencioso, formato
+
+def silenciar():
+    """Descarta los print siguientes; devuelve el stdout original para escribir el resultado"""
+    salida = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    return salida
+
+def leer_valores(argumento, formato=None):
+    """Valores de la línea de comandos, de stdin ("-") o de un archivo ("@ruta")"""
+    if argumento == "-":
+        return validar_valores(decodificar(sys.stdin.buffer.read(), formato))
+    if argumento.startswith("@"):
+        return validar_valores(leer_archivo(argumento[1:], formato))
+    try:
+        return validar_valores(json.loads(argumento.replace('\\"', '"')))
+    except json.JSONDecodeError as e:
+        raise Exception(f"Error parseando valores: {str(e)}")
+
+def validar_valores(valores):
+    """Los mismos valores, o una excepción si hay alguno no numérico o no finito"""
+    if isinstance(valores, dict):
+        for serie in valores.values():
+            validar_valores(serie)
+        return valores
+    if isinstance(valores, list) and any(isinstance(v, (list, dict)) or getattr(v, "ndim", 0) for v in valores):
+        for serie in valores:
+            validar_valores(serie)
+        return valores
+    if isinstance(valores, (int, float, str)) or valores is None:
+        raise Exception(f"Se esperaba una lista de valores (recibido {valores!r})")
+    # Una suma recorre la serie en C: si es finita, también lo es cada valor
+    try:
+        total = float(valores.sum()) if hasattr(valores, "sum") else sum(valores)
+    except TypeError:
+        invalido = next(v for v in valores if not isinstance(v, (int, float)))
+        raise Exception(f"Valor no numérico en la entrada: {json.dumps(invalido)}")
+    if not math.isfinite(total) and not all(math.isfinite(v) for v in valores):
+        raise Exception("La entrada tiene valores no finitos (NaN o infinito)")
+    return valores
+
+def leer_archivo(ruta, formato=None):
+    if not os.path.isfile(ruta):
+        raise Exception(f"Archivo de valores no encontrado: {ruta}")
+    formato = formato or EXTENSIONES.get(os.path.splitext(ruta)[1].lower())
+    if formato == "json":
+        with open(ruta, "rb") as archivo:
+            return decodificar(archivo.read(), "json")
+    if formato == "npy":
+        import numpy as np
+        return como_series(np.load(ruta, mmap_mode="r", allow_pickle=False))
+    if formato == "f64":
+        if os.path.getsize(ruta) == 0:
+            return []
+        with open(ruta, "rb") as archivo:
+            return como_float64(mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ))
+    with open(ruta, "rb") as archivo:
+        return decodificar(archivo.read())
+
+def detectar_formato(datos):
+    if datos[:len(MAGIA_NPY)] == MAGIA_NPY:
+        return "npy"
+    inicio = datos.lstrip()[:1]
+    return "json" if inicio in (b"[", b"{") else "f64"
+
+def decodificar(datos, formato=None):
+    formato = formato or detectar_formato(datos)
+    if formato == "json":
+        try:
+            return json.loads(datos)
+        except ValueError as e:
+            raise Exception(f"Error parseando valores: {str(e)}")
+    if formato == "f64":
+        return como_float64(datos)
+
+    import numpy as np
+    cabecera = io.BytesIO(datos[:min(len(datos), 1 << 16)])
+    version = np.lib.format.read_magic(cabecera)
+    leer_cabecera = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+    forma, orden_fortran, dtype = leer_cabecera(cabecera)
+    if dtype.kind not in "fiu":
+        raise Exception(f"La entrada .npy debe ser numérica (dtype {dtype})")
+    n = int(np.prod(forma))
+    arreglo = np.frombuffer(datos, dtype=dtype, count=n, offset=cabecera.tell())
+    arreglo = arreglo.reshape(forma, order="F" if orden_fortran else "C")
+    return como_series(arreglo)
+
+def como_float64(datos):
+    """Vista float64 de un buffer little-endian, sin copiarlo"""
+    if len(datos) % 8:
+        raise Exception(f"La entrada float64 debe tener un múltiplo de 8 bytes (recibidos {len(datos)})")
+    if sys.byteorder != "little":
+        import numpy as np
+        return np.frombuffer(datos, dtype="<f8").astype(np.float64)
+    return memoryview(datos).cast("d")
+
+def como_series(arreglo):
+    """Arreglo float64 1-D (una serie) o lista de filas 1-D (un lote); sin copiar si ya es float64"""
+    import numpy as np
+    arreglo = np.asarray(arreglo, dtype=np.float64)
+    if arreglo.ndim == 1:
+        return arreglo
+    if arreglo.ndim == 2:
+        return list(arreglo)
+    raise Exception(f"Se esperaba un arreglo 1-D o 2-D (forma {arreglo.shape})")
+
+def es_serie(valores):
+    """Lista de valores, memoryview float64 o arreglo 1-D"""
+    return isinstance(valores, list) or getattr(valores, "ndim", 0) == 1
+
+def eco_entrada(valores):
+    """Los valores recibidos, completos, para la respuesta"""
+    if isinstance(valores, list):
+        return valores
+    return valores.tolist()
@@ -0,0 +1,128 @@
+import json
+import os
+import shutil
+import time
+
+# Formato de artefacto de modelo mapeable en memoria.
+# Junto a cada {usuario}_{nombre}_{tipo}.pkl se guarda la carpeta {usuario}_{nombre}_{tipo}.modelo/:
+#   meta.json      versión del formato, parámetros del modelo y forma/dtype de cada arreglo
+#   <arreglo>.npy  arreglos de NumPy sin comprimir, abiertos con mmap_mode='r'
+# Varios procesos que cargan el mismo artefacto comparten las páginas físicas del archivo
+# y el tiempo de carga depende del tamaño de meta.json, no del modelo.
+# NumPy se importa dentro de las funciones que lo usan: ruta_artefacto y artefacto_vigente
+# se llaman antes de saber si hace falta cargar un modelo.
+# Con compacto=True (migrar_modelos.py --compacto, el entrenamiento con compacto)
+# exportar_artefacto guarda la versión compacta del modelo (ArbolesCompilados.compactar:
+# valores de hoja y, con entrada float32, umbrales en float32; índices int32/uint8) si su
+# predicción no se aparta de la del original más de COTA_ERROR_COMPACTO; si no, la exacta en
+# float64. Por defecto es exacta. Con poda > 0 también descarta los últimos árboles que en
+# conjunto aportan menos que eso, y la cota pasa a ser COTA_ERROR_COMPACTO + poda. El formato
+# no cambia: meta.json ya describe el dtype de cada arreglo.
+
+VERSION_FORMATO = 1
+EXTENSION_ARTEFACTO = ".modelo"
+ARCHIVO_META = "meta.json"
+COMPACTO = False
+COTA_ERROR_COMPACTO = 1e-3
+TOLERANCIA_PODA = 0.0
+
+def ruta_artefacto(ruta_pkl):
+    """Carpeta del artefacto que acompaña a un .pkl"""
+    return ruta_pkl[:-len(".pkl")] + EXTENSION_ARTEFACTO
+
+def artefacto_vigente(ruta_pkl):
+    """Devuelve la carpeta del artefacto si existe y no es más antigua que el .pkl"""
+    ruta = ruta_artefacto(ruta_pkl)
+    try:
+        if os.stat(os.path.join(ruta, ARCHIVO_META)).st_mtime_ns >= os.stat(ruta_pkl).st_mtime_ns:
+            return ruta
+    except OSError:
+        pass
+    return None
+
+def guardar_artefacto(compilado, ruta, metadatos=None):
+    """Escribe el artefacto en una carpeta temporal y la reemplaza de forma atómica"""
+    import numpy as np
+
+    temporal = f"{ruta}.tmp-{os.getpid()}"
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+
+    descripcion = {}
+    for nombre, arreglo in compilado.arreglos().items():
+        arreglo = np.ascontiguousarray(arreglo)
+        np.save(os.path.join(temporal, f"{nombre}.npy"), arreglo, allow_pickle=False)
+        descripcion[nombre] = {"dtype": arreglo.dtype.str, "forma": list(arreglo.shape)}
+
+    meta = {
+        "version": VERSION_FORMATO,
+        "modelo": type(compilado).__name__,
+        "parametros": compilado.parametros(),
+        "arreglos": descripcion,
+        "creado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "metadatos": metadatos or {}
+    }
+    with open(os.path.join(temporal, ARCHIVO_META), "w", encoding="utf-8") as archivo:
+        json.dump(meta, archivo, indent=2, ensure_ascii=False)
+
+    # os.replace no sobrescribe carpetas con contenido: mover la anterior a un lado primero
+    anterior = None
+    if os.path.exists(ruta):
+        anterior = f"{ruta}.old-{os.getpid()}"
+        os.replace(ruta, anterior)
+    os.replace(temporal, ruta)
+    if anterior:
+        shutil.rmtree(anterior, ignore_errors=True)
+    return ruta
+
+def leer_meta(ruta):
+    with open(os.path.join(ruta, ARCHIVO_META), encoding="utf-8") as archivo:
+        meta = json.load(archivo)
+    if meta.get("version") != VERSION_FORMATO:
+        raise ValueError(f"Versión de artefacto no soportada: {meta.get('version')}")
+    return meta
+
+def cargar_artefacto(ruta, mmap=True):
+    """Abre el artefacto; con mmap=True los arreglos se leen bajo demanda desde el archivo"""
+    import numpy as np
+    from Compartido.arboles_compilados import ArbolesCompilados
+
+    meta = leer_meta(ruta)
+    if meta["modelo"] != ArbolesCompilados.__name__:
+        raise ValueError(f"Tipo de artefacto desconocido: {meta['modelo']}")
+
+    arreglos = {}
+    for nombre, descripcion in meta["arreglos"].items():
+        arreglo = np.load(os.path.join(ruta, f"{nombre}.npy"), mmap_mode="r" if mmap else None, allow_pickle=False)
+        if arreglo.dtype.str != descripcion["dtype"] or list(arreglo.shape) != descripcion["forma"]:
+            raise ValueError(f"El arreglo {nombre} no coincide con meta.json")
+        arreglos[nombre] = arreglo
+    return ArbolesCompilados.desde_arreglos(arreglos, meta["parametros"])
+
+def exportar_artefacto(modelo, ruta_pkl, metadatos=None, tolerancia=1e-6, muestras=1000,
+                       compacto=COMPACTO, poda=TOLERANCIA_PODA, cota_compacto=COTA_ERROR_COMPACTO):
+    """Compila un modelo sklearn, verifica que coincide con predict y guarda el artefacto"""
+    import numpy as np
+    from Compartido.arboles_compilados import ArbolesCompilados, verificar
+
+    compilado = ArbolesCompilados.desde_sklearn(modelo)
+    # Filas aleatorias en el rango de temperaturas de los datos de entrenamiento
+    rng = np.random.default_rng(0)
+    X = rng.uniform(10, 35, size=(muestras, modelo.n_features_in_))
+    diferencia = verificar(modelo, compilado, X, tolerancia)
+
+    if compacto:
+        resumen = {"arboles_originales": compilado.n_arboles, "bytes_originales": compilado.nbytes, "poda": poda}
+        try:
+            reducido = compilado.compactar(poda)
+            diferencia = verificar(modelo, reducido, X, cota_compacto + poda)
+            resumen.update(aplicado=True, arboles=reducido.n_arboles, bytes=reducido.nbytes,
+                           diferencia_maxima=diferencia)
+            compilado = reducido
+        except ValueError as e:
+            resumen.update(aplicado=False, motivo=str(e))
+        metadatos = dict(metadatos or {}, compacto=resumen)
+    elif metadatos and "compacto" in metadatos:
+        # Metadatos de un artefacto anterior compacto (actualización incremental)
+        metadatos = {clave: valor for clave, valor in metadatos.items() if clave != "compacto"}
+    return guardar_artefacto(compilado, ruta_artefacto(ruta_pkl), metadatos), diferencia
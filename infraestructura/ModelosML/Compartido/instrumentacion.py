@@ -0,0 +1,107 @@
+import atexit
+import contextlib
+import json
+import os
+import time
+
+# Medición de tiempos por fase para los scripts de ModelosML.
+# Cronometro acumula la duración de cada fase con perf_counter_ns; tiempos() devuelve el
+# desglose en milisegundos ("<fase>_ms") que se agrega como "tiempos" a la salida JSON.
+# Las fases repetidas se suman; con detallar=True (por ejemplo cada paso de predicción)
+# también se devuelve la lista de duraciones en "<fase>_pasos_ms".
+#
+# Perfilado opcional sin cambiar el código desplegado:
+#   ML_PERFIL=cprofile | tracemalloc | cprofile,tracemalloc
+#   ML_PERFIL_DIR=/ruta/carpeta   (por defecto ModelosML/Perfiles)
+# Al terminar el proceso se escribe {script}_{pid}_{fecha}.prof (cProfile, legible con pstats
+# o snakeviz) y {script}_{pid}_{fecha}_memoria.txt (las líneas que más memoria reservaron).
+
+VARIABLE_PERFIL = "ML_PERFIL"
+VARIABLE_DIR_PERFIL = "ML_PERFIL_DIR"
+DIR_PERFILES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Perfiles")
+LINEAS_MEMORIA = 25
+
+class Cronometro:
+    def __init__(self, inicio_ns=None):
+        self.inicio_ns = inicio_ns if inicio_ns is not None else time.perf_counter_ns()
+        self._marca_ns = self.inicio_ns
+        self._fases = {}
+        self._detalladas = set()
+
+    def registrar(self, nombre, duracion_ns, detallar=False):
+        self._fases.setdefault(nombre, []).append(duracion_ns)
+        if detallar:
+            self._detalladas.add(nombre)
+
+    @contextlib.contextmanager
+    def fase(self, nombre, detallar=False):
+        inicio = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            fin = time.perf_counter_ns()
+            self.registrar(nombre, fin - inicio, detallar)
+            self._marca_ns = fin
+
+    def marcar(self, nombre):
+        """Registra como fase el tiempo transcurrido desde la marca anterior (o el inicio)"""
+        ahora = time.perf_counter_ns()
+        self.registrar(nombre, ahora - self._marca_ns)
+        self._marca_ns = ahora
+
+    def tiempos(self):
+        resultado = {}
+        for nombre, duraciones in self._fases.items():
+            resultado[f"{nombre}_ms"] = round(sum(duraciones) / 1e6, 3)
+            if nombre in self._detalladas:
+                resultado[f"{nombre}_pasos_ms"] = [round(d / 1e6, 3) for d in duraciones]
+        resultado["total_ms"] = round((time.perf_counter_ns() - self.inicio_ns) / 1e6, 3)
+        return resultado
+
+def medir(cronometro, nombre, detallar=False):
+    """cronometro.fase(nombre), o un contexto vacío si no se está midiendo"""
+    return cronometro.fase(nombre, detallar) if cronometro is not None else contextlib.nullcontext()
+
+def serializar(respuesta, cronometro):
+    """json.dumps de la respuesta con "tiempos", incluyendo el tiempo de serialización"""
+    with cronometro.fase("serializacion"):
+        texto = json.dumps(respuesta)
+    # Se agrega al final sin volver a serializar toda la respuesta
+    tiempos = json.dumps(cronometro.tiempos())
+    return f"{texto[:-1]}, \"tiempos\": {tiempos}}}" if texto != "{}" else f"{{\"tiempos\": {tiempos}}}"
+
+def activar_perfil(nombre_script):
+    """Inicia cProfile y/o tracemalloc según ML_PERFIL y guarda los resultados al salir"""
+    modos = {modo.strip().lower() for modo in os.environ.get(VARIABLE_PERFIL, "").split(",") if modo.strip()}
+    if not modos:
+        return None
+
+    perfilador = None
+    if "cprofile" in modos:
+        import cProfile
+        perfilador = cProfile.Profile()
+        perfilador.enable()
+    if "tracemalloc" in modos:
+        import tracemalloc
+        tracemalloc.start()
+
+    carpeta = os.environ.get(VARIABLE_DIR_PERFIL) or DIR_PERFILES
+    base = os.path.join(carpeta, f"{nombre_script}_{os.getpid()}_{time.strftime('%Y%m%d-%H%M%S')}")
+
+    def guardar():
+        os.makedirs(carpeta, exist_ok=True)
+        if perfilador is not None:
+            perfilador.disable()
+            perfilador.dump_stats(f"{base}.prof")
+        if "tracemalloc" in modos:
+            import tracemalloc
+            actual, pico = tracemalloc.get_traced_memory()
+            estadisticas = tracemalloc.take_snapshot().statistics("lineno")[:LINEAS_MEMORIA]
+            tracemalloc.stop()
+            with open(f"{base}_memoria.txt", "w", encoding="utf-8") as archivo:
+                archivo.write(f"actual: {actual / 1024:.1f} KiB | pico: {pico / 1024:.1f} KiB\n")
+                for estadistica in estadisticas:
+                    archivo.write(f"{estadistica}\n")
+
+    atexit.register(guardar)
+    return base
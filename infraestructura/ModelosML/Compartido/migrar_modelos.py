@@ -0,0 +1,56 @@
+import argparse
+import glob
+import os
+import sys
+
+import joblib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Compartido.formato_modelo import COMPACTO, TOLERANCIA_PODA, exportar_artefacto
+from Compartido.registro_modelos import CARPETAS_TIPOS, DIR_MODELOS_ML
+
+# Migra los .pkl existentes al formato de artefacto mapeable (.modelo/) que prefiere predictor.py.
+# Uso: python migrar_modelos.py ruta1.pkl ruta2.pkl ...
+#      python migrar_modelos.py --todos [--compacto] [--poda 0.001]
+# Por defecto el artefacto es exacto (float64); --compacto lo guarda en float32 (ver formato_modelo.py)
+# y --poda, solo con --compacto, descarta además los últimos árboles.
+
+def migrar(ruta_pkl, tolerancia=1e-6, compacto=COMPACTO, poda=TOLERANCIA_PODA):
+    """Compila un .pkl, verifica que coincide con modelo.predict y guarda el artefacto"""
+    modelo = joblib.load(ruta_pkl)
+    return exportar_artefacto(modelo, ruta_pkl, {"origen": os.path.basename(ruta_pkl)}, tolerancia,
+                              compacto=compacto, poda=poda)
+
+def todos_los_pkl():
+    rutas = []
+    for carpeta_base, carpeta_modelos in CARPETAS_TIPOS.values():
+        rutas += sorted(glob.glob(os.path.join(DIR_MODELOS_ML, carpeta_base, carpeta_modelos, "*.pkl")))
+    return rutas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrar modelos .pkl al formato de artefacto mapeable")
+    parser.add_argument("rutas", nargs="*", help="Archivos .pkl a migrar")
+    parser.add_argument("--todos", action="store_true",
+                        help="Migrar ModelosPredictivos, ModelosOptimizacion y ModelosClasificacion")
+    parser.add_argument("--tolerancia", type=float, default=1e-6)
+    parser.add_argument("--compacto", action="store_true",
+                        help="Arreglos float32 si la predicción no cambia más de la cota (ver formato_modelo.py)")
+    parser.add_argument("--poda", type=float, default=TOLERANCIA_PODA,
+                        help="Descartar los últimos árboles que en conjunto aportan menos que esto")
+    args = parser.parse_args()
+
+    rutas = todos_los_pkl() if args.todos else args.rutas
+    if not rutas:
+        parser.error("Indique rutas .pkl o use --todos")
+
+    errores = 0
+    for ruta_pkl in rutas:
+        try:
+            ruta, diferencia = migrar(ruta_pkl, args.tolerancia, args.compacto, args.poda)
+            print(f" Migrado: {ruta} (diferencia máxima {diferencia:.2e})")
+        except Exception as e:
+            errores += 1
+            print(f" Error migrando {ruta_pkl}: {e}")
+
+    sys.exit(1 if errores else 0)
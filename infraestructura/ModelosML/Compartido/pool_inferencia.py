@@ -0,0 +1,533 @@
+import argparse
+import contextlib
+import gc
+import importlib
+import json
+import os
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+from multiprocessing.connection import Connection
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Compartido.entrada_datos import validar_valores
+from Compartido.registro_modelos import DIR_MODELOS_ML, RegistroModelos
+
+# Pool de inferencia precargado para predictor.py, Optimizador.py y Clasificador.py.
+# En lugar de un intérprete por petición (importar NumPy/sklearn y deserializar el modelo en
+# cada llamada), un proceso principal importa los scripts y precarga los modelos más usados, y
+# luego crea con fork:
+#   el despachador   acepta clientes en un socket Unix, encola las peticiones por usuario y se
+#                    las entrega de a una a los trabajadores libres
+#   N trabajadores   (uno por núcleo) atienden las peticiones con los modelos heredados: las
+#                    páginas de los modelos y de los módulos importados se comparten
+#                    copy-on-write (gc.freeze evita que el recolector las toque y las copie)
+# El proceso principal no atiende peticiones ni crea hilos: solo reinicia a los trabajadores que
+# terminan. Un modelo que no estaba precargado lo carga el trabajador que lo necesita, en su
+# propio registro. Solo Linux/Unix (os.fork y sockets Unix).
+# Protocolo: el mismo de servidor_prediccion.py, una petición JSON por línea y una respuesta por línea.
+#   {"id": 1, "tipo": "predictivo", "usuario_id": "...", "nombre_modelo": "...", "valores": [...], "n_pasos": 7}
+#   "tipo" es predictivo (por defecto), optimizacion (con "iteraciones") o clasificacion; la
+#   respuesta tiene el formato de cada script más "id", "tiempos" y "espera_cola_ms".
+#   Una conexión puede enviar varias peticiones sin esperar: las respuestas llegan en el orden en
+#   que terminan, con su "id".
+#   {"operacion": "estadisticas"} devuelve los contadores del despachador.
+# Equidad y contrapresión: cada usuario tiene su cola y se atienden por turnos, una petición por
+# usuario en cada vuelta; un usuario con más de --max-por-usuario pendientes recibe un error con
+# "reintentar": true, y si el total llega a --max-pendientes se deja de leer a ese cliente hasta
+# --espera-maxima segundos.
+# Uso: python pool_inferencia.py [--trabajadores 4] [--precargar-recientes 100]
+#                                [--precargar USUARIO/NOMBRE/TIPO ...] [--socket /ruta.sock]
+#   ML_POOL_SOCKET=/ruta.sock   (por defecto pool_inferencia_ml.sock en la carpeta temporal)
+
+VARIABLE_SOCKET = "ML_POOL_SOCKET"
+RUTA_SOCKET = os.path.join(tempfile.gettempdir(), "pool_inferencia_ml.sock")
+TIPOS = ("predictivo", "optimizacion", "clasificacion")
+CARPETAS_SCRIPTS = ("Prediccion", "Optimizacion", "Clasificacion")
+MAX_PENDIENTES = 256
+MAX_POR_USUARIO = 64
+ESPERA_MAXIMA_S = 10.0
+# Un trabajador que termina antes de esto espera ese tiempo antes de reiniciarse
+REINICIO_MINIMO_S = 1.0
+
+def ruta_socket(ruta=None):
+    return ruta or os.environ.get(VARIABLE_SOCKET) or RUTA_SOCKET
+
+def agregar_rutas_scripts():
+    """Carpetas de predictor.py, Optimizador.py y Clasificador.py, para importarlos como módulos"""
+    for carpeta in CARPETAS_SCRIPTS:
+        ruta = os.path.join(DIR_MODELOS_ML, carpeta)
+        if ruta not in sys.path:
+            sys.path.insert(0, ruta)
+
+def respuesta_error(error, tipo="predictivo", usuario_id=None, nombre_modelo=None):
+    return {
+        "success": False,
+        "tipo": tipo,
+        "error": str(error),
+        "usuario_id": usuario_id,
+        "nombre_modelo": nombre_modelo
+    }
+
+class Saturado(Exception):
+    """La petición no entra en la cola; el cliente puede reintentar"""
+
+class PlanificadorJusto:
+    """Una cola por usuario, atendidas por turnos, con límite total y por usuario"""
+
+    def __init__(self, max_pendientes=MAX_PENDIENTES, max_por_usuario=MAX_POR_USUARIO):
+        self.max_pendientes = max_pendientes
+        self.max_por_usuario = max_por_usuario
+        # usuario -> cola; el primero es el siguiente en turno
+        self._colas = OrderedDict()
+        self._pendientes = 0
+        lock = threading.Lock()
+        self._hay_tareas = threading.Condition(lock)
+        self._hay_lugar = threading.Condition(lock)
+
+    def agregar(self, usuario_id, tarea, espera_maxima=None):
+        """Encola la tarea; con la cola total llena espera hasta espera_maxima segundos"""
+        with self._hay_lugar:
+            if len(self._colas.get(usuario_id, ())) >= self.max_por_usuario:
+                raise Saturado(f"Demasiadas peticiones pendientes del usuario {usuario_id}")
+            if not self._hay_lugar.wait_for(lambda: self._pendientes < self.max_pendientes, espera_maxima):
+                raise Saturado("La cola de peticiones está llena")
+            self._colas.setdefault(usuario_id, deque()).append(tarea)
+            self._pendientes += 1
+            self._hay_tareas.notify()
+
+    def siguiente(self):
+        """Espera una tarea y devuelve la del usuario en turno"""
+        with self._hay_tareas:
+            self._hay_tareas.wait_for(lambda: self._pendientes > 0)
+            usuario_id, cola = next(iter(self._colas.items()))
+            tarea = cola.popleft()
+            if cola:
+                self._colas.move_to_end(usuario_id)
+            else:
+                del self._colas[usuario_id]
+            self._pendientes -= 1
+            self._hay_lugar.notify()
+            return tarea
+
+    def devolver(self, usuario_id, tarea):
+        """Vuelve a poner primera una tarea que no llegó a atenderse, sin mirar los límites"""
+        with self._hay_tareas:
+            if usuario_id not in self._colas:
+                self._colas[usuario_id] = deque()
+                self._colas.move_to_end(usuario_id, last=False)
+            self._colas[usuario_id].appendleft(tarea)
+            self._pendientes += 1
+            self._hay_tareas.notify()
+
+    def estadisticas(self):
+        with self._hay_tareas:
+            return {"pendientes": self._pendientes, "usuarios_en_espera": len(self._colas)}
+
+class Tarea:
+    __slots__ = ("datos", "cliente", "usuario_id", "encabezado", "recibida", "reintentada")
+
+    def __init__(self, datos, cliente, usuario_id, encabezado):
+        self.datos = datos
+        self.cliente = cliente
+        self.usuario_id = usuario_id
+        # id, tipo, usuario_id y nombre_modelo, para responder un error sin el trabajador
+        self.encabezado = encabezado
+        self.recibida = time.perf_counter()
+        self.reintentada = False
+
+class ConexionCliente:
+    """Socket de un cliente; los hilos de los trabajadores le escriben las respuestas de a una"""
+
+    def __init__(self, conexion):
+        self.conexion = conexion
+        self._lock = threading.Lock()
+
+    def responder(self, datos):
+        with self._lock:
+            try:
+                self.conexion.sendall(datos + b"\n")
+            except OSError:
+                pass  # El cliente se desconectó: la respuesta se descarta
+
+    def responder_error(self, encabezado, error, **extra):
+        respuesta = respuesta_error(error, encabezado.get("tipo", "predictivo"),
+                                    encabezado.get("usuario_id"), encabezado.get("nombre_modelo"))
+        respuesta.update(extra)
+        if "id" in encabezado:
+            respuesta["id"] = encabezado["id"]
+        self.responder(json.dumps(respuesta).encode())
+
+class Despachador:
+    """Recibe las peticiones de los clientes y las reparte a los trabajadores conectados"""
+
+    def __init__(self, socket_clientes, socket_trabajadores, planificador, espera_maxima=ESPERA_MAXIMA_S):
+        self.socket_clientes = socket_clientes
+        self.socket_trabajadores = socket_trabajadores
+        self.planificador = planificador
+        self.espera_maxima = espera_maxima
+        self._lock = threading.Lock()
+        self.trabajadores = 0
+        self.en_curso = 0
+        self.atendidas = 0
+        self.rechazadas = 0
+        self.interrumpidas = 0
+
+    def servir(self):
+        threading.Thread(target=self._aceptar_trabajadores, daemon=True).start()
+        while True:
+            conexion, _ = self.socket_clientes.accept()
+            threading.Thread(target=self._atender_cliente, args=(conexion,), daemon=True).start()
+
+    def estadisticas(self):
+        with self._lock:
+            contadores = {
+                "trabajadores": self.trabajadores,
+                "en_curso": self.en_curso,
+                "atendidas": self.atendidas,
+                "rechazadas": self.rechazadas,
+                "interrumpidas": self.interrumpidas
+            }
+        return dict(contadores, **self.planificador.estadisticas())
+
+    def _aceptar_trabajadores(self):
+        while True:
+            conexion, _ = self.socket_trabajadores.accept()
+            trabajador = Connection(conexion.detach())
+            threading.Thread(target=self._alimentar, args=(trabajador,), daemon=True).start()
+
+    def _atender_cliente(self, conexion):
+        cliente = ConexionCliente(conexion)
+        with conexion, conexion.makefile("rb") as lector:
+            for linea in lector:
+                linea = linea.strip()
+                if linea:
+                    self._recibir(linea, cliente)
+
+    def _recibir(self, linea, cliente):
+        try:
+            peticion = json.loads(linea)
+            if not isinstance(peticion, dict):
+                raise ValueError("La petición debe ser un objeto JSON")
+        except ValueError as e:
+            cliente.responder_error({}, f"Petición inválida: {e}")
+            return
+
+        encabezado = {clave: peticion[clave] for clave in ("id", "tipo", "usuario_id", "nombre_modelo") if clave in peticion}
+        if peticion.get("operacion") == "estadisticas":
+            respuesta = {"success": True, "pool": self.estadisticas()}
+            if "id" in peticion:
+                respuesta["id"] = peticion["id"]
+            cliente.responder(json.dumps(respuesta).encode())
+            return
+
+        usuario_id = str(peticion.get("usuario_id"))
+        try:
+            self.planificador.agregar(usuario_id, Tarea(linea, cliente, usuario_id, encabezado), self.espera_maxima)
+        except Saturado as e:
+            with self._lock:
+                self.rechazadas += 1
+            cliente.responder_error(encabezado, e, reintentar=True)
+
+    def _alimentar(self, trabajador):
+        """Entrega tareas a un trabajador de a una, hasta que se desconecte"""
+        with self._lock:
+            self.trabajadores += 1
+        try:
+            while True:
+                tarea = self.planificador.siguiente()
+                # Un trabajador libre no envía nada: si hay algo para leer, es que se cerró
+                if trabajador.poll():
+                    self.planificador.devolver(tarea.usuario_id, tarea)
+                    return
+                espera_ms = (time.perf_counter() - tarea.recibida) * 1000
+                with self._lock:
+                    self.en_curso += 1
+                try:
+                    trabajador.send_bytes(tarea.datos)
+                    respuesta = trabajador.recv_bytes()
+                except (EOFError, OSError):
+                    with self._lock:
+                        self.en_curso -= 1
+                        self.interrumpidas += 1
+                    # Las peticiones no modifican nada: se reintenta una vez en otro trabajador
+                    if not tarea.reintentada:
+                        tarea.reintentada = True
+                        self.planificador.devolver(tarea.usuario_id, tarea)
+                    else:
+                        tarea.cliente.responder_error(tarea.encabezado, "El trabajador terminó durante la petición",
+                                                      reintentar=True)
+                    return
+                # Se agrega la espera en cola sin volver a serializar la respuesta
+                tarea.cliente.responder(respuesta[:-1] + b', "espera_cola_ms": %.3f}' % espera_ms)
+                with self._lock:
+                    self.en_curso -= 1
+                    self.atendidas += 1
+        finally:
+            with self._lock:
+                self.trabajadores -= 1
+            trabajador.close()
+
+class AtendedorPeticiones:
+    """Atiende las peticiones de los tres tipos con un registro de modelos compartido"""
+
+    def __init__(self, registro=None, cache=None):
+        agregar_rutas_scripts()
+        import Clasificador
+        import Optimizador
+        from predictor import cargar_modelo
+        from servidor_prediccion import ServidorPrediccion
+
+        # Lo que los scripts importan de forma diferida, para que los trabajadores lo hereden
+        importlib.import_module("numpy")
+        self.registro = registro if registro is not None else RegistroModelos(cargador=cargar_modelo)
+        self.prediccion = ServidorPrediccion(self.registro, cache)
+        self.optimizador = Optimizador
+        self.clasificador = Clasificador
+
+    def atender(self, peticion):
+        tipo = peticion.get("tipo", "predictivo")
+        try:
+            # Como leer_valores en los scripts: null, texto, NaN o infinito no llegan al modelo
+            validar_valores(peticion.get("valores", []))
+        except Exception as e:
+            resultado = respuesta_error(e, tipo, peticion.get("usuario_id"), peticion.get("nombre_modelo"))
+            if "id" in peticion:
+                resultado["id"] = peticion["id"]
+            return resultado
+        if tipo == "predictivo":
+            return self.prediccion.atender(peticion)
+
+        from Compartido.instrumentacion import Cronometro
+        tiempo_inicio = time.time()
+        cronometro = Cronometro()
+        usuario_id = peticion.get("usuario_id")
+        nombre_modelo = peticion.get("nombre_modelo")
+        try:
+            if not usuario_id or not nombre_modelo or "valores" not in peticion:
+                raise Exception("Faltan argumentos: usuario_id, nombre_modelo y valores")
+            if tipo == "optimizacion":
+                resultado = self.optimizador.ejecutar_optimizacion(
+                    usuario_id, nombre_modelo, peticion["valores"], int(peticion.get("iteraciones", 100)),
+                    registro=self.registro, cronometro=cronometro
+                )
+            elif tipo == "clasificacion":
+                resultado = self.clasificador.ejecutar_clasificacion(
+                    usuario_id, nombre_modelo, peticion["valores"], registro=self.registro, cronometro=cronometro
+                )
+            else:
+                raise Exception(f"Tipo inválido: {tipo}. Use {', '.join(TIPOS)}")
+        except Exception as e:
+            resultado = respuesta_error(e, tipo, usuario_id, nombre_modelo)
+        resultado["tiempo_ejecucion"] = round(time.time() - tiempo_inicio, 4)
+        resultado["tiempos"] = cronometro.tiempos()
+        if "id" in peticion:
+            resultado["id"] = peticion["id"]
+        return resultado
+
+    def procesar(self, datos):
+        """Bytes de una petición (ya validada por el despachador) a bytes de la respuesta"""
+        peticion = json.loads(datos)
+        # Los mensajes de progreso de los scripts no deben mezclarse con el protocolo
+        with contextlib.redirect_stdout(sys.stderr):
+            return json.dumps(self.atender(peticion)).encode()
+
+def escuchar(ruta):
+    """Socket Unix escuchando en ruta; borra el de un pool anterior que terminó sin limpiar"""
+    if os.path.exists(ruta):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as prueba:
+            try:
+                prueba.connect(ruta)
+            except OSError:
+                os.unlink(ruta)
+            else:
+                raise Exception(f"Ya hay un pool escuchando en {ruta}")
+    servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    servidor.bind(ruta)
+    servidor.listen(socket.SOMAXCONN)
+    return servidor
+
+class PoolInferencia:
+    """Proceso principal: precarga, crea el despachador y mantiene los trabajadores"""
+
+    def __init__(self, atendedor, trabajadores=None, ruta=None, max_pendientes=MAX_PENDIENTES,
+                 max_por_usuario=MAX_POR_USUARIO, espera_maxima=ESPERA_MAXIMA_S):
+        self.atendedor = atendedor
+        self.n_trabajadores = trabajadores or os.cpu_count() or 1
+        self.ruta = ruta_socket(ruta)
+        self.ruta_trabajadores = self.ruta + ".trabajadores"
+        self.max_pendientes = max_pendientes
+        self.max_por_usuario = max_por_usuario
+        self.espera_maxima = espera_maxima
+        self.despachador = None
+        self.trabajadores = {}  # pid -> inicio (time.monotonic)
+
+    def iniciar(self, claves_precarga=()):
+        """Precarga los modelos y crea los procesos; devuelve la cantidad de modelos precargados"""
+        precargados = self.atendedor.registro.precargar(claves_precarga)
+        # Lo cargado hasta aquí queda fuera del recolector: recorrerlo en un hijo copiaría sus páginas
+        gc.collect()
+        gc.freeze()
+
+        socket_clientes = escuchar(self.ruta)
+        socket_trabajadores = escuchar(self.ruta_trabajadores)
+        despachador = Despachador(socket_clientes, socket_trabajadores,
+                                  PlanificadorJusto(self.max_pendientes, self.max_por_usuario), self.espera_maxima)
+        self.despachador = self._bifurcar(despachador.servir)
+        socket_clientes.close()
+        socket_trabajadores.close()
+        for _ in range(self.n_trabajadores):
+            self._iniciar_trabajador()
+        return precargados
+
+    def supervisar(self):
+        """Reinicia a los trabajadores que terminan; vuelve si termina el despachador"""
+        while True:
+            pid, estado = os.wait()
+            if pid == self.despachador:
+                self.despachador = None
+                print(f"El despachador terminó (estado {estado})", file=sys.stderr)
+                return
+            inicio = self.trabajadores.pop(pid, None)
+            if inicio is None:
+                continue
+            print(f"El trabajador {pid} terminó (estado {estado}); se reinicia", file=sys.stderr)
+            if time.monotonic() - inicio < REINICIO_MINIMO_S:
+                time.sleep(REINICIO_MINIMO_S)
+            self._iniciar_trabajador()
+
+    def detener(self):
+        procesos = list(self.trabajadores) + ([self.despachador] if self.despachador else [])
+        for pid in procesos:
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
+        for pid in procesos:
+            with contextlib.suppress(ChildProcessError):
+                os.waitpid(pid, 0)
+        self.trabajadores.clear()
+        self.despachador = None
+        for ruta in (self.ruta, self.ruta_trabajadores):
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(ruta)
+
+    def _iniciar_trabajador(self):
+        self.trabajadores[self._bifurcar(self._trabajar)] = time.monotonic()
+
+    def _trabajar(self):
+        conexion = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conexion.connect(self.ruta_trabajadores)
+        despachador = Connection(conexion.detach())
+        while True:
+            try:
+                datos = despachador.recv_bytes()
+            except EOFError:
+                return
+            despachador.send_bytes(self.atendedor.procesar(datos))
+
+    @staticmethod
+    def _bifurcar(funcion):
+        """Corre funcion en un proceso hijo que termina al volver, sin pasar por la limpieza del padre"""
+        pid = os.fork()
+        if pid:
+            return pid
+        codigo = 0
+        try:
+            # Ctrl+C llega a todo el grupo: solo el proceso principal lo atiende
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            funcion()
+        except BaseException:
+            traceback.print_exc()
+            codigo = 1
+        finally:
+            sys.stderr.flush()
+            os._exit(codigo)
+
+class ClientePool:
+    """Una conexión al pool: envía peticiones y lee las respuestas en el orden en que llegan"""
+
+    def __init__(self, ruta=None, timeout=None):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(ruta_socket(ruta))
+        self._lector = self.socket.makefile("rb")
+
+    def enviar(self, peticion):
+        self.socket.sendall(json.dumps(peticion).encode() + b"\n")
+
+    def recibir(self):
+        linea = self._lector.readline()
+        if not linea:
+            raise ConnectionError("El pool cerró la conexión")
+        return json.loads(linea)
+
+    def solicitar(self, peticion):
+        self.enviar(peticion)
+        return self.recibir()
+
+    def cerrar(self):
+        self._lector.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cerrar()
+
+def claves_precarga(precargar, recientes):
+    """(usuario_id, nombre_modelo, tipo) de --precargar y de los modelos entrenados más recientemente"""
+    claves = []
+    for texto in precargar:
+        partes = texto.split("/")
+        if len(partes) != 3 or partes[2] not in TIPOS:
+            raise ValueError(f"Clave de precarga inválida: {texto}. Use USUARIO/NOMBRE/TIPO")
+        claves.append(tuple(partes))
+    if recientes > 0:
+        from Compartido.catalogo_modelos import CatalogoModelos
+        claves += [(m["usuario_id"], m["nombre_modelo"], m["tipo"]) for m in CatalogoModelos().recientes(recientes)]
+    return list(dict.fromkeys(claves))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pool de inferencia con modelos precargados compartidos por fork")
+    parser.add_argument("--socket", default=None, help=f"Ruta del socket Unix (por defecto ${VARIABLE_SOCKET} o {RUTA_SOCKET})")
+    parser.add_argument("--trabajadores", type=int, default=None, help="Procesos trabajadores (por defecto uno por núcleo)")
+    parser.add_argument("--precargar", nargs="*", default=[], metavar="USUARIO/NOMBRE/TIPO")
+    parser.add_argument("--precargar-recientes", type=int, default=100,
+                        help="Precargar los N modelos entrenados más recientemente según el catálogo")
+    parser.add_argument("--max-modelos", type=int, default=200, help="Máximo de modelos en el registro")
+    parser.add_argument("--max-mb", type=float, default=512, help="Tamaño aproximado máximo del registro en MB")
+    parser.add_argument("--cache-max", type=int, default=10000, help="Pronósticos guardados por trabajador (0 la desactiva)")
+    parser.add_argument("--cache-ttl", type=float, default=300, help="Segundos de vigencia de un pronóstico guardado")
+    parser.add_argument("--max-pendientes", type=int, default=MAX_PENDIENTES)
+    parser.add_argument("--max-por-usuario", type=int, default=MAX_POR_USUARIO)
+    parser.add_argument("--espera-maxima", type=float, default=ESPERA_MAXIMA_S,
+                        help="Segundos que una petición espera lugar en la cola llena antes de rechazarse")
+    args = parser.parse_args()
+
+    agregar_rutas_scripts()
+    from cache_resultados import CacheResultados
+    from predictor import cargar_modelo
+
+    registro = RegistroModelos(max_modelos=args.max_modelos, max_bytes=int(args.max_mb * 1024 * 1024),
+                               cargador=cargar_modelo)
+    cache = CacheResultados(args.cache_max, args.cache_ttl) if args.cache_max > 0 else None
+    pool = PoolInferencia(AtendedorPeticiones(registro, cache), args.trabajadores, args.socket,
+                          args.max_pendientes, args.max_por_usuario, args.espera_maxima)
+    # SIGTERM termina como Ctrl+C: deteniendo a los hijos y borrando los sockets
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        precargados = pool.iniciar(claves_precarga(args.precargar, args.precargar_recientes))
+        print(f"POOL DE INFERENCIA - {pool.n_trabajadores} trabajadores, {precargados} modelos precargados, "
+              f"escuchando en {pool.ruta}", file=sys.stderr)
+        pool.supervisar()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.detener()
@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from Compartido.formato_modelo import ARCHIVO_META, artefacto_vigente
+
+# Registro en memoria de modelos deserializados para procesos de larga duración.
+# Clave: (usuario_id, nombre_modelo, tipo). Expulsión LRU por cantidad y tamaño aproximado,
+# expiración por inactividad (TTL) y recarga automática cuando cambia el mtime del .pkl o el
+# del meta.json de su artefacto .modelo/ (reexportado, por ejemplo con migrar_modelos.py).
+
+DIR_MODELOS_ML = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CARPETAS_TIPOS = {
+    "predictivo": ("Prediccion", "ModelosPredictivos"),
+    "optimizacion": ("Optimizacion", "ModelosOptimizacion"),
+    "clasificacion": ("Clasificacion", "ModelosClasificacion")
+}
+
+def ruta_modelo(usuario_id, nombre_modelo, tipo):
+    """Ruta del .pkl según la convención {usuario}_{nombre}_{tipo}.pkl"""
+    carpeta_base, carpeta_modelos = CARPETAS_TIPOS[tipo]
+    nombre_archivo = f"{usuario_id}_{nombre_modelo}_{tipo}.pkl"
+    return os.path.join(DIR_MODELOS_ML, carpeta_base, carpeta_modelos, nombre_archivo)
+
+def cargar_pickle(ruta):
+    """Cargador por defecto: joblib.load"""
+    import joblib
+    return joblib.load(ruta)
+
+class EntradaRegistro:
+    def __init__(self, modelo, ruta, firma, tamano):
+        self.modelo = modelo
+        self.ruta = ruta
+        self.firma = firma
+        self.tamano = tamano
+        self.ultimo_uso = time.monotonic()
+        self.ultima_verificacion = self.ultimo_uso
+
+class RegistroModelos:
+    """Cache LRU de modelos con límite por cantidad, bytes aproximados y TTL"""
+
+    def __init__(self, max_modelos=200, max_bytes=512 * 1024 * 1024, ttl=None,
+                 intervalo_verificacion=1.0, cargador=None, resolver_ruta=None):
+        # max_bytes usa el tamaño del archivo en disco como aproximación del tamaño en memoria
+        self.max_modelos = max_modelos
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.intervalo_verificacion = intervalo_verificacion
+        self.cargador = cargador or cargar_pickle
+        self.resolver_ruta = resolver_ruta or ruta_modelo
+        self._entradas = OrderedDict()
+        self._bytes_totales = 0
+        self._lock = threading.RLock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.recargas = 0
+
+    def obtener(self, usuario_id, nombre_modelo, tipo):
+        """Devuelve el modelo cacheado o lo carga. Lanza FileNotFoundError si no existe"""
+        clave = (usuario_id, nombre_modelo, tipo)
+        ahora = time.monotonic()
+        with self._lock:
+            self._expirar(ahora)
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                if ahora - entrada.ultima_verificacion < self.intervalo_verificacion:
+                    return self._acierto(clave, entrada, ahora)
+                stat = self._stat(entrada.ruta)
+                entrada.ultima_verificacion = ahora
+                if stat is not None and self._firma(entrada.ruta, stat) == entrada.firma:
+                    return self._acierto(clave, entrada, ahora)
+                # El archivo cambió (reentrenado o reexportado) o se eliminó
+                self._quitar(clave)
+                if stat is not None:
+                    self.recargas += 1
+
+            self.fallos += 1
+            ruta = self.resolver_ruta(usuario_id, nombre_modelo, tipo)
+            stat = self._stat(ruta)
+            if stat is None:
+                raise FileNotFoundError(ruta)
+            modelo = self.cargador(ruta)
+            entrada = EntradaRegistro(modelo, ruta, self._firma(ruta, stat), stat.st_size)
+            self._entradas[clave] = entrada
+            self._bytes_totales += entrada.tamano
+            self._ajustar_capacidad()
+            return modelo
+
+    def precargar(self, claves):
+        """Carga una lista de (usuario_id, nombre_modelo, tipo) ignorando los inexistentes"""
+        cargados = 0
+        for clave in claves:
+            try:
+                self.obtener(*clave)
+                cargados += 1
+            except FileNotFoundError:
+                pass
+        return cargados
+
+    def invalidar(self, usuario_id=None, nombre_modelo=None, tipo=None):
+        """Elimina las entradas que coinciden con los campos indicados"""
+        with self._lock:
+            for clave in list(self._entradas):
+                if all(filtro is None or filtro == valor
+                       for filtro, valor in zip((usuario_id, nombre_modelo, tipo), clave)):
+                    self._quitar(clave)
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                "modelos": len(self._entradas),
+                "bytes_aproximados": self._bytes_totales,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "expulsiones": self.expulsiones,
+                "recargas": self.recargas,
+                "tasa_aciertos": round(self.aciertos / total, 4) if total else 0.0
+            }
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def _acierto(self, clave, entrada, ahora):
+        self.aciertos += 1
+        entrada.ultimo_uso = ahora
+        self._entradas.move_to_end(clave)
+        return entrada.modelo
+
+    def _stat(self, ruta):
+        try:
+            return os.stat(ruta)
+        except OSError:
+            return None
+
+    def _firma(self, ruta, stat):
+        """mtime del .pkl y del meta.json de su artefacto vigente (None si no tiene)"""
+        artefacto = artefacto_vigente(ruta)
+        meta = self._stat(os.path.join(artefacto, ARCHIVO_META)) if artefacto else None
+        return (stat.st_mtime_ns, meta.st_mtime_ns if meta is not None else None)
+
+    def _quitar(self, clave):
+        entrada = self._entradas.pop(clave)
+        self._bytes_totales -= entrada.tamano
+
+    def _ajustar_capacidad(self):
+        # Siempre se conserva al menos el modelo recién cargado
+        while len(self._entradas) > 1 and (
+            len(self._entradas) > self.max_modelos or self._bytes_totales > self.max_bytes
+        ):
+            self._quitar(next(iter(self._entradas)))
+            self.expulsiones += 1
+
+    def _expirar(self, ahora):
+        if self.ttl is None:
+            return
+        # Las entradas están ordenadas por último uso: basta revisar desde la más antigua
+        while self._entradas:
+            clave, entrada = next(iter(self._entradas.items()))
+            if ahora - entrada.ultimo_uso <= self.ttl:
+                break
+            self._quitar(clave)
+            self.expulsiones += 1
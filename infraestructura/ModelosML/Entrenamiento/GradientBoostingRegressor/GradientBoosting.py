@@ -1,112 +1,224 @@
 from sklearn.ensemble import GradientBoostingRegressor, GradientBoostingClassifier
+from sklearn.ensemble import HistGradientBoostingRegressor, HistGradientBoostingClassifier
 from sklearn.model_selection import train_test_split
+from sklearn.multioutput import MultiOutputRegressor
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score, accuracy_score, classification_report
 from sklearn.preprocessing import LabelEncoder
 import numpy as np
-import pandas as pd
 import joblib
 import os
+import sys
+from threadpoolctl import threadpool_limits
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from Compartido.catalogo_modelos import CatalogoModelos
+from Compartido.formato_modelo import exportar_artefacto
+from Compartido.instrumentacion import Cronometro, activar_perfil
+from fuentes_datos import COLUMNA_POR_DEFECTO, buscar_archivo_datos, cargar_serie, hash_archivo
+
+# Motores de entrenamiento: "clasico" (GradientBoosting con divisiones exactas) o
+# "histograma" (HistGradientBoosting con parada temprana sobre una partición de validación)
+MOTORES = ("clasico", "histograma")
+
+HIPERPARAMETROS = {
+    "predictivo": {"n_estimators": 100, "learning_rate": 0.1, "max_depth": 3},
+    "optimizacion": {"n_estimators": 150, "learning_rate": 0.05, "max_depth": 4},  # Más estimadores y aprendizaje más lento para precisión
+    "clasificacion": {"n_estimators": 100, "learning_rate": 0.1, "max_depth": 3}
+}
+
+def ventanas_deslizantes(datos, n_steps=5):
+    """Vista (sin copia) de todas las ventanas de n_steps valores consecutivos"""
+    datos = np.asarray(datos)
+    if len(datos) < n_steps:
+        return np.empty((0, n_steps), dtype=datos.dtype)
+    return np.lib.stride_tricks.sliding_window_view(datos, n_steps)
 
 def crear_secuencias_temporales(datos, n_steps=5):
     """Crear secuencias para modelos predictivos"""
-    X, y = [], []
-    for i in range(len(datos) - n_steps):
-        X.append(datos[i:i + n_steps])
-        y.append(datos[i + n_steps])
-    return np.array(X), np.array(y)
+    datos = np.asarray(datos)
+    # La última ventana no tiene valor siguiente
+    X = ventanas_deslizantes(datos, n_steps)[:-1]
+    y = datos[n_steps:]
+    return X, y
+
+def crear_secuencias_directas(datos, n_steps=5, horizonte=7):
+    """Secuencias para el modelo predictivo directo: cada ventana y los horizonte valores siguientes"""
+    datos = np.asarray(datos)
+    Y = ventanas_deslizantes(datos[n_steps:], horizonte)
+    X = ventanas_deslizantes(datos, n_steps)[:len(Y)]
+    return X, Y
 
 def crear_datos_optimizacion(datos):
     """Crear datos para optimización - buscar valores óptimos"""
     # Para optimización, usamos características que permitan encontrar el mejor resultado
-    X, y = [], []
-    for i in range(len(datos) - 5):
-        # Usar ventana de 5 valores como características
-        ventana = datos[i:i + 5]
-        # El objetivo es el valor máximo de la siguiente ventana
-        siguiente_ventana = datos[i + 1:i + 6]
-        valor_objetivo = np.max(siguiente_ventana)  # Buscar el máximo
-        
-        X.append(ventana)
-        y.append(valor_objetivo)
-    
-    return np.array(X), np.array(y)
+    ventanas = ventanas_deslizantes(datos, 5)
+    # Usar ventana de 5 valores como características
+    X = ventanas[:-1]
+    # El objetivo es el valor máximo de la siguiente ventana
+    y = ventanas[1:].max(axis=1)
+    return X, y
+
+def categorizar_temperatura(temp):
+    """Categorías por rango de temperatura: 0 Frío (<18), 1 Normal (18-25), 2 Caliente (>=25)"""
+    return np.digitize(temp, [18, 25])
 
 def crear_datos_clasificacion(datos):
     """Crear datos para clasificación - categorizar valores"""
-    X, y = [], []
+    datos = np.asarray(datos)
+    X = ventanas_deslizantes(datos, 5)[:-1]
+    y = categorizar_temperatura(datos[5:])
+    return X, y
+
+def crear_estimador(tipo_modelo, motor="clasico", horizonte=None):
+    """Estimador sin entrenar según el tipo de modelo y el motor elegido"""
+    if motor not in MOTORES:
+        raise ValueError(f"Motor inválido: {motor}. Use {', '.join(MOTORES)}")
+    if horizonte:
+        if tipo_modelo != "predictivo":
+            raise ValueError("Solo los modelos predictivos tienen variante directa")
+        # Un regresor por paso del horizonte, todos sobre la misma ventana de 5 valores
+        return MultiOutputRegressor(crear_estimador(tipo_modelo, motor))
+    parametros = HIPERPARAMETROS[tipo_modelo]
+    es_clasificacion = tipo_modelo == "clasificacion"
+
+    if motor == "clasico":
+        clase = GradientBoostingClassifier if es_clasificacion else GradientBoostingRegressor
+        return clase(random_state=42, **parametros)
+
+    # Histogramas: max_iter es un tope, la parada temprana elige cuántas iteraciones usar
+    clase = HistGradientBoostingClassifier if es_clasificacion else HistGradientBoostingRegressor
+    return clase(
+        max_iter=parametros["n_estimators"] * 5,
+        learning_rate=parametros["learning_rate"],
+        max_depth=parametros["max_depth"],
+        early_stopping=True,
+        validation_fraction=0.1,
+        n_iter_no_change=10,
+        random_state=42
+    )
+
+def n_arboles(modelo):
+    """Iteraciones de boosting del modelo (por regresor en el predictivo directo)"""
+    if isinstance(modelo, MultiOutputRegressor):
+        return n_arboles(modelo.estimators_[0])
+    return int(getattr(modelo, "n_iter_", None) or modelo.n_estimators_)
+
+def guardar_modelo(modelo, id_usuario, nombre_modelo, tipo_modelo, metadatos, cronometro, compacto=False):
+    """Guarda el .pkl y su artefacto reemplazando los anteriores y lo registra en el catálogo; devuelve la ruta"""
+    #  Guardar modelo en la carpeta correcta
+    print(f"\n Guardando modelo {tipo_modelo}...")
+    carpetas_tipos = {
+        "predictivo": ("../../Prediccion", "ModelosPredictivos"),
+        "optimizacion": ("../../Optimizacion", "ModelosOptimizacion"), 
+        "clasificacion": ("../../Clasificacion", "ModelosClasificacion")
+    }
     
-    # Definir categorías basadas en rangos de temperatura
-    def categorizar_temperatura(temp):
-        if temp < 18:
-            return 0  # Frío
-        elif temp < 25:
-            return 1  # Normal
-        else:
-            return 2  # Caliente
+    carpeta_base, carpeta_modelos = carpetas_tipos[tipo_modelo.lower()]
     
-    for i in range(len(datos) - 5):
-        ventana = datos[i:i + 5]
-        siguiente_valor = datos[i + 5]
-        categoria = categorizar_temperatura(siguiente_valor)
-        
-        X.append(ventana)
-        y.append(categoria)
+    # Crear ruta absoluta
+    dir_actual = os.path.dirname(os.path.abspath(__file__))
+    ruta_completa = os.path.join(dir_actual, carpeta_base, carpeta_modelos)
+    
+    if not os.path.exists(ruta_completa):
+        os.makedirs(ruta_completa, exist_ok=True)
+        print(f" Carpeta creada: {ruta_completa}")
+
+    # Guardar con nombre específico
+    nombre_archivo = f"{id_usuario}_{nombre_modelo}_{tipo_modelo.lower()}.pkl"
+    ruta_modelo = os.path.join(ruta_completa, nombre_archivo)
+    
+    # Escribir a un temporal y reemplazar: nunca queda a la vista un .pkl a medio escribir
+    temporal = f"{ruta_modelo}.tmp-{os.getpid()}"
+    joblib.dump(modelo, temporal)
+    os.replace(temporal, ruta_modelo)
+    print(f" Modelo guardado: {ruta_modelo}")
     
-    return np.array(X), np.array(y)
+    #   Verificar que se guardó correctamente
+    tamaño = os.path.getsize(ruta_modelo)
+    print(f"Tamaño del archivo: {tamaño} bytes")
+    cronometro.marcar("guardado")
+    
+    #   Exportar artefacto mapeable en memoria junto al .pkl
+    try:
+        ruta_artefacto, diferencia = exportar_artefacto(modelo, ruta_modelo, metadatos, compacto=compacto)
+        print(f" Artefacto guardado: {ruta_artefacto} (diferencia máxima {diferencia:.2e})")
+    except Exception as e:
+        print(f" No se pudo exportar el artefacto, se usará solo el .pkl: {e}")
+    cronometro.marcar("exportacion_artefacto")
 
-def entrenar_modelo(archivo_excel, id_usuario, nombre_modelo, tipo_modelo):
-    columna_temperatura = "Temp1 - °C"
+    #   Registrar en el catálogo de modelos
+    try:
+        CatalogoModelos().registrar(id_usuario, nombre_modelo, tipo_modelo.lower(), ruta_modelo, metadatos["metricas"])
+        print(" Modelo registrado en el catálogo")
+    except Exception as e:
+        print(f" No se pudo registrar en el catálogo (python catalogo_modelos.py --reconstruir): {e}")
+    cronometro.marcar("registro_catalogo")
+    return ruta_modelo
+
+def entrenar_modelo(archivo_datos, id_usuario, nombre_modelo, tipo_modelo, columna_temperatura=COLUMNA_POR_DEFECTO,
+                    motor="clasico", hilos=None, busqueda=None, horizonte=None, incremental=False, compacto=False):
+    return entrenar_modelo_detallado(archivo_datos, id_usuario, nombre_modelo, tipo_modelo, columna_temperatura,
+                                     motor=motor, hilos=hilos, busqueda=busqueda, horizonte=horizonte,
+                                     incremental=incremental, compacto=compacto)["modelo"]
+
+def entrenar_modelo_detallado(archivo_datos, id_usuario, nombre_modelo, tipo_modelo, columna_temperatura=COLUMNA_POR_DEFECTO,
+                              permitir_simulados=True, motor="clasico", hilos=None, busqueda=None, horizonte=None,
+                              incremental=False, hiperparametros=None, compacto=False):
+    """Entrena y guarda el modelo; devuelve el modelo, sus métricas, la ruta, el hash de los datos y los tiempos"""
+    # busqueda: None (hiperparámetros fijos) o {"estrategia": grid|aleatoria|halving, y opcionalmente
+    # "pliegues", "iteraciones", "procesos"}; ver busqueda_hiperparametros.py
+    # horizonte: None (predictivo recursivo) o H para el predictivo directo, que emite H pasos por predict
+    # incremental: si el modelo ya existe, extenderlo solo con los datos nuevos; ver actualizacion_incremental.py
+    # hiperparametros: valores fijos en lugar de los de HIPERPARAMETROS (los de una búsqueda anterior)
+    # compacto: artefacto en float32 si no cambia la predicción más de la cota; ver formato_modelo.py
+    if incremental:
+        from actualizacion_incremental import actualizar_modelo
+        return actualizar_modelo(archivo_datos, id_usuario, nombre_modelo, tipo_modelo, columna_temperatura,
+                                 permitir_simulados, motor, hilos, busqueda, horizonte, compacto=compacto)
+
+    cronometro = Cronometro()
     print("="*60)
     print(" ENTRENAMIENTO DE MODELO")
     print(f" Tipo: {tipo_modelo.upper()}")
     print("="*60)
     
+    hash_datos = None
     try:
-        print("\n Cargando datos del Excel...")
-        df = pd.read_excel(archivo_excel)
-        df[columna_temperatura] = pd.to_numeric(df[columna_temperatura], errors='coerce')
-        temp_data = df[columna_temperatura].dropna().values
+        print(f"\n Cargando columna '{columna_temperatura}'...")
+        hash_datos = hash_archivo(archivo_datos)
+        temp_data = cargar_serie(archivo_datos, columna_temperatura, hash_datos=hash_datos)
         print(f" {len(temp_data)} registros cargados")
     except Exception as e:
-        print(f" Error cargando Excel: {e}")
+        if not permitir_simulados:
+            raise
+        hash_datos = None
+        print(f" Error cargando datos: {e}")
         print("Usando datos simulados...")
         np.random.seed(42)
         # Datos más realistas con tendencias
         temp_data = 20 + 5 * np.sin(np.arange(500) * 0.1) + np.random.normal(0, 1, 500)
         temp_data = np.clip(temp_data, 15, 30)  # Mantener en rango realista
         print(f" {len(temp_data)} registros simulados generados")
+    cronometro.marcar("carga_datos")
 
     #   Crear datos según el tipo de modelo
     print(f"\n Preparando datos para modelo {tipo_modelo}...")
     
-    if tipo_modelo.lower() == "predictivo":
+    if tipo_modelo.lower() == "predictivo" and horizonte:
+        X, y = crear_secuencias_directas(temp_data, n_steps=5, horizonte=horizonte)
+        print(f" Objetivo: Predecir los {horizonte} valores siguientes de una vez (directo)")
+
+    elif tipo_modelo.lower() == "predictivo":
         X, y = crear_secuencias_temporales(temp_data, n_steps=5)
-        modelo = GradientBoostingRegressor(
-            n_estimators=100,
-            learning_rate=0.1,
-            max_depth=3,
-            random_state=42
-        )
         print(" Objetivo: Predecir valores futuros")
         
     elif tipo_modelo.lower() == "optimizacion":
         X, y = crear_datos_optimizacion(temp_data)
-        modelo = GradientBoostingRegressor(
-            n_estimators=150,  # Más estimadores para optimización
-            learning_rate=0.05,  # Aprendizaje más lento para precisión
-            max_depth=4,
-            random_state=42
-        )
         print("Objetivo: Encontrar valores óptimos")
         
     elif tipo_modelo.lower() == "clasificacion":
         X, y = crear_datos_clasificacion(temp_data)
-        modelo = GradientBoostingClassifier(
-            n_estimators=100,
-            learning_rate=0.1,
-            max_depth=3,
-            random_state=42
-        )
         print(" Objetivo: Clasificar en categorías")
         print("   0: Frío (<18°C)")
         print("   1: Normal (18-25°C)")
@@ -115,16 +227,46 @@ def entrenar_modelo(archivo_excel, id_usuario, nombre_modelo, tipo_modelo):
     else:
         raise ValueError(f"Tipo de modelo inválido: {tipo_modelo}")
 
-    # Dividir datos
+    modelo = crear_estimador(tipo_modelo.lower(), motor, horizonte)
+    if hiperparametros:
+        modelo.set_params(**hiperparametros)
+    print(f" Motor: {motor} ({type(modelo).__name__})")
+
+    # Dividir datos; con búsqueda, la prueba son las últimas ventanas (sin mezclar pasado y futuro)
     X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
+        X, y, test_size=0.2, random_state=42, shuffle=busqueda is None
     )
     print(f"  {len(X)} secuencias | Entrenamiento: {len(X_train)} | Prueba: {len(X_test)}")
+    cronometro.marcar("preparacion")
 
-    # Entrenar modelo
-    print(f"\n Entrenando modelo {tipo_modelo}...")
-    modelo.fit(X_train, y_train)
-    print(" Modelo entrenado")
+    reporte_busqueda = None
+    if busqueda:
+        from busqueda_hiperparametros import buscar_hiperparametros
+        print(f"\n Buscando hiperparámetros ({busqueda['estrategia']}, validación cruzada temporal)...")
+        with threadpool_limits(limits=hilos, user_api="openmp"):
+            with cronometro.fase("busqueda_hiperparametros"):
+                modelo, reporte_busqueda = buscar_hiperparametros(
+                    modelo, X_train, y_train, tipo_modelo.lower(), motor, busqueda["estrategia"],
+                    pliegues=busqueda.get("pliegues", 5), iteraciones=busqueda.get("iteraciones", 20),
+                    procesos=busqueda.get("procesos", -1)
+                )
+        print(f" {reporte_busqueda['candidatos']} candidatos en {reporte_busqueda['tiempo_s']} s")
+        print(f" Mejores hiperparámetros: {reporte_busqueda['mejores_parametros']}"
+              f" ({reporte_busqueda['metrica']} CV {reporte_busqueda['mejor_puntaje_cv']:.4f})")
+    else:
+        # Entrenar modelo
+        print(f"\n Entrenando modelo {tipo_modelo}...")
+        with threadpool_limits(limits=hilos, user_api="openmp"):
+            with cronometro.fase("entrenamiento"):
+                modelo.fit(X_train, y_train)
+    if horizonte:
+        # predictor.py lo usa para pedir hasta horizonte pasos en un solo predict
+        modelo.horizonte_directo_ = horizonte
+        print(f" Modelo entrenado ({horizonte} regresores, uno por paso)")
+    elif motor == "histograma":
+        print(f" Modelo entrenado ({modelo.n_iter_} iteraciones con parada temprana)")
+    else:
+        print(" Modelo entrenado")
 
     #  Evaluar según el tipo
     print("\n EVALUANDO MODELO:")
@@ -139,43 +281,39 @@ def entrenar_modelo(archivo_excel, id_usuario, nombre_modelo, tipo_modelo):
         print(f"   R² Score:    {r2:.4f}")
         print(f"   Error (MAE): {mae:.4f}°C")
         print(f"   Error (MSE): {mse:.4f}")
+        metricas = {"r2": float(r2), "mae": float(mae), "mse": float(mse)}
+        if horizonte:
+            mae_horizonte = np.abs(y_test - y_test_pred).mean(axis=0)
+            print(f"   MAE por horizonte: {', '.join(f'{valor:.3f}' for valor in mae_horizonte)}")
+            metricas["mae_por_horizonte"] = [float(valor) for valor in mae_horizonte]
         
     else:  # clasificacion
         # Métricas de clasificación
         accuracy = accuracy_score(y_test, y_test_pred)
         print(f"   Precisión:   {accuracy:.4f}")
+        metricas = {"accuracy": float(accuracy)}
         print("\n Reporte detallado:")
         print(classification_report(y_test, y_test_pred, 
                                   target_names=['Frío', 'Normal', 'Caliente']))
+    cronometro.marcar("evaluacion")
 
-    #  Guardar modelo en la carpeta correcta
-    print(f"\n Guardando modelo {tipo_modelo}...")
-    carpetas_tipos = {
-        "predictivo": ("../../Prediccion", "ModelosPredictivos"),
-        "optimizacion": ("../../Optimizacion", "ModelosOptimizacion"), 
-        "clasificacion": ("../../Clasificacion", "ModelosClasificacion")
-    }
-    
-    carpeta_base, carpeta_modelos = carpetas_tipos[tipo_modelo.lower()]
-    
-    # Crear ruta absoluta
-    dir_actual = os.path.dirname(os.path.abspath(__file__))
-    ruta_completa = os.path.join(dir_actual, carpeta_base, carpeta_modelos)
-    
-    if not os.path.exists(ruta_completa):
-        os.makedirs(ruta_completa, exist_ok=True)
-        print(f" Carpeta creada: {ruta_completa}")
+    ruta_modelo = guardar_modelo(modelo, id_usuario, nombre_modelo, tipo_modelo, {
+        "hash_datos": hash_datos,
+        "columna": columna_temperatura,
+        "motor": motor,
+        "registros": int(len(temp_data)),
+        "ultimos_valores": [float(valor) for valor in temp_data[-5:]],
+        "arboles": n_arboles(modelo),
+        "metricas": metricas,
+        "hiperparametros": reporte_busqueda["mejores_parametros"] if reporte_busqueda else hiperparametros,
+        "horizonte": horizonte
+    }, cronometro, compacto)
 
-    # Guardar con nombre específico
-    nombre_archivo = f"{id_usuario}_{nombre_modelo}_{tipo_modelo.lower()}.pkl"
-    ruta_modelo = os.path.join(ruta_completa, nombre_archivo)
-    
-    joblib.dump(modelo, ruta_modelo)
-    print(f" Modelo guardado: {ruta_modelo}")
-    
-    #   Verificar que se guardó correctamente
-    tamaño = os.path.getsize(ruta_modelo)
-    print(f"Tamaño del archivo: {tamaño} bytes")
+    #   Reporte de la búsqueda junto al modelo
+    if reporte_busqueda:
+        from busqueda_hiperparametros import guardar_reporte
+        reporte_busqueda["metricas_prueba"] = metricas
+        print(f" Reporte de búsqueda: {guardar_reporte(reporte_busqueda, ruta_modelo)}")
     
     #  Hacer una predicción de prueba
     print(f"\n PRUEBA DEL MODELO:")
@@ -187,18 +325,36 @@ def entrenar_modelo(archivo_excel, id_usuario, nombre_modelo, tipo_modelo):
         print(f"   Entrada: {ejemplo[0]}")
         print(f"   Predicción: {categorias[int(prediccion[0])]} (clase {prediccion[0]})")
         print(f"   Real: {categorias[int(y_test[0])]} (clase {y_test[0]})")
+    elif horizonte:
+        print(f"   Entrada: {ejemplo[0]}")
+        print(f"   Predicción: {np.round(prediccion[0], 4)}°C")
+        print(f"   Real: {np.round(y_test[0], 4)}°C")
     else:
         print(f"   Entrada: {ejemplo[0]}")
         print(f"   Predicción: {prediccion[0]:.4f}°C")
         print(f"   Real: {y_test[0]:.4f}°C")
 
+    tiempos = cronometro.tiempos()
+    print("\n TIEMPOS POR FASE:")
+    for fase, milisegundos in tiempos.items():
+        print(f"   {fase:<28} {milisegundos:>10.1f}")
+
     print("\n" + "="*60)
     print(" ¡ENTRENAMIENTO COMPLETADO EXITOSAMENTE!")
     print("="*60)
     
-    return modelo
+    return {
+        "modelo": modelo,
+        "metricas": metricas,
+        "ruta_modelo": ruta_modelo,
+        "registros": int(len(temp_data)),
+        "hash_datos": hash_datos,
+        "busqueda": reporte_busqueda,
+        "tiempos": tiempos
+    }
 
 if __name__ == "__main__":
+    activar_perfil("entrenamiento")
     print(" SISTEMA DE ENTRENAMIENTO DE MODELOS ML")
     print("="*60)
     
@@ -239,20 +395,39 @@ if __name__ == "__main__":
         print(" Error: El ID de usuario y nombre del modelo son obligatorios")
         exit(1)
 
-    # Buscar archivo Excel
+    opcion_motor = input(" Motor (1 clásico / 2 histograma, Enter para clásico): ").strip()
+    motor = "histograma" if opcion_motor == "2" else "clasico"
+
+    columna = input(f" Columna de datos (Enter para '{COLUMNA_POR_DEFECTO}'): ").strip() or COLUMNA_POR_DEFECTO
+
+    opcion_busqueda = input(" Búsqueda de hiperparámetros (1 grid / 2 aleatoria / 3 halving, Enter para no): ").strip()
+    estrategias = {"1": "grid", "2": "aleatoria", "3": "halving"}
+    busqueda = {"estrategia": estrategias[opcion_busqueda]} if opcion_busqueda in estrategias else None
+
+    horizonte = None
+    if tipo_modelo == "predictivo":
+        opcion_horizonte = input(" Horizonte del modelo directo (pasos, Enter para recursivo): ").strip()
+        horizonte = int(opcion_horizonte) if opcion_horizonte.isdigit() and int(opcion_horizonte) > 0 else None
+
+    opcion_incremental = input(" Si el modelo ya existe, ¿actualizarlo solo con los datos nuevos? (s/N): ").strip().lower()
+    incremental = opcion_incremental in ("s", "si", "sí")
+
+    opcion_compacto = input(" ¿Guardar el artefacto compacto (float32, error hasta 1e-3)? (s/N): ").strip().lower()
+    compacto = opcion_compacto in ("s", "si", "sí")
+
+    # Buscar archivo de datos (xlsx, xls, csv o parquet)
     carpeta_archivos = "DejarArchivo"
-    archivos = [f for f in os.listdir(carpeta_archivos) if f.endswith('.xlsx')]
+    archivo_datos = buscar_archivo_datos(carpeta_archivos)
     
-    if archivos:
-        archivo_excel = os.path.join(carpeta_archivos, archivos[0])
-        print(f"\n Usando archivo: {archivos[0]}")
+    if archivo_datos:
+        print(f"\n Usando archivo: {os.path.basename(archivo_datos)}")
     else:
-        print(f"\n No se encontró archivo Excel en '{carpeta_archivos}'")
+        print(f"\n No se encontró archivo de datos en '{carpeta_archivos}'")
         print(" Se usarán datos simulados")
-        archivo_excel = None
 
     try:
-        modelo = entrenar_modelo(archivo_excel, id_usuario, nombre_modelo, tipo_modelo)
+        modelo = entrenar_modelo(archivo_datos, id_usuario, nombre_modelo, tipo_modelo, columna, motor,
+                                 busqueda=busqueda, horizonte=horizonte, incremental=incremental, compacto=compacto)
         print(f"\n ¡Modelo '{nombre_modelo}' listo para usar!")
         
     except Exception as e:
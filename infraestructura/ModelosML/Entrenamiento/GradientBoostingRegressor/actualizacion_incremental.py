@@ -0,0 +1,225 @@
+import joblib
+import numpy as np
+from sklearn.metrics import accuracy_score, mean_absolute_error, mean_squared_error, r2_score
+from sklearn.multioutput import MultiOutputRegressor
+from threadpoolctl import threadpool_limits
+
+from GradientBoosting import (crear_datos_clasificacion, crear_datos_optimizacion, crear_secuencias_directas,
+                              crear_secuencias_temporales, entrenar_modelo_detallado, guardar_modelo, n_arboles)
+from Compartido.formato_modelo import artefacto_vigente, leer_meta
+from Compartido.instrumentacion import Cronometro
+from Compartido.registro_modelos import ruta_modelo
+from fuentes_datos import COLUMNA_POR_DEFECTO, cargar_serie, hash_archivo
+
+# Actualización incremental de un modelo cuando el archivo de datos crece.
+# El artefacto vigente guarda cuántos registros y qué últimos valores se usaron al entrenar;
+# si el archivo actual continúa esa historia, solo la cola nueva (con 5 valores de
+# solapamiento para las primeras ventanas) entrena árboles adicionales con warm_start:
+#   GradientBoosting*    n_estimators += arboles; cada árbol nuevo ajusta el residuo del
+#                        ensamble existente sobre la cola
+#   MultiOutputRegressor lo mismo en el regresor de cada paso del horizonte
+# El último 20% de las ventanas nuevas queda para validar. Se reentrena desde cero con
+# entrenar_modelo_detallado si los árboles nuevos empeoran el error de validación del modelo
+# actual, si ese error supera al del último entrenamiento completo en más de umbral_deriva,
+# si los datos no continúan la historia, si el ensamble pasaría de FACTOR_MAXIMO_ARBOLES veces
+# sus árboles originales, si en la cola faltan clases (clasificación) o con el motor
+# histograma: HistGradientBoosting vuelve a calcular los bins con los datos nuevos y los
+# árboles existentes quedan con los umbrales de los anteriores.
+# Con menos de MINIMO_VALORES_NUEVOS valores nuevos el modelo no cambia.
+
+ARBOLES_POR_ACTUALIZACION = 20
+UMBRAL_DERIVA = 0.5
+MINIMO_VALORES_NUEVOS = 50
+FRACCION_VALIDACION = 0.2
+FACTOR_MAXIMO_ARBOLES = 3
+
+class ReentrenamientoNecesario(Exception):
+    """El modelo no se puede extender y hay que entrenarlo completo"""
+
+def construir_ventanas(datos, tipo_modelo, horizonte=None):
+    """X, y con el mismo constructor que usa entrenar_modelo_detallado"""
+    if tipo_modelo == "predictivo" and horizonte:
+        return crear_secuencias_directas(datos, n_steps=5, horizonte=horizonte)
+    if tipo_modelo == "predictivo":
+        return crear_secuencias_temporales(datos, n_steps=5)
+    if tipo_modelo == "optimizacion":
+        return crear_datos_optimizacion(datos)
+    return crear_datos_clasificacion(datos)
+
+def metricas_modelo(modelo, X, y, tipo_modelo):
+    """Las mismas métricas que guarda el entrenamiento completo"""
+    prediccion = modelo.predict(X)
+    if tipo_modelo == "clasificacion":
+        return {"accuracy": float(accuracy_score(y, prediccion))}
+    metricas = {"r2": float(r2_score(y, prediccion)), "mae": float(mean_absolute_error(y, prediccion)),
+                "mse": float(mean_squared_error(y, prediccion))}
+    if np.ndim(y) == 2:
+        metricas["mae_por_horizonte"] = [float(valor) for valor in np.abs(y - prediccion).mean(axis=0)]
+    return metricas
+
+def error_de(metricas):
+    """MAE en regresión, 1 - accuracy en clasificación"""
+    return metricas["mae"] if "mae" in metricas else 1.0 - metricas["accuracy"]
+
+def extender(estimador, X, y, arboles):
+    """Agrega arboles iteraciones de boosting entrenadas con X, y sobre las existentes"""
+    if isinstance(estimador, MultiOutputRegressor):
+        for paso, regresor in enumerate(estimador.estimators_):
+            extender(regresor, X, y[:, paso], arboles)
+        return
+    estimador.set_params(warm_start=True, n_estimators=estimador.n_estimators_ + arboles)
+    estimador.fit(X, y)
+    estimador.set_params(warm_start=False)
+
+def leer_metadatos(ruta_pkl):
+    """Metadatos del artefacto vigente, o {} si no hay"""
+    ruta_artefacto = artefacto_vigente(ruta_pkl)
+    if not ruta_artefacto:
+        return {}
+    try:
+        return leer_meta(ruta_artefacto).get("metadatos", {})
+    except (OSError, ValueError):
+        return {}
+
+def actualizar_modelo(archivo_datos, id_usuario, nombre_modelo, tipo_modelo, columna_temperatura=COLUMNA_POR_DEFECTO,
+                      permitir_simulados=True, motor="clasico", hilos=None, busqueda=None, horizonte=None,
+                      arboles=ARBOLES_POR_ACTUALIZACION, umbral_deriva=UMBRAL_DERIVA, compacto=False):
+    """Extiende el modelo con los datos nuevos o lo reentrena completo; devuelve lo mismo que
+    entrenar_modelo_detallado más "actualizacion" (modo incremental, completo o sin_cambios)"""
+    tipo_modelo = tipo_modelo.lower()
+    ruta_pkl = ruta_modelo(id_usuario, nombre_modelo, tipo_modelo)
+    metadatos = leer_metadatos(ruta_pkl)
+    cronometro = Cronometro()
+    print("="*60)
+    print(" ACTUALIZACIÓN INCREMENTAL DE MODELO")
+    print(f" Tipo: {tipo_modelo.upper()}")
+    print("="*60)
+    try:
+        return extender_con_datos_nuevos(archivo_datos, id_usuario, nombre_modelo, tipo_modelo, columna_temperatura,
+                                         motor, hilos, horizonte, arboles, umbral_deriva, ruta_pkl, metadatos, cronometro,
+                                         compacto)
+    except ReentrenamientoNecesario as e:
+        motivo = str(e)
+
+    print(f"\n Reentrenamiento completo: {motivo}")
+    # Mismo modelo con otros datos: conservar los hiperparámetros de su última búsqueda
+    misma_configuracion = (metadatos.get("motor", "clasico") == motor and metadatos.get("horizonte") == horizonte)
+    hiperparametros = metadatos.get("hiperparametros") if misma_configuracion and not busqueda else None
+    detalle = entrenar_modelo_detallado(archivo_datos, id_usuario, nombre_modelo, tipo_modelo, columna_temperatura,
+                                        permitir_simulados, motor, hilos, busqueda, horizonte,
+                                        hiperparametros=hiperparametros, compacto=compacto)
+    detalle["actualizacion"] = {"modo": "completo", "motivo": motivo}
+    return detalle
+
+def extender_con_datos_nuevos(archivo_datos, id_usuario, nombre_modelo, tipo_modelo, columna_temperatura, motor,
+                              hilos, horizonte, arboles, umbral_deriva, ruta_pkl, metadatos, cronometro, compacto):
+    if not metadatos:
+        raise ReentrenamientoNecesario("no hay un modelo anterior con artefacto vigente")
+    anteriores = {"columna": metadatos.get("columna"), "motor": metadatos.get("motor", "clasico"),
+                  "horizonte": metadatos.get("horizonte")}
+    for clave, pedido in (("columna", columna_temperatura), ("motor", motor), ("horizonte", horizonte)):
+        if anteriores[clave] != pedido:
+            raise ReentrenamientoNecesario(f"el modelo anterior tiene {clave} {anteriores[clave]!r} y se pidió {pedido!r}")
+    if motor == "histograma":
+        raise ReentrenamientoNecesario("HistGradientBoosting no admite warm_start con datos nuevos")
+    if not archivo_datos:
+        raise ReentrenamientoNecesario("no hay archivo de datos")
+    registros, ultimos = metadatos.get("registros"), metadatos.get("ultimos_valores")
+    if registros is None or ultimos is None:
+        raise ReentrenamientoNecesario("el artefacto no registra los últimos valores de entrenamiento")
+
+    hash_datos = hash_archivo(archivo_datos)
+    if hash_datos == metadatos.get("hash_datos"):
+        return sin_cambios(ruta_pkl, metadatos, cronometro, "los datos no cambiaron")
+    datos = cargar_serie(archivo_datos, columna_temperatura, hash_datos=hash_datos)
+    print(f" {len(datos)} registros cargados ({registros} en el último entrenamiento)")
+    if len(datos) < registros or not np.allclose(datos[registros - len(ultimos):registros], ultimos):
+        raise ReentrenamientoNecesario("los datos no continúan la historia con la que se entrenó el modelo")
+    nuevos = len(datos) - registros
+    if nuevos < MINIMO_VALORES_NUEVOS:
+        return sin_cambios(ruta_pkl, metadatos, cronometro,
+                           f"{nuevos} valores nuevos; se esperan al menos {MINIMO_VALORES_NUEVOS}")
+    cronometro.marcar("carga_datos")
+
+    modelo = joblib.load(ruta_pkl)
+    arboles_completo = metadatos.get("arboles_completo", metadatos.get("arboles") or n_arboles(modelo))
+    if n_arboles(modelo) + arboles > FACTOR_MAXIMO_ARBOLES * arboles_completo:
+        raise ReentrenamientoNecesario(f"el ensamble pasaría de {FACTOR_MAXIMO_ARBOLES} veces sus {arboles_completo} árboles originales")
+    cronometro.marcar("carga_modelo")
+
+    # Solapamiento: las ventanas (y el horizonte del directo) que terminan en los valores nuevos
+    solapamiento = 5 + (horizonte - 1 if horizonte else 0)
+    X, y = construir_ventanas(datos[registros - solapamiento:], tipo_modelo, horizonte)
+    corte = int(len(X) * (1 - FRACCION_VALIDACION))
+    X_nuevo, X_validacion, y_nuevo, y_validacion = X[:corte], X[corte:], y[:corte], y[corte:]
+    if tipo_modelo == "clasificacion" and not np.array_equal(np.unique(y_nuevo), modelo.classes_):
+        raise ReentrenamientoNecesario("las ventanas nuevas no tienen todas las clases del modelo")
+    print(f" {nuevos} valores nuevos | Ventanas: {len(X_nuevo)} para actualizar, {len(X_validacion)} para validar")
+    cronometro.marcar("preparacion")
+
+    error_anterior = error_de(metricas_modelo(modelo, X_validacion, y_validacion, tipo_modelo))
+    print(f"\n Agregando {arboles} árboles a los {n_arboles(modelo)} existentes...")
+    with threadpool_limits(limits=hilos, user_api="openmp"):
+        with cronometro.fase("entrenamiento"):
+            extender(modelo, X_nuevo, y_nuevo, arboles)
+
+    metricas = metricas_modelo(modelo, X_validacion, y_validacion, tipo_modelo)
+    referencia = metadatos.get("metricas_referencia", metadatos["metricas"])
+    error_validacion, error_referencia = error_de(metricas), error_de(referencia)
+    print(f" Error de validación: {error_anterior:.4f} antes, {error_validacion:.4f} después"
+          f" (último entrenamiento completo: {error_referencia:.4f})")
+    if error_validacion > error_anterior:
+        raise ReentrenamientoNecesario(f"los árboles nuevos empeoran el error de validación"
+                                       f" ({error_anterior:.4f} a {error_validacion:.4f})")
+    if error_validacion > error_referencia * (1 + umbral_deriva):
+        raise ReentrenamientoNecesario(f"deriva: error de validación {error_validacion:.4f} mayor que"
+                                       f" {error_referencia:.4f} en más de {umbral_deriva:.0%}")
+    cronometro.marcar("evaluacion")
+
+    ruta = guardar_modelo(modelo, id_usuario, nombre_modelo, tipo_modelo, dict(
+        metadatos,
+        hash_datos=hash_datos,
+        registros=int(len(datos)),
+        ultimos_valores=[float(valor) for valor in datos[-5:]],
+        arboles=n_arboles(modelo),
+        metricas=metricas,
+        metricas_referencia=referencia,
+        arboles_completo=arboles_completo,
+        actualizaciones=metadatos.get("actualizaciones", 0) + 1
+    ), cronometro, compacto)
+
+    tiempos = cronometro.tiempos()
+    print("\n" + "="*60)
+    print(" ¡ACTUALIZACIÓN COMPLETADA!")
+    print("="*60)
+    return {
+        "modelo": modelo,
+        "metricas": metricas,
+        "ruta_modelo": ruta,
+        "registros": int(len(datos)),
+        "hash_datos": hash_datos,
+        "busqueda": None,
+        "tiempos": tiempos,
+        "actualizacion": {
+            "modo": "incremental",
+            "valores_nuevos": nuevos,
+            "arboles_agregados": arboles,
+            "arboles": n_arboles(modelo),
+            "error_validacion_antes": round(error_anterior, 4),
+            "error_validacion": round(error_validacion, 4),
+            "error_referencia": round(error_referencia, 4)
+        }
+    }
+
+def sin_cambios(ruta_pkl, metadatos, cronometro, motivo):
+    print(f"\n Modelo sin cambios: {motivo}")
+    return {
+        "modelo": joblib.load(ruta_pkl),
+        "metricas": metadatos.get("metricas"),
+        "ruta_modelo": ruta_pkl,
+        "registros": metadatos.get("registros"),
+        "hash_datos": metadatos.get("hash_datos"),
+        "busqueda": None,
+        "tiempos": cronometro.tiempos(),
+        "actualizacion": {"modo": "sin_cambios", "motivo": motivo}
+    }
@@ -0,0 +1,112 @@
+import json
+import os
+import time
+
+import numpy as np
+from sklearn.model_selection import GridSearchCV, RandomizedSearchCV, TimeSeriesSplit
+
+# Búsqueda de hiperparámetros con validación cruzada temporal para GradientBoosting.py.
+# Cada pliegue de TimeSeriesSplit entrena con las ventanas anteriores y evalúa con las
+# siguientes, sin mezclar pasado y futuro como hace train_test_split con shuffle.
+# Estrategias:
+#   grid       todas las combinaciones de ESPACIOS_BUSQUEDA
+#   aleatoria  "iteraciones" combinaciones al azar
+#   halving    reducción sucesiva: todas las combinaciones con pocos árboles y solo las
+#              mejores con más (recurso n_estimators o max_iter según el motor)
+# Las ventanas se construyen una sola vez; los pliegues son índices sobre el mismo arreglo y
+# joblib lo comparte con los procesos por memoria mapeada en lugar de copiarlo a cada uno.
+
+ESTRATEGIAS = ("grid", "aleatoria", "halving")
+
+ESPACIOS_BUSQUEDA = {
+    "clasico": {
+        "n_estimators": [50, 100, 150, 200, 300],
+        "learning_rate": [0.02, 0.05, 0.1, 0.2],
+        "max_depth": [2, 3, 4, 5]
+    },
+    "histograma": {
+        "learning_rate": [0.05, 0.1, 0.2],
+        "max_depth": [3, 5, None],
+        "max_leaf_nodes": [15, 31],
+        "l2_regularization": [0.0, 1.0]
+    }
+}
+RECURSO_HALVING = {"clasico": "n_estimators", "histograma": "max_iter"}
+RECURSO_MINIMO = 25
+FACTOR_HALVING = 3
+FILAS_RANKING = 10
+
+def metrica_busqueda(tipo_modelo):
+    return "accuracy" if tipo_modelo == "clasificacion" else "r2"
+
+def crear_busqueda(estimador, tipo_modelo, motor, estrategia, pliegues=5, iteraciones=20, procesos=-1):
+    """Objeto de búsqueda de scikit-learn sin ajustar"""
+    if estrategia not in ESTRATEGIAS:
+        raise ValueError(f"Estrategia inválida: {estrategia}. Use {', '.join(ESTRATEGIAS)}")
+    # En el predictivo directo (MultiOutputRegressor) los hiperparámetros son del regresor interno
+    prefijo = "estimator__" if "estimator" in estimador.get_params(deep=False) else ""
+    espacio = {prefijo + clave: valores for clave, valores in ESPACIOS_BUSQUEDA[motor].items()}
+    comunes = {"cv": TimeSeriesSplit(n_splits=pliegues), "scoring": metrica_busqueda(tipo_modelo),
+               "n_jobs": procesos, "refit": True}
+
+    if estrategia == "grid":
+        return GridSearchCV(estimador, espacio, **comunes)
+    if estrategia == "aleatoria":
+        return RandomizedSearchCV(estimador, espacio, n_iter=iteraciones, random_state=42, **comunes)
+
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+    from sklearn.model_selection import HalvingGridSearchCV
+    recurso = prefijo + RECURSO_HALVING[motor]
+    maximo = max(espacio.pop(recurso, [estimador.get_params()[recurso]]))
+    return HalvingGridSearchCV(estimador, espacio, resource=recurso, max_resources=maximo,
+                               min_resources=min(RECURSO_MINIMO, maximo), factor=FACTOR_HALVING,
+                               random_state=42, **comunes)
+
+def buscar_hiperparametros(estimador, X, y, tipo_modelo, motor="clasico", estrategia="aleatoria",
+                           pliegues=5, iteraciones=20, procesos=-1):
+    """Ajusta la búsqueda; devuelve el mejor estimador (reentrenado con todo X) y el reporte"""
+    # Una copia contigua: sliding_window_view es una vista que cada pliegue volvería a copiar
+    X = np.ascontiguousarray(X)
+    busqueda = crear_busqueda(estimador, tipo_modelo, motor, estrategia, pliegues, iteraciones, procesos)
+    inicio = time.perf_counter()
+    busqueda.fit(X, y)
+    tiempo = time.perf_counter() - inicio
+    return busqueda.best_estimator_, reporte_busqueda(busqueda, tipo_modelo, motor, estrategia, pliegues, procesos, tiempo)
+
+def reporte_busqueda(busqueda, tipo_modelo, motor, estrategia, pliegues, procesos, tiempo):
+    resultados = busqueda.cv_results_
+    orden = np.argsort(resultados["rank_test_score"], kind="stable")[:FILAS_RANKING]
+    ranking = [{
+        "parametros": {clave: valor for clave, valor in resultados["params"][i].items()},
+        "puntaje_medio": round(float(resultados["mean_test_score"][i]), 4),
+        "desviacion": round(float(resultados["std_test_score"][i]), 4),
+        "ajuste_medio_s": round(float(resultados["mean_fit_time"][i]), 4)
+    } for i in orden]
+    reporte = {
+        "estrategia": estrategia,
+        "motor": motor,
+        "metrica": metrica_busqueda(tipo_modelo),
+        "pliegues": pliegues,
+        "candidatos": len(resultados["params"]),
+        "procesos": procesos,
+        "mejores_parametros": busqueda.best_params_,
+        "mejor_puntaje_cv": round(float(busqueda.best_score_), 4),
+        "ranking": ranking,
+        "tiempo_s": round(tiempo, 3)
+    }
+    if hasattr(busqueda, "n_resources_"):
+        reporte["recursos_por_iteracion"] = [int(n) for n in busqueda.n_resources_]
+        reporte["candidatos_por_iteracion"] = [int(n) for n in busqueda.n_candidates_]
+    return reporte
+
+def ruta_reporte(ruta_pkl):
+    """{usuario}_{nombre}_{tipo}.busqueda.json junto al .pkl"""
+    return ruta_pkl[:-len(".pkl")] + ".busqueda.json"
+
+def guardar_reporte(reporte, ruta_pkl):
+    ruta = ruta_reporte(ruta_pkl)
+    temporal = f"{ruta}.tmp-{os.getpid()}"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(reporte, archivo, indent=2, ensure_ascii=False, default=str)
+    os.replace(temporal, ruta)
+    return ruta
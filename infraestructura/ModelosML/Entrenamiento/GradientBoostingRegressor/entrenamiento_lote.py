@@ -0,0 +1,202 @@
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+dir_actual = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, dir_actual)
+sys.path.insert(0, os.path.join(dir_actual, "..", ".."))
+
+from Compartido.formato_modelo import artefacto_vigente, leer_meta
+from Compartido.registro_modelos import ruta_modelo
+from fuentes_datos import COLUMNA_POR_DEFECTO, hash_archivo
+
+# Entrenamiento por lotes no interactivo.
+# Lee un manifiesto (JSON, CSV o YAML) con un trabajo por modelo:
+#   usuario_id, nombre_modelo, tipo (predictivo|optimizacion|clasificacion), archivo,
+#   [columna], [motor (clasico|histograma)], [hilos], [busqueda (grid|aleatoria|halving)],
+#   [horizonte (solo predictivo: variante directa con ese número de pasos)],
+#   [incremental (true: si el modelo existe, extenderlo solo con los datos nuevos)],
+#   [compacto (true: artefacto en float32, ver Compartido/formato_modelo.py)]
+# y entrena los trabajos en paralelo en un pool de procesos. Cada trabajo escribe su salida
+# en un log propio; un fallo no detiene a los demás. Los modelos cuyo artefacto ya registra
+# el mismo hash de datos, columna y motor se omiten. La búsqueda de hiperparámetros de cada
+# trabajo usa un solo proceso: el paralelismo ya está en el pool de trabajos. Por lo mismo,
+# con más de un proceso los trabajos sin hilos usan núcleos // procesos hilos de OpenMP (motor
+# histograma) en lugar de todos los núcleos cada uno.
+# Uso: python entrenamiento_lote.py manifiesto.json [--procesos 4] [--reporte reporte.json] [--forzar]
+#                                    [--compacto]   (compacto en todos los trabajos)
+
+TIPOS_VALIDOS = ("predictivo", "optimizacion", "clasificacion")
+MOTORES_VALIDOS = ("clasico", "histograma")
+ESTRATEGIAS_VALIDAS = ("grid", "aleatoria", "halving")
+
+def leer_manifiesto(ruta, compacto=False):
+    """Lista de trabajos; las rutas de archivo se resuelven respecto al manifiesto"""
+    extension = os.path.splitext(ruta)[1].lower()
+    with open(ruta, encoding="utf-8") as archivo:
+        if extension == ".json":
+            contenido = json.load(archivo)
+        elif extension == ".csv":
+            contenido = list(csv.DictReader(archivo))
+        elif extension in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise Exception("Se necesita PyYAML para leer manifiestos .yaml")
+            contenido = yaml.safe_load(archivo)
+        else:
+            raise Exception(f"Formato de manifiesto no soportado: {extension}")
+
+    trabajos = contenido.get("trabajos", []) if isinstance(contenido, dict) else contenido
+    carpeta = os.path.dirname(os.path.abspath(ruta))
+    normalizados = []
+    for indice, trabajo in enumerate(trabajos):
+        faltantes = [campo for campo in ("usuario_id", "nombre_modelo", "tipo", "archivo") if not trabajo.get(campo)]
+        if faltantes:
+            raise Exception(f"Trabajo {indice}: faltan campos {', '.join(faltantes)}")
+        tipo = str(trabajo["tipo"]).lower()
+        if tipo not in TIPOS_VALIDOS:
+            raise Exception(f"Trabajo {indice}: tipo inválido '{trabajo['tipo']}'")
+        motor = str(trabajo.get("motor") or "clasico").lower()
+        if motor not in MOTORES_VALIDOS:
+            raise Exception(f"Trabajo {indice}: motor inválido '{trabajo['motor']}'")
+        busqueda = str(trabajo.get("busqueda") or "").lower() or None
+        if busqueda is not None and busqueda not in ESTRATEGIAS_VALIDAS:
+            raise Exception(f"Trabajo {indice}: búsqueda inválida '{trabajo['busqueda']}'")
+        horizonte = int(trabajo["horizonte"]) if trabajo.get("horizonte") else None
+        if horizonte is not None and (tipo != "predictivo" or horizonte < 1):
+            raise Exception(f"Trabajo {indice}: horizonte inválido '{trabajo['horizonte']}' para tipo {tipo}")
+        normalizados.append({
+            "usuario_id": str(trabajo["usuario_id"]),
+            "nombre_modelo": str(trabajo["nombre_modelo"]),
+            "tipo": tipo,
+            "archivo": os.path.join(carpeta, trabajo["archivo"]),
+            "columna": trabajo.get("columna") or COLUMNA_POR_DEFECTO,
+            "motor": motor,
+            "hilos": int(trabajo["hilos"]) if trabajo.get("hilos") else None,
+            "busqueda": busqueda,
+            "horizonte": horizonte,
+            "incremental": str(trabajo.get("incremental") or "").lower() in ("1", "true", "si", "sí"),
+            "compacto": compacto or str(trabajo.get("compacto") or "").lower() in ("1", "true", "si", "sí")
+        })
+    return normalizados
+
+def esta_actualizado(trabajo, hash_datos):
+    """True si el artefacto existente se entrenó con los mismos datos, columna, motor, búsqueda, horizonte y formato"""
+    ruta_pkl = ruta_modelo(trabajo["usuario_id"], trabajo["nombre_modelo"], trabajo["tipo"])
+    ruta_artefacto = artefacto_vigente(ruta_pkl)
+    if not ruta_artefacto:
+        return False
+    try:
+        metadatos = leer_meta(ruta_artefacto).get("metadatos", {})
+    except (OSError, ValueError):
+        return False
+    return (metadatos.get("hash_datos") == hash_datos
+            and metadatos.get("columna") == trabajo["columna"]
+            and metadatos.get("motor", "clasico") == trabajo["motor"]
+            and bool(metadatos.get("hiperparametros")) == bool(trabajo["busqueda"])
+            and metadatos.get("horizonte") == trabajo["horizonte"]
+            and ("compacto" in metadatos) == trabajo["compacto"])
+
+def ejecutar_trabajo(trabajo, carpeta_logs, forzar=False):
+    """Entrena un trabajo en el proceso actual; nunca lanza excepciones"""
+    inicio = time.perf_counter()
+    resultado = dict(trabajo)
+    nombre_log = f"{trabajo['usuario_id']}_{trabajo['nombre_modelo']}_{trabajo['tipo']}.log"
+    resultado["log"] = os.path.join(carpeta_logs, nombre_log)
+    try:
+        if not os.path.isfile(trabajo["archivo"]):
+            raise Exception(f"Archivo de datos no encontrado: {trabajo['archivo']}")
+        hash_datos = hash_archivo(trabajo["archivo"])
+        if not forzar and esta_actualizado(trabajo, hash_datos):
+            resultado["estado"] = "omitido"
+        else:
+            # Importar aquí para que cada proceso del pool cargue sklearn una sola vez
+            from GradientBoosting import entrenar_modelo_detallado
+
+            with open(resultado["log"], "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+                detalle = entrenar_modelo_detallado(
+                    trabajo["archivo"], trabajo["usuario_id"], trabajo["nombre_modelo"],
+                    trabajo["tipo"], trabajo["columna"], permitir_simulados=False,
+                    motor=trabajo["motor"], hilos=trabajo["hilos"],
+                    busqueda={"estrategia": trabajo["busqueda"], "procesos": 1} if trabajo["busqueda"] else None,
+                    horizonte=trabajo["horizonte"], incremental=trabajo["incremental"],
+                    compacto=trabajo["compacto"]
+                )
+            modo = detalle.get("actualizacion", {}).get("modo", "completo")
+            resultado.update({
+                "estado": {"incremental": "actualizado", "sin_cambios": "omitido"}.get(modo, "entrenado"),
+                "metricas": detalle["metricas"],
+                "registros": detalle["registros"],
+                "ruta_modelo": detalle["ruta_modelo"],
+                "tiempos": detalle["tiempos"]
+            })
+            if "actualizacion" in detalle:
+                resultado["actualizacion"] = detalle["actualizacion"]
+            if detalle["busqueda"]:
+                resultado["busqueda"] = {clave: detalle["busqueda"][clave]
+                                         for clave in ("mejores_parametros", "mejor_puntaje_cv", "candidatos", "tiempo_s")}
+    except Exception as e:
+        resultado["estado"] = "error"
+        resultado["error"] = str(e)
+        resultado["traza"] = traceback.format_exc()
+    resultado["tiempo_s"] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+def entrenar_lote(trabajos, procesos=None, carpeta_logs="LogsLote", forzar=False):
+    """Entrena todos los trabajos en paralelo y devuelve el resumen"""
+    os.makedirs(carpeta_logs, exist_ok=True)
+    nucleos = os.cpu_count() or 1
+    procesos = max(1, min(procesos or nucleos, len(trabajos) or 1))
+    if procesos > 1:
+        hilos = max(1, nucleos // procesos)
+        trabajos = [dict(trabajo, hilos=hilos) if trabajo["hilos"] is None else trabajo for trabajo in trabajos]
+    inicio = time.perf_counter()
+    resultados = []
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = [pool.submit(ejecutar_trabajo, trabajo, carpeta_logs, forzar) for trabajo in trabajos]
+        for futuro in as_completed(futuros):
+            resultado = futuro.result()
+            print(f" [{resultado['estado']:>9}] {resultado['usuario_id']}_{resultado['nombre_modelo']}_{resultado['tipo']}"
+                  f" ({resultado['tiempo_s']} s) {resultado.get('metricas') or resultado.get('error') or ''}")
+            resultados.append(resultado)
+
+    conteo = {estado: sum(1 for r in resultados if r["estado"] == estado) for estado in ("entrenado", "actualizado", "omitido", "error")}
+    return {
+        "procesos": procesos,
+        "tiempo_total_s": round(time.perf_counter() - inicio, 3),
+        "resumen": conteo,
+        "trabajos": resultados
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entrenamiento por lotes de modelos ML")
+    parser.add_argument("manifiesto", help="Archivo .json, .csv o .yaml con los trabajos")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos en paralelo (por defecto, núcleos disponibles)")
+    parser.add_argument("--reporte", default="reporte_lote.json", help="Ruta del reporte JSON")
+    parser.add_argument("--logs", default="LogsLote", help="Carpeta para los logs de cada trabajo")
+    parser.add_argument("--forzar", action="store_true", help="Reentrenar aunque el modelo esté actualizado")
+    parser.add_argument("--compacto", action="store_true", help="Artefactos compactos (float32) en todos los trabajos")
+    args = parser.parse_args()
+
+    try:
+        trabajos = leer_manifiesto(args.manifiesto, args.compacto)
+    except Exception as e:
+        print(f" Error leyendo el manifiesto: {e}")
+        sys.exit(1)
+
+    print(f" ENTRENAMIENTO POR LOTES - {len(trabajos)} trabajos")
+    reporte = entrenar_lote(trabajos, args.procesos, args.logs, args.forzar)
+    with open(args.reporte, "w", encoding="utf-8") as archivo:
+        json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+
+    print(f"\n Entrenados: {reporte['resumen']['entrenado']} | Actualizados: {reporte['resumen']['actualizado']} | Omitidos: {reporte['resumen']['omitido']}"
+          f" | Errores: {reporte['resumen']['error']} | Tiempo total: {reporte['tiempo_total_s']} s")
+    print(f" Reporte: {args.reporte}")
+    sys.exit(1 if reporte["resumen"]["error"] else 0)
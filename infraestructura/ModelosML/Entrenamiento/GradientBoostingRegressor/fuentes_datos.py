@@ -0,0 +1,134 @@
+import array
+import hashlib
+import os
+import re
+
+import numpy as np
+
+# Capa de fuentes de datos para el entrenamiento.
+# Lee una sola columna numérica de archivos CSV, Parquet o Excel por bloques (sin cargar
+# toda la hoja en un DataFrame) y guarda una copia columnar .npy por hash del archivo,
+# de modo que reentrenar con el mismo archivo no vuelve a parsearlo.
+# pandas y openpyxl (.xlsx) están en requirements.txt; pyarrow (.parquet) y xlrd (.xls) son
+# opcionales y solo se importan al leer esos formatos.
+
+COLUMNA_POR_DEFECTO = "Temp1 - °C"
+EXTENSIONES_SOPORTADAS = (".csv", ".parquet", ".xlsx", ".xls")
+TAMANO_BLOQUE = 100_000
+
+dir_actual = os.path.dirname(os.path.abspath(__file__))
+CARPETA_CACHE = os.path.join(dir_actual, "CacheDatos")
+
+def hash_archivo(ruta, tamano_lectura=1 << 20):
+    """SHA-256 del contenido del archivo, leído por bloques"""
+    resumen = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(tamano_lectura), b""):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+def ruta_cache(hash_datos, columna):
+    columna_segura = re.sub(r"[^0-9A-Za-z]+", "_", columna).strip("_")
+    return os.path.join(CARPETA_CACHE, f"{hash_datos[:16]}_{columna_segura}.npy")
+
+def a_numeros(valores):
+    """Convierte una secuencia a float64; lo que no es numérico queda como NaN"""
+    import pandas as pd
+    return pd.to_numeric(pd.Series(valores), errors="coerce").to_numpy(dtype=np.float64)
+
+def leer_csv(ruta, columna, tamano_bloque=TAMANO_BLOQUE):
+    import pandas as pd
+    bloques = pd.read_csv(ruta, usecols=[columna], chunksize=tamano_bloque)
+    partes = [a_numeros(bloque[columna]) for bloque in bloques]
+    return np.concatenate(partes) if partes else np.empty(0)
+
+def leer_parquet(ruta, columna, tamano_bloque=TAMANO_BLOQUE):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        import pandas as pd
+        try:
+            return a_numeros(pd.read_parquet(ruta, columns=[columna])[columna])
+        except ImportError:
+            raise Exception("Se necesita pyarrow para leer archivos .parquet (pip install pyarrow)")
+
+    archivo = pq.ParquetFile(ruta)
+    partes = [
+        a_numeros(lote.column(0).to_numpy(zero_copy_only=False))
+        for lote in archivo.iter_batches(batch_size=tamano_bloque, columns=[columna])
+    ]
+    return np.concatenate(partes) if partes else np.empty(0)
+
+def leer_xlsx(ruta, columna):
+    """Lee la primera hoja fila por fila en modo solo lectura"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise Exception("Se necesita openpyxl para leer archivos .xlsx (pip install -r requirements.txt)")
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        encabezado = next(filas, None) or ()
+        if columna not in encabezado:
+            raise KeyError(f"Columna '{columna}' no encontrada en {os.path.basename(ruta)}")
+        indice = encabezado.index(columna)
+
+        # array('d') guarda floats de 8 bytes contiguos en lugar de objetos de Python
+        valores = array.array("d")
+        for fila in filas:
+            valor = fila[indice] if indice < len(fila) else None
+            if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                valores.append(valor)
+            elif isinstance(valor, str):
+                try:
+                    valores.append(float(valor))
+                except ValueError:
+                    valores.append(np.nan)
+            else:
+                valores.append(np.nan)
+        return np.frombuffer(valores, dtype=np.float64)
+    finally:
+        libro.close()
+
+def leer_xls(ruta, columna):
+    import pandas as pd
+    try:
+        return a_numeros(pd.read_excel(ruta, usecols=[columna])[columna])
+    except ImportError:
+        raise Exception("Se necesita xlrd para leer archivos .xls (pip install xlrd)")
+
+LECTORES = {
+    ".csv": leer_csv,
+    ".parquet": leer_parquet,
+    ".xlsx": leer_xlsx,
+    ".xls": leer_xls
+}
+
+def cargar_serie(ruta, columna=COLUMNA_POR_DEFECTO, usar_cache=True, hash_datos=None):
+    """Serie float64 de la columna indicada sin valores vacíos o no numéricos"""
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension not in LECTORES:
+        raise ValueError(f"Formato no soportado: {extension}. Use {', '.join(EXTENSIONES_SOPORTADAS)}")
+
+    if usar_cache:
+        ruta_npy = ruta_cache(hash_datos or hash_archivo(ruta), columna)
+        if os.path.exists(ruta_npy):
+            return np.load(ruta_npy)
+
+    serie = LECTORES[extension](ruta, columna)
+    serie = serie[~np.isnan(serie)]
+
+    if usar_cache:
+        os.makedirs(CARPETA_CACHE, exist_ok=True)
+        temporal = f"{ruta_npy}.tmp-{os.getpid()}.npy"
+        np.save(temporal, serie)
+        os.replace(temporal, ruta_npy)
+    return serie
+
+def buscar_archivo_datos(carpeta):
+    """Primer archivo de datos soportado en la carpeta, o None"""
+    if not os.path.isdir(carpeta):
+        return None
+    archivos = sorted(f for f in os.listdir(carpeta) if f.lower().endswith(EXTENSIONES_SOPORTADAS))
+    return os.path.join(carpeta, archivos[0]) if archivos else None
@@ -1,82 +1,339 @@
-import numpy as np
+import time
+INICIO_NS = time.perf_counter_ns()  # Antes de las demás importaciones, para medir su costo
+import math
+import os
+import random
 import sys
-import json
-
-def optimizar_simple(parametros):
-    """Optimización simple sin modelo - solo lógica matemática"""
-    
-    # Simulación de optimización: encontrar valores que maximicen una función
-    np.random.seed(42)  # Para resultados consistentes
-    
-    # Calcular estadísticas de entrada
-    promedio = np.mean(parametros)
-    maximo = np.max(parametros)
-    minimo = np.min(parametros)
-    
-    # Simular proceso de optimización
-    valores_optimizados = []
-    
-    for i in range(5):
-        # Estrategia simple: tender hacia el máximo pero con variación
-        factor_mejora = np.random.uniform(1.05, 1.15)  # Mejora del 5-15%
-        valor_optimizado = maximo * factor_mejora + np.random.normal(0, 0.5)
-        valores_optimizados.append(round(valor_optimizado, 3))
-    
-    # Calcular función objetivo (simulada)
-    funcion_objetivo = (promedio / maximo) * np.random.uniform(0.8, 0.95)
-    
-    return {
-        "valores_optimizados": valores_optimizados,
-        "funcion_objetivo": round(funcion_objetivo, 4),
-        "mejora_porcentual": round(((np.mean(valores_optimizados) - promedio) / promedio) * 100, 2),
-        "iteraciones_realizadas": np.random.randint(50, 150),
-        "convergencia": True,
-        "estadisticas_entrada": {
-            "promedio": round(promedio, 2),
-            "maximo": round(maximo, 2),
-            "minimo": round(minimo, 2)
-        }
-    }
 
-if __name__ == "__main__":
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Compartido.entrada_datos import eco_entrada, es_serie, leer_argumentos, leer_valores, silenciar
+from Compartido.formato_modelo import artefacto_vigente, cargar_artefacto
+from Compartido.instrumentacion import Cronometro, activar_perfil, medir, serializar
+from Compartido.registro_modelos import ruta_modelo
+
+N_VALORES = 5  # Los modelos de optimización usan ventanas de 5 valores
+# Sin modelo sustituto y hasta esta cantidad de conjuntos, la búsqueda corre en Python puro
+# sin importar NumPy (el arranque pesa más que la búsqueda)
+UMBRAL_RAPIDO = 4
+ESCALA_32 = 2.0 ** -32
+RAIZ_3 = math.sqrt(3.0)
+
+def cargar_sustituto(usuario_id, nombre_modelo):
+    """Modelo de ModelosOptimizacion que predice el máximo de la siguiente ventana, o None"""
+    ruta = ruta_modelo(usuario_id, nombre_modelo, "optimizacion")
+    ruta_artefacto = artefacto_vigente(ruta)
+    if ruta_artefacto:
+        return cargar_artefacto(ruta_artefacto)
+    if os.path.exists(ruta):
+        import joblib
+        return joblib.load(ruta)
+    return None
+
+def obtener_sustituto(usuario_id, nombre_modelo, registro=None):
+    """Sustituto desde el registro de modelos de un proceso de larga duración, o cargado del disco"""
+    if registro is None:
+        return cargar_sustituto(usuario_id, nombre_modelo)
     try:
-        if len(sys.argv) < 4:
-            raise Exception("Faltan argumentos: usuarioId, nombreModelo y parametros")
-        
-        usuario_id = sys.argv[1]
-        nombre_modelo = sys.argv[2]
-        parametros_str = sys.argv[3]
-        
-        print(f"OPTIMIZADOR SIMPLE - Usuario: {usuario_id}, Algoritmo: {nombre_modelo}")
-        
-        # Parsear parámetros
-        parametros = json.loads(parametros_str.replace('\\"', '"'))
-        
-        if len(parametros) < 2:
-            raise Exception("Se necesitan al menos 2 valores para optimizar")
-        
-        # Optimizar usando lógica simple
-        resultado_optimizacion = optimizar_simple(parametros)
-        
-        # Resultado exitoso
-        respuesta = {
+        return registro.obtener(usuario_id, nombre_modelo, "optimizacion")
+    except FileNotFoundError:
+        return None
+
+def a_vector(parametros):
+    """Últimos 5 valores; si hay menos se repite el primero a la izquierda"""
+    valores = [float(valor) for valor in parametros[-N_VALORES:]]
+    return [valores[0]] * (N_VALORES - len(valores)) + valores
+
+def objetivo_simple(candidato):
+    """Objetivo sin modelo para un candidato: favorecer valores altos y estables"""
+    promedio = sum(candidato) / len(candidato)
+    return promedio - 0.5 * math.sqrt(sum((valor - promedio) * (valor - promedio) for valor in candidato) / len(candidato))
+
+def bytes_aleatorios(rng, n):
+    """4 enteros de 32 bits por cada una de las n normales, del generador del conjunto"""
+    return rng.getrandbits(128 * n).to_bytes(16 * n, "little")
+
+def normales(datos):
+    """Normales aproximadas (suma de 4 uniformes centrada, varianza 1) sin NumPy"""
+    u = [x * ESCALA_32 for x in memoryview(datos).cast("I")]
+    return [(u[i] + u[i + 1] + u[i + 2] + u[i + 3] - 2.0) * RAIZ_3 for i in range(0, len(u), 4)]
+
+class MotorOptimizacion:
+    """Búsqueda por entropía cruzada (CMA-ES con covarianza diagonal) vectorizada por lote.
+
+    En cada iteración se muestrea una población por cada conjunto de parámetros, se evalúan
+    todas las muestras del lote con una sola llamada al objetivo y la distribución se acerca
+    a la élite: media y desviación = suavizado * élite + (1 - suavizado) * anterior, con la
+    desviación nunca menor que sigma_minima * rango para que la búsqueda no colapse antes de
+    tiempo. Un conjunto converge cuando su mejor valor no mejora más de tolerancia * rango
+    durante `paciencia` iteraciones seguidas.
+
+    Cada conjunto sortea con su propio random.Random(semilla): su resultado no depende de los
+    demás conjuntos del lote ni de si corre en Python puro o con NumPy. Los dos caminos toman
+    los mismos bits y hacen las mismas operaciones en el mismo orden.
+    """
+
+    def __init__(self, sustituto=None, iteraciones=100, poblacion=32, fraccion_elite=0.25,
+                 tolerancia=1e-3, suavizado=0.7, sigma_minima=0.05, paciencia=10, semilla=42, cronometro=None):
+        self.sustituto = sustituto
+        self.cronometro = cronometro
+        self.iteraciones = iteraciones
+        self.poblacion = poblacion
+        self.n_elite = max(2, int(poblacion * fraccion_elite))
+        self.tolerancia = tolerancia
+        self.suavizado = suavizado
+        self.sigma_minima = sigma_minima
+        self.paciencia = paciencia
+        self.semilla = semilla
+
+    def objetivo(self, candidatos):
+        """Valor a maximizar para cada fila de candidatos (n, 5)"""
+        import numpy as np
+        with medir(self.cronometro, "evaluacion_objetivo"):
+            if self.sustituto is not None:
+                return np.asarray(self.sustituto.predict(candidatos), dtype=float)
+            # Sin modelo: favorecer valores altos y estables
+            return candidatos.mean(axis=1) - 0.5 * candidatos.std(axis=1)
+
+    def optimizar_lote(self, lista_parametros):
+        """Optimiza varios conjuntos de parámetros a la vez; devuelve un resultado por conjunto"""
+        if self.sustituto is None and len(lista_parametros) <= UMBRAL_RAPIDO:
+            return [self._optimizar_simple(parametros) for parametros in lista_parametros]
+
+        import numpy as np
+        inicio = time.perf_counter()
+
+        entradas = np.array([a_vector(p) for p in lista_parametros])
+        n_items, dimension = entradas.shape
+        inferior = entradas.min(axis=1, keepdims=True).repeat(dimension, axis=1)
+        maximo = entradas.max(axis=1, keepdims=True).repeat(dimension, axis=1)
+        superior = maximo + 0.15 * np.abs(maximo)  # Hasta 15% sobre el máximo, también si es negativo
+        rango = np.maximum(superior - inferior, 1e-9)
+
+        media = entradas.copy()
+        sigma = rango / 4
+        mejor_valor = self.objetivo(entradas)
+        mejor_candidato = entradas.copy()
+        iteraciones = np.zeros(n_items, dtype=int)
+        sin_mejora = np.zeros(n_items, dtype=int)
+        umbral_mejora = self.tolerancia * rango[:, 0]
+        activos = np.ones(n_items, dtype=bool)
+        tiempo_convergencia = np.zeros(n_items)
+        generadores = [random.Random(self.semilla) for _ in range(n_items)]
+        n_normales = self.poblacion * dimension
+
+        for _ in range(self.iteraciones):
+            indices = np.flatnonzero(activos)
+            if len(indices) == 0:
+                break
+
+            bits = b"".join(bytes_aleatorios(generadores[i], n_normales) for i in indices)
+            u = (np.frombuffer(bits, dtype="<u4") * ESCALA_32).reshape(len(indices), self.poblacion, dimension, 4)
+            z = (u[..., 0] + u[..., 1] + u[..., 2] + u[..., 3] - 2.0) * RAIZ_3
+            muestras = media[indices, None, :] + sigma[indices, None, :] * z
+            muestras = np.clip(muestras, inferior[indices, None, :], superior[indices, None, :])
+            puntajes = self.objetivo(muestras.reshape(-1, dimension)).reshape(len(indices), self.poblacion)
+
+            orden = np.argsort(-puntajes, axis=1, kind="stable")[:, :self.n_elite]
+            elite = np.take_along_axis(muestras, orden[:, :, None], axis=1)
+            mejor_iteracion = puntajes[np.arange(len(indices)), orden[:, 0]]
+
+            significativa = mejor_iteracion > mejor_valor[indices] + umbral_mejora[indices]
+            sin_mejora[indices] = np.where(significativa, 0, sin_mejora[indices] + 1)
+            mejora = mejor_iteracion > mejor_valor[indices]
+            mejor_valor[indices[mejora]] = mejor_iteracion[mejora]
+            mejor_candidato[indices[mejora]] = elite[mejora, 0]
+
+            a = self.suavizado
+            media[indices] = a * elite.mean(axis=1) + (1 - a) * media[indices]
+            sigma[indices] = np.maximum(a * elite.std(axis=1) + (1 - a) * sigma[indices],
+                                        self.sigma_minima * rango[indices])
+            iteraciones[indices] += 1
+
+            convergidos = sin_mejora[indices] >= self.paciencia
+            activos[indices[convergidos]] = False
+            tiempo_convergencia[indices[convergidos]] = time.perf_counter() - inicio
+
+        tiempo_convergencia[activos] = time.perf_counter() - inicio
+        return [
+            self._resumen(lista_parametros[i], mejor_candidato[i], mejor_valor[i], iteraciones[i],
+                          not activos[i], tiempo_convergencia[i])
+            for i in range(n_items)
+        ]
+
+    def _optimizar_simple(self, parametros):
+        """La misma búsqueda para un conjunto, con random y listas en lugar de NumPy"""
+        inicio = time.perf_counter()
+        rng = random.Random(self.semilla)
+        entrada = a_vector(parametros)
+        inferior = min(entrada)
+        superior = max(entrada) + 0.15 * abs(max(entrada))  # Hasta 15% sobre el máximo, también si es negativo
+        rango = max(superior - inferior, 1e-9)
+
+        media = list(entrada)
+        sigma = [rango / 4] * len(entrada)
+        mejor_valor = objetivo_simple(entrada)
+        mejor_candidato = list(entrada)
+        iteraciones = 0
+        sin_mejora = 0
+        convergencia = False
+
+        for _ in range(self.iteraciones):
+            z = normales(bytes_aleatorios(rng, self.poblacion * len(entrada)))
+            muestras = [
+                [min(max(m + s * z[j * len(entrada) + k], inferior), superior) for k, (m, s) in enumerate(zip(media, sigma))]
+                for j in range(self.poblacion)
+            ]
+            with medir(self.cronometro, "evaluacion_objetivo"):
+                puntajes = [objetivo_simple(muestra) for muestra in muestras]
+            orden = sorted(range(self.poblacion), key=lambda i: -puntajes[i])[:self.n_elite]
+            elite = [muestras[i] for i in orden]
+            sin_mejora = 0 if puntajes[orden[0]] > mejor_valor + self.tolerancia * rango else sin_mejora + 1
+            if puntajes[orden[0]] > mejor_valor:
+                mejor_valor = puntajes[orden[0]]
+                mejor_candidato = elite[0]
+
+            a = self.suavizado
+            columnas = list(zip(*elite))
+            media_elite = [sum(columna) / self.n_elite for columna in columnas]
+            sigma_elite = [math.sqrt(sum((v - m) * (v - m) for v in columna) / self.n_elite)
+                           for columna, m in zip(columnas, media_elite)]
+            media = [a * me + (1 - a) * m for me, m in zip(media_elite, media)]
+            sigma = [max(a * se + (1 - a) * s, self.sigma_minima * rango) for se, s in zip(sigma_elite, sigma)]
+            iteraciones += 1
+            if sin_mejora >= self.paciencia:
+                convergencia = True
+                break
+
+        return self._resumen(parametros, mejor_candidato, mejor_valor, iteraciones, convergencia,
+                             time.perf_counter() - inicio)
+
+    def optimizar(self, parametros):
+        return self.optimizar_lote([parametros])[0]
+
+    def _resumen(self, entrada, candidato, valor, iteraciones, convergencia, tiempo):
+        # Estadísticas de todos los valores recibidos; a_vector solo define el espacio de búsqueda
+        if hasattr(entrada, "mean"):
+            # Arreglo de una entrada binaria: estadísticas sin convertir cada valor
+            promedio, maximo, minimo = float(entrada.mean()), float(entrada.max()), float(entrada.min())
+        else:
+            if isinstance(entrada, list):
+                entrada = [float(v) for v in entrada]
+            promedio = sum(entrada) / len(entrada)
+            maximo = max(entrada)
+            minimo = min(entrada)
+        valores_optimizados = [round(float(v), 3) for v in candidato]
+        promedio_optimizado = sum(valores_optimizados) / len(valores_optimizados)
+        return {
+            "valores_optimizados": valores_optimizados,
+            "funcion_objetivo": round(float(valor), 4),
+            "mejora_porcentual": round(((promedio_optimizado - promedio) / promedio) * 100, 2) if promedio else 0.0,
+            "iteraciones_realizadas": int(iteraciones),
+            "convergencia": bool(convergencia),
+            "tiempo_convergencia": round(float(tiempo), 4),
+            "estadisticas_entrada": {
+                "promedio": round(promedio, 2),
+                "maximo": round(maximo, 2),
+                "minimo": round(minimo, 2)
+            }
+        }
+
+def optimizar_simple(parametros, iteraciones=100):
+    """Optimización sin modelo - solo función matemática"""
+    return MotorOptimizacion(iteraciones=iteraciones).optimizar(parametros)
+
+def es_lote(parametros):
+    """Un lote es una lista de conjuntos o un diccionario nombre -> conjunto"""
+    if isinstance(parametros, dict):
+        return True
+    return len(parametros) > 0 and all(es_serie(p) for p in parametros)
+
+def ejecutar_optimizacion(usuario_id, nombre_modelo, parametros, iteraciones=100, registro=None, cronometro=None):
+    """Carga el sustituto, optimiza una lista de valores o un lote y arma la respuesta"""
+    if isinstance(parametros, dict):
+        variables, lista_parametros = list(parametros.keys()), list(parametros.values())
+    else:
+        lista_parametros = parametros if es_lote(parametros) else [parametros]
+        variables = [None] * len(lista_parametros)
+    if any(len(p) < 2 for p in lista_parametros):
+        raise Exception("Se necesitan al menos 2 valores para optimizar")
+    if cronometro is not None:
+        cronometro.marcar("parseo_argumentos")
+
+    with medir(cronometro, "carga_modelo"):
+        sustituto = obtener_sustituto(usuario_id, nombre_modelo, registro)
+    motor = MotorOptimizacion(sustituto, iteraciones=iteraciones, cronometro=cronometro)
+    mensaje = ("Optimización por entropía cruzada sobre el modelo sustituto" if sustituto is not None
+               else "Optimización por entropía cruzada sobre función matemática (sin modelo)")
+
+    with medir(cronometro, "optimizacion"):
+        optimizados = motor.optimizar_lote(lista_parametros)
+    resultados = [
+        {
             "success": True,
             "tipo": "optimizacion",
             "usuario_id": usuario_id,
             "nombre_modelo": nombre_modelo,
             "optimizacion": resultado_optimizacion,
-            "parametros_entrada": parametros,
-            "mensaje": "Optimización realizada con algoritmo matemático simple"
+            "parametros_entrada": eco_entrada(entrada),
+            "mensaje": mensaje
         }
-        print(json.dumps(respuesta))
-        
-    except Exception as e:
-        respuesta = {
-            "success": False,
+        for entrada, resultado_optimizacion in zip(lista_parametros, optimizados)
+    ]
+    for variable, resultado in zip(variables, resultados):
+        if variable is not None:
+            resultado["variable"] = variable
+
+    if es_lote(parametros):
+        return {
+            "success": True,
             "tipo": "optimizacion",
-            "error": str(e),
-            "usuario_id": usuario_id if 'usuario_id' in locals() else None,
-            "nombre_modelo": nombre_modelo if 'nombre_modelo' in locals() else None
+            "usuario_id": usuario_id,
+            "nombre_modelo": nombre_modelo,
+            "lote": True,
+            "resultados": resultados
         }
-        print(json.dumps(respuesta))
-        sys.exit(1)
\ No newline at end of file
+    return resultados[0]
+
+def respuesta_error(error, usuario_id=None, nombre_modelo=None):
+    return {
+        "success": False,
+        "tipo": "optimizacion",
+        "error": str(error),
+        "usuario_id": usuario_id,
+        "nombre_modelo": nombre_modelo
+    }
+
+if __name__ == "__main__":
+    cronometro = Cronometro(INICIO_NS)
+    cronometro.marcar("importaciones")
+    activar_perfil("optimizador")
+    salida = sys.stdout
+    try:
+        argumentos, silencioso, formato = leer_argumentos(sys.argv[1:])
+        if silencioso:
+            salida = silenciar()
+        if len(argumentos) < 3:
+            raise Exception("Faltan argumentos: usuarioId, nombreModelo y parametros")
+
+        usuario_id = argumentos[0]
+        nombre_modelo = argumentos[1]
+        # Presupuesto de iteraciones opcional
+        iteraciones = int(argumentos[3]) if len(argumentos) > 3 else 100
+
+        print(f"OPTIMIZADOR - Usuario: {usuario_id}, Algoritmo: {nombre_modelo}")
+
+        # Parámetros (JSON, "-" para stdin o "@ruta"): una lista de valores, o un lote
+        # (lista de listas o diccionario nombre -> lista)
+        parametros = leer_valores(argumentos[2], formato)
+        respuesta = ejecutar_optimizacion(usuario_id, nombre_modelo, parametros, iteraciones, cronometro=cronometro)
+        print(serializar(respuesta, cronometro), file=salida)
+
+    except Exception as e:
+        respuesta = respuesta_error(
+            e,
+            usuario_id if 'usuario_id' in locals() else None,
+            nombre_modelo if 'nombre_modelo' in locals() else None
+        )
+        print(serializar(respuesta, cronometro), file=salida)
+        sys.exit(1)
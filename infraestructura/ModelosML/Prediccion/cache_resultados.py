@@ -0,0 +1,105 @@
+import array
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from Compartido.formato_modelo import ARCHIVO_META, artefacto_vigente
+
+# Cache de pronósticos para procesos de larga duración (servidor y predicción continua).
+# Clave: hash de la identidad del archivo del modelo (ruta, mtime, tamaño; más los del meta.json
+# del artefacto .modelo/ si es el que se evalúa) y de la ventana de entrada de 5 valores.
+# n_pasos no forma parte de la clave: se guarda el horizonte más largo calculado y una petición
+# con menos pasos usa su prefijo, que es idéntico porque la predicción recursiva solo depende
+# de la ventana.
+
+def identidad_modelo(ruta):
+    """(ruta, mtime_ns, tamaño) del .pkl, más mtime_ns y tamaño del meta.json del artefacto vigente.
+
+    Cambia cuando se reentrena el modelo o se vuelve a exportar el artefacto. None si no existe.
+    """
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        return None
+    identidad = (ruta, estado.st_mtime_ns, estado.st_size)
+    artefacto = artefacto_vigente(ruta)
+    if artefacto:
+        try:
+            meta = os.stat(os.path.join(artefacto, ARCHIVO_META))
+        except OSError:
+            return identidad
+        identidad += (meta.st_mtime_ns, meta.st_size)
+    return identidad
+
+class EntradaCache:
+    def __init__(self, predicciones, tiempo_calculo):
+        self.predicciones = predicciones
+        self.tiempo_calculo = tiempo_calculo
+        self.creado = time.monotonic()
+
+class CacheResultados:
+    """Cache LRU de pronósticos con límite de entradas y TTL"""
+
+    def __init__(self, max_entradas=10000, ttl=300.0):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.tiempo_ahorrado = 0.0
+
+    @staticmethod
+    def clave(identidad, ventana):
+        resumen = hashlib.blake2b(repr(identidad).encode("utf-8"), digest_size=16)
+        # Mismos bytes que un arreglo float64 de NumPy, sin importarlo
+        resumen.update(array.array("d", (float(valor) for valor in ventana)).tobytes())
+        return resumen.hexdigest()
+
+    def obtener(self, clave, n_pasos):
+        """(primeros n_pasos del pronóstico, tiempo ahorrado), o None si no hay uno vigente con ese horizonte"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and self.ttl is not None and time.monotonic() - entrada.creado > self.ttl:
+                del self._entradas[clave]
+                entrada = None
+            if entrada is None or len(entrada.predicciones) < n_pasos:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            # Tiempo que habría costado calcular n_pasos, proporcional al cálculo original
+            ahorrado = entrada.tiempo_calculo * n_pasos / len(entrada.predicciones)
+            self.tiempo_ahorrado += ahorrado
+            return entrada.predicciones[:n_pasos], ahorrado
+
+    def guardar(self, clave, predicciones, tiempo_calculo):
+        """Guarda el pronóstico salvo que ya exista uno vigente con un horizonte mayor"""
+        with self._lock:
+            actual = self._entradas.get(clave)
+            if actual is not None and len(actual.predicciones) > len(predicciones):
+                return
+            self._entradas[clave] = EntradaCache(list(predicciones), tiempo_calculo)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+                "tiempo_ahorrado": round(self.tiempo_ahorrado, 4)
+            }
+
+    def __len__(self):
+        return len(self._entradas)
@@ -0,0 +1,366 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Compartido.entrada_datos import validar_valores
+from Compartido.instrumentacion import Cronometro, activar_perfil, medir
+from Compartido.registro_modelos import RegistroModelos
+from cache_resultados import CacheResultados
+from predictor import cargar_modelo, predecir_series, respuesta_error
+
+# Predicción continua a partir de lecturas individuales.
+# En lugar de reenviar la lista completa de valores en cada intervalo, se mantiene un buffer
+# circular con los últimos valores de cada (usuario, modelo, variable) y cada lectura nueva
+# produce el pronóstico de n pasos actualizado.
+# Protocolo: un mensaje JSON por línea (stdin, socket TCP o archivo de repetición).
+#   {"usuario_id": "...", "nombre_modelo": "...", "variable": "Temp1", "valor": 21.3, "n_pasos": 7}
+#   {"usuario_id": "...", "nombre_modelo": "...", "lecturas": {"Temp1": 21.3, "Temp2": 19.8}}
+#   {"usuario_id": "...", "nombre_modelo": "...", "variable": "Temp1", "valores": [...]}  (historial)
+#   {"operacion": "estadisticas"} | {"operacion": "reiniciar", "usuario_id": ..., ["nombre_modelo"]}
+# Respuesta: "predicciones" por variable; mientras el buffer no tiene 5 valores se informa
+# "lecturas_faltantes" en lugar del pronóstico. Con cache, se agregan sus metadatos en "cache".
+# Un mensaje con algún valor no numérico o no finito (NaN, infinito) se responde con un error
+# y no modifica ningún buffer.
+# Uso:
+#   python prediccion_continua.py                                   (stdin/stdout)
+#   python prediccion_continua.py --puerto 7070                     (socket TCP, JSON por línea)
+#   python prediccion_continua.py --reproducir lecturas.jsonl --usuario U --modelo M
+#   python prediccion_continua.py --mqtt broker:1883 --topico sensores/sala --usuario U --modelo M
+
+N_VALORES = 5  # Los modelos predictivos usan ventanas de 5 valores
+
+class BufferCircular:
+    """Últimos `capacidad` valores en un arreglo de NumPy de tamaño fijo.
+
+    Cada valor se escribe dos veces (posición i y i + capacidad), así los últimos
+    valores siempre forman una vista contigua sin copiar ni reordenar.
+    """
+
+    def __init__(self, capacidad=N_VALORES):
+        self.capacidad = capacidad
+        self._datos = np.zeros(2 * capacidad)
+        self._posicion = 0
+        self.total = 0
+
+    def agregar(self, valor):
+        self._datos[self._posicion] = self._datos[self._posicion + self.capacidad] = valor
+        self._posicion = (self._posicion + 1) % self.capacidad
+        self.total += 1
+
+    def extender(self, valores):
+        for valor in valores[-self.capacidad:]:
+            self.agregar(valor)
+        self.total += max(0, len(valores) - self.capacidad)
+
+    def ultimos(self, n=N_VALORES):
+        """Vista de los últimos n valores (n <= capacidad), del más antiguo al más reciente"""
+        fin = self._posicion + self.capacidad
+        return self._datos[fin - n:fin]
+
+    def __len__(self):
+        return min(self.total, self.capacidad)
+
+def como_numeros(valores):
+    """Valores convertidos a float; una excepción si alguno no es numérico o no es finito"""
+    numeros = []
+    for valor in valores:
+        try:
+            numeros.append(float(valor))
+        except (TypeError, ValueError):
+            raise Exception(f"Valor no numérico en la entrada: {json.dumps(valor)}")
+    return validar_valores(numeros)
+
+def lecturas_desde_carga(carga):
+    """Convierte la carga de un mensaje MQTT ({"Temp1": 21.3, "timestamp": ...}) en lecturas numéricas"""
+    if isinstance(carga, (bytes, bytearray)):
+        carga = carga.decode("utf-8")
+    if isinstance(carga, str):
+        carga = json.loads(carga)
+    if isinstance(carga, (int, float)) and not isinstance(carga, bool):
+        return {"valor": float(carga)}
+    if not isinstance(carga, dict):
+        raise ValueError("La carga debe ser un objeto JSON o un número")
+    lecturas = {}
+    for variable, valor in carga.items():
+        if variable == "timestamp" or isinstance(valor, bool):
+            continue
+        try:
+            lecturas[variable] = float(valor)
+        except (TypeError, ValueError):
+            continue
+    return lecturas
+
+class PrediccionContinua:
+    def __init__(self, registro=None, capacidad=N_VALORES, n_pasos=7, cache=None):
+        if capacidad < N_VALORES:
+            raise ValueError(f"La capacidad del buffer debe ser al menos {N_VALORES}")
+        self.registro = registro if registro is not None else RegistroModelos(cargador=cargar_modelo)
+        self.capacidad = capacidad
+        self.n_pasos = n_pasos
+        self.cache = cache
+        self.buffers = {}
+        self.mensajes = 0
+        self.pronosticos = 0
+        self.inicio = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def buffer(self, usuario_id, nombre_modelo, variable):
+        clave = (usuario_id, nombre_modelo, variable)
+        if clave not in self.buffers:
+            self.buffers[clave] = BufferCircular(self.capacidad)
+        return self.buffers[clave]
+
+    def recibir(self, mensaje):
+        """Agrega las lecturas del mensaje y devuelve el pronóstico actualizado"""
+        with self._lock:
+            self.mensajes += 1
+            operacion = mensaje.get("operacion")
+            if operacion == "estadisticas":
+                resultado = {"success": True, "continua": self.estadisticas(), "registro": self.registro.estadisticas()}
+                if self.cache is not None:
+                    resultado["cache"] = self.cache.estadisticas()
+            elif operacion == "reiniciar":
+                resultado = {"success": True, "buffers_eliminados": self.reiniciar(
+                    mensaje.get("usuario_id"), mensaje.get("nombre_modelo"), mensaje.get("variable"))}
+            else:
+                resultado = self._pronosticar(mensaje)
+        if "id" in mensaje:
+            resultado["id"] = mensaje["id"]
+        return resultado
+
+    def _pronosticar(self, mensaje):
+        tiempo_inicio = time.time()
+        cronometro = Cronometro()
+        usuario_id = mensaje.get("usuario_id")
+        nombre_modelo = mensaje.get("nombre_modelo")
+        try:
+            if not usuario_id or not nombre_modelo:
+                raise Exception("Faltan argumentos: usuario_id y nombre_modelo")
+
+            if "lecturas" in mensaje:
+                lecturas = {variable: [valor] for variable, valor in mensaje["lecturas"].items()}
+            elif "valores" in mensaje:
+                lecturas = {mensaje.get("variable", "valor"): list(mensaje["valores"])}
+            elif "valor" in mensaje:
+                lecturas = {mensaje.get("variable", "valor"): [mensaje["valor"]]}
+            else:
+                raise Exception("El mensaje necesita 'valor', 'valores' o 'lecturas'")
+
+            n_pasos = int(mensaje.get("n_pasos") or self.n_pasos)
+            if n_pasos < 1:
+                raise Exception("n_pasos debe ser mayor que 0")
+
+            listas, faltantes = [], {}
+            with medir(cronometro, "actualizacion_buffers"):
+                # Todas las lecturas se validan antes de tocar los buffers
+                lecturas = {variable: como_numeros(valores) for variable, valores in lecturas.items()}
+                for variable, valores in lecturas.items():
+                    buffer = self.buffer(usuario_id, nombre_modelo, variable)
+                    buffer.extender(valores)
+                    if len(buffer) >= N_VALORES:
+                        listas.append(variable)
+                    else:
+                        faltantes[variable] = N_VALORES - len(buffer)
+
+            predicciones, metadatos_cache = {}, None
+            if listas:
+                # Todas las variables del mensaje se pronostican con una llamada a predict por paso
+                series = [self.buffers[(usuario_id, nombre_modelo, variable)].ultimos() for variable in listas]
+                calculadas, metadatos_cache = predecir_series(
+                    usuario_id, nombre_modelo, series, n_pasos, self.registro, self.cache, cronometro)
+                predicciones = dict(zip(listas, calculadas))
+                self.pronosticos += len(listas)
+
+            resultado = {
+                "success": True,
+                "tipo": "predictivo",
+                "modo": "continuo",
+                "usuario_id": usuario_id,
+                "nombre_modelo": nombre_modelo,
+                "n_pasos": n_pasos
+            }
+            if "lecturas" in mensaje:
+                resultado["predicciones"] = predicciones
+                if faltantes:
+                    resultado["lecturas_faltantes"] = faltantes
+            else:
+                variable = next(iter(lecturas))
+                resultado["variable"] = variable
+                resultado["predicciones"] = predicciones.get(variable, [])
+                if variable in faltantes:
+                    resultado["lecturas_faltantes"] = faltantes[variable]
+            if metadatos_cache:
+                resultado["cache"] = metadatos_cache
+            resultado["tiempo_ejecucion"] = round(time.time() - tiempo_inicio, 4)
+        except Exception as e:
+            resultado = respuesta_error(e, round(time.time() - tiempo_inicio, 4), usuario_id, nombre_modelo)
+        resultado["tiempos"] = cronometro.tiempos()
+        return resultado
+
+    def reiniciar(self, usuario_id=None, nombre_modelo=None, variable=None):
+        """Elimina los buffers que coinciden con los filtros; devuelve cuántos se eliminaron"""
+        claves = [
+            clave for clave in self.buffers
+            if (usuario_id is None or clave[0] == usuario_id)
+            and (nombre_modelo is None or clave[1] == nombre_modelo)
+            and (variable is None or clave[2] == variable)
+        ]
+        for clave in claves:
+            del self.buffers[clave]
+        return len(claves)
+
+    def estadisticas(self):
+        transcurrido = time.perf_counter() - self.inicio
+        return {
+            "buffers": len(self.buffers),
+            "mensajes": self.mensajes,
+            "pronosticos": self.pronosticos,
+            "mensajes_por_segundo": round(self.mensajes / transcurrido, 2) if transcurrido else 0.0
+        }
+
+    def procesar_linea(self, linea):
+        """Decodifica una línea del protocolo y devuelve la respuesta serializada"""
+        try:
+            mensaje = json.loads(linea)
+            if not isinstance(mensaje, dict):
+                raise ValueError("El mensaje debe ser un objeto JSON")
+        except ValueError as e:
+            return json.dumps(respuesta_error(f"Mensaje inválido: {e}", 0.0))
+        return json.dumps(self.recibir(mensaje))
+
+    def servir(self, entrada=None, salida=None):
+        """Atiende mensajes hasta que se cierre la entrada"""
+        entrada = entrada or sys.stdin
+        salida = salida or sys.stdout
+        for linea in entrada:
+            linea = linea.strip()
+            if not linea:
+                continue
+            with contextlib.redirect_stdout(sys.stderr):
+                respuesta = self.procesar_linea(linea)
+            salida.write(respuesta + "\n")
+            salida.flush()
+
+    def servir_socket(self, host="127.0.0.1", puerto=7070):
+        """Servidor TCP: cada conexión envía mensajes JSON por línea y recibe las respuestas"""
+        import socketserver
+
+        servicio = self
+
+        class Manejador(socketserver.StreamRequestHandler):
+            def handle(self):
+                for linea in self.rfile:
+                    linea = linea.decode("utf-8").strip()
+                    if not linea:
+                        continue
+                    with contextlib.redirect_stdout(sys.stderr):
+                        respuesta = servicio.procesar_linea(linea)
+                    self.wfile.write((respuesta + "\n").encode("utf-8"))
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        with socketserver.ThreadingTCPServer((host, puerto), Manejador) as servidor:
+            print(f"PREDICCION CONTINUA - escuchando en {host}:{puerto}", file=sys.stderr)
+            servidor.serve_forever()
+
+    def mensaje_desde_carga(self, usuario_id, nombre_modelo, carga, n_pasos=None):
+        """Mensaje del protocolo a partir de la carga de un mensaje MQTT"""
+        mensaje = {"usuario_id": usuario_id, "nombre_modelo": nombre_modelo, "lecturas": lecturas_desde_carga(carga)}
+        if n_pasos:
+            mensaje["n_pasos"] = n_pasos
+        return mensaje
+
+    def procesar_carga(self, usuario_id, nombre_modelo, carga, n_pasos=None):
+        """Respuesta a la carga de un mensaje MQTT; una carga inválida se responde con un error"""
+        try:
+            mensaje = self.mensaje_desde_carga(usuario_id, nombre_modelo, carga, n_pasos)
+        except (ValueError, TypeError, AttributeError) as e:
+            return respuesta_error(f"Carga inválida: {e}", 0.0, usuario_id, nombre_modelo)
+        with contextlib.redirect_stdout(sys.stderr):
+            return self.recibir(mensaje)
+
+    def servir_cargas(self, cargas, usuario_id, nombre_modelo, n_pasos=None, salida=None):
+        """Responde cada carga grabada; una carga inválida no detiene la repetición"""
+        salida = salida or sys.stdout
+        for carga in cargas:
+            salida.write(json.dumps(self.procesar_carga(usuario_id, nombre_modelo, carga, n_pasos)) + "\n")
+            salida.flush()
+
+def leer_repeticion(ruta, intervalo=0.0):
+    """Cargas MQTT grabadas, una por línea; intervalo > 0 simula la cadencia del sensor"""
+    # En bytes, como llegan por MQTT: una línea mal codificada solo invalida esa carga
+    with open(ruta, "rb") as archivo:
+        for linea in archivo:
+            linea = linea.strip()
+            if not linea:
+                continue
+            yield linea
+            if intervalo:
+                time.sleep(intervalo)
+
+def escuchar_mqtt(servicio, broker, topico, usuario_id, nombre_modelo, n_pasos=None, salida=None):
+    """Se suscribe al tópico y escribe un pronóstico por cada mensaje recibido"""
+    try:
+        import paho.mqtt.client as mqtt
+    except ImportError:
+        raise Exception("Se necesita paho-mqtt para conectarse a un broker (use --reproducir sin él)")
+
+    salida = salida or sys.stdout
+    host, _, puerto = broker.partition(":")
+
+    def al_recibir(cliente, datos, mensaje):
+        respuesta = servicio.procesar_carga(usuario_id, nombre_modelo, mensaje.payload, n_pasos)
+        salida.write(json.dumps(respuesta) + "\n")
+        salida.flush()
+
+    cliente = mqtt.Client()
+    cliente.on_message = al_recibir
+    cliente.connect(host, int(puerto or 1883))
+    cliente.subscribe(topico)
+    print(f"PREDICCION CONTINUA - suscrito a {topico} en {broker}", file=sys.stderr)
+    cliente.loop_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predicción continua a partir de lecturas individuales")
+    parser.add_argument("--capacidad", type=int, default=N_VALORES, help="Valores guardados por variable")
+    parser.add_argument("--n-pasos", type=int, default=7, help="Pasos a pronosticar por defecto")
+    parser.add_argument("--cache-max", type=int, default=10000, help="Pronósticos guardados en la cache (0 la desactiva)")
+    parser.add_argument("--cache-ttl", type=float, default=300, help="Segundos de vigencia de un pronóstico guardado")
+    parser.add_argument("--puerto", type=int, default=None, help="Escuchar en un socket TCP en lugar de stdin")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--reproducir", default=None, help="Archivo con cargas MQTT grabadas (JSON por línea)")
+    parser.add_argument("--intervalo", type=float, default=0.0, help="Segundos entre cargas al reproducir")
+    parser.add_argument("--mqtt", default=None, help="Broker MQTT host[:puerto]")
+    parser.add_argument("--topico", default=None, help="Tópico MQTT a escuchar")
+    parser.add_argument("--usuario", default=None, help="Usuario del modelo para --reproducir y --mqtt")
+    parser.add_argument("--modelo", default=None, help="Nombre del modelo para --reproducir y --mqtt")
+    args = parser.parse_args()
+
+    activar_perfil("prediccion_continua")
+    cache = CacheResultados(args.cache_max, args.cache_ttl) if args.cache_max > 0 else None
+    servicio = PrediccionContinua(capacidad=args.capacidad, n_pasos=args.n_pasos, cache=cache)
+    try:
+        if args.reproducir or args.mqtt:
+            if not args.usuario or not args.modelo:
+                parser.error("--reproducir y --mqtt necesitan --usuario y --modelo")
+        if args.mqtt:
+            if not args.topico:
+                parser.error("--mqtt necesita --topico")
+            escuchar_mqtt(servicio, args.mqtt, args.topico, args.usuario, args.modelo, args.n_pasos)
+        elif args.reproducir:
+            servicio.servir_cargas(leer_repeticion(args.reproducir, args.intervalo), args.usuario, args.modelo, args.n_pasos)
+            print(json.dumps(servicio.estadisticas()), file=sys.stderr)
+        elif args.puerto:
+            servicio.servir_socket(args.host, args.puerto)
+        else:
+            print("PREDICCION CONTINUA - esperando lecturas en stdin", file=sys.stderr)
+            servicio.servir()
+    except KeyboardInterrupt:
+        pass
@@ -1,9 +1,15 @@
-import joblib
-import numpy as np
+import time  # ← AGREGAR ESTE IMPORT
+INICIO_NS = time.perf_counter_ns()  # Antes de las demás importaciones, para medir su costo
 import os
 import sys
-import json
-import time  # ← AGREGAR ESTE IMPORT
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Compartido.entrada_datos import eco_entrada, es_serie, leer_argumentos, leer_valores, silenciar
+from Compartido.formato_modelo import artefacto_vigente, cargar_artefacto
+from Compartido.instrumentacion import Cronometro, activar_perfil, medir, serializar
+from Compartido.registro_modelos import ruta_modelo
+from cache_resultados import identidad_modelo
 
 def buscar_modelo_predictivo(id_usuario, nombre_modelo):
     """Busca un modelo predictivo específico"""
@@ -17,80 +23,276 @@ def buscar_modelo_predictivo(id_usuario, nombre_modelo):
     print(f"Buscando modelo predictivo: {ruta_modelo}")
     
     if not os.path.exists(ruta_modelo):
-        # Listar modelos disponibles
-        modelos_disponibles = listar_modelos_predictivos(id_usuario)
-        error_msg = f"Modelo '{nombre_archivo}' no encontrado.\n"
-        if modelos_disponibles:
-            error_msg += f"Modelos predictivos disponibles para usuario {id_usuario}:\n"
-            for modelo in modelos_disponibles:
-                error_msg += f"  - {modelo}\n"
-        else:
-            error_msg += f"No se encontraron modelos predictivos para el usuario {id_usuario}"
-        raise Exception(error_msg)
+        raise Exception(mensaje_modelo_no_encontrado(id_usuario, nombre_archivo))
     
     print(f"Modelo encontrado: {ruta_modelo}")
     return ruta_modelo
 
+def mensaje_modelo_no_encontrado(id_usuario, nombre_archivo):
+    """Arma el mensaje de error listando los modelos disponibles del usuario"""
+    modelos_disponibles = listar_modelos_predictivos(id_usuario)
+    error_msg = f"Modelo '{nombre_archivo}' no encontrado.\n"
+    if modelos_disponibles:
+        error_msg += f"Modelos predictivos disponibles para usuario {id_usuario}:\n"
+        for modelo in modelos_disponibles:
+            error_msg += f"  - {modelo}\n"
+    else:
+        error_msg += f"No se encontraron modelos predictivos para el usuario {id_usuario}"
+    return error_msg
+
 def listar_modelos_predictivos(id_usuario):
     """Lista todos los modelos predictivos de un usuario"""
-    dir_actual = os.path.dirname(os.path.abspath(__file__))
-    carpeta_modelos = os.path.join(dir_actual, "ModelosPredictivos")
-    
-    if not os.path.exists(carpeta_modelos):
-        return []
-    
-    modelos = []
+    from Compartido.catalogo_modelos import CatalogoModelos
     try:
-        archivos = os.listdir(carpeta_modelos)
-        for archivo in archivos:
-            if archivo.endswith('_predictivo.pkl') and archivo.startswith(f"{id_usuario}_"):
-                # Extraer nombre: usuario_nombreModelo_predictivo.pkl -> nombreModelo
-                nombre_limpio = archivo.replace('.pkl', '').replace(f"{id_usuario}_", '').replace('_predictivo', '')
-                modelos.append(nombre_limpio)
+        return [modelo["nombre_modelo"] for modelo in CatalogoModelos().listar(id_usuario, "predictivo")]
     except Exception as e:
         print(f"Error listando modelos: {e}")
-    
-    return modelos
+        return []
 
 def cargar_modelo(ruta_modelo):
-    """Carga el modelo desde la ruta especificada"""
+    """Carga el modelo desde la ruta especificada, prefiriendo el artefacto mapeable"""
+    ruta_artefacto = artefacto_vigente(ruta_modelo)
+    if ruta_artefacto:
+        return cargar_artefacto(ruta_artefacto)
+    import joblib  # Solo para el .pkl: importa scikit-learn al deserializar
     modelo = joblib.load(ruta_modelo)
     return modelo
 
-def predecir_multiples(modelo, valores, n_pasos=7):
+def horizonte_directo(modelo):
+    """Pasos que el modelo predice en un solo predict (variante directa), o None si es recursivo"""
+    return getattr(modelo, "horizonte_directo_", None)
+
+def predecir_multiples(modelo, valores, n_pasos=7, cronometro=None):
     """Predice múltiples valores futuros"""
+    import numpy as np
     if len(valores) < 5:
         raise Exception("Se necesitan al menos 5 valores")
+    if horizonte_directo(modelo):
+        return predecir_lote(modelo, [list(valores[-5:])], n_pasos, cronometro)[0]
     
-    valores_temp = list(valores.copy())
+    # Solo la ventana final entra al modelo; no copiar la serie completa
+    valores_temp = list(valores[-5:])
     predicciones = []
     
     for i in range(n_pasos):
         ultimos_5 = valores_temp[-5:]
         entrada = np.array([ultimos_5])
-        siguiente = float(modelo.predict(entrada)[0])
+        with medir(cronometro, "paso_prediccion", detallar=True):
+            siguiente = float(modelo.predict(entrada)[0])
         
         predicciones.append(siguiente)
         valores_temp.append(siguiente)
     
     return predicciones
 
+def predecir_lote(modelo, series, n_pasos=7, cronometro=None):
+    """Predice n_pasos para N series a la vez: una llamada a predict por paso (o por bloque si es directo)"""
+    import numpy as np
+    ventanas = np.array([serie[-5:] for serie in series], dtype=float)
+    if ventanas.ndim != 2 or ventanas.shape[1] != 5:
+        raise Exception("Cada serie necesita al menos 5 valores")
+    
+    predicciones = np.empty((len(ventanas), n_pasos))
+    horizonte = horizonte_directo(modelo)
+    if horizonte:
+        # Directo: hasta horizonte pasos por predict; más allá, bloques sobre la ventana desplazada
+        hechos = 0
+        while hechos < n_pasos:
+            with medir(cronometro, "paso_prediccion", detallar=True):
+                if hasattr(modelo, "predecir_pasos"):
+                    # Compilado: solo los árboles de los pasos pedidos
+                    bloque = modelo.predecir_pasos(ventanas, n_pasos - hechos)
+                else:
+                    bloque = np.asarray(modelo.predict(ventanas))[:, :n_pasos - hechos]
+            predicciones[:, hechos:hechos + bloque.shape[1]] = bloque
+            ventanas = np.concatenate([ventanas, bloque], axis=1)[:, -5:]
+            hechos += bloque.shape[1]
+        return predicciones.tolist()
+
+    for paso in range(n_pasos):
+        with medir(cronometro, "paso_prediccion", detallar=True):
+            siguiente = modelo.predict(ventanas)
+        predicciones[:, paso] = siguiente
+        # Desplazar la ventana: descartar el valor más antiguo y agregar la predicción
+        ventanas[:, :-1] = ventanas[:, 1:]
+        ventanas[:, -1] = siguiente
+    
+    return predicciones.tolist()
+
+def es_lote(valores):
+    """Un lote es una lista de series o un diccionario variable -> serie"""
+    if isinstance(valores, dict):
+        return True
+    return len(valores) > 0 and all(es_serie(serie) for serie in valores)
+
+def obtener_modelo(usuario_id, nombre_modelo, registro=None, cronometro=None):
+    """Carga el modelo desde disco o desde el registro en memoria si se proporciona"""
+    if registro is None:
+        with medir(cronometro, "busqueda_modelo"):
+            ruta = buscar_modelo_predictivo(usuario_id, nombre_modelo)
+        with medir(cronometro, "carga_modelo"):
+            return cargar_modelo(ruta)
+    try:
+        with medir(cronometro, "registro_modelo"):
+            return registro.obtener(usuario_id, nombre_modelo, "predictivo")
+    except FileNotFoundError:
+        nombre_archivo = f"{usuario_id}_{nombre_modelo}_predictivo.pkl"
+        raise Exception(mensaje_modelo_no_encontrado(usuario_id, nombre_archivo))
+
+def predecir_series(usuario_id, nombre_modelo, series, n_pasos=7, registro=None, cache=None, cronometro=None):
+    """Predicciones de varias series; con cache solo se calculan las ventanas no guardadas.
+    Devuelve (predicciones, metadatos de cache o None)"""
+    identidad = identidad_modelo(ruta_modelo(usuario_id, nombre_modelo, "predictivo")) if cache is not None else None
+    if identidad is None:
+        modelo = obtener_modelo(usuario_id, nombre_modelo, registro, cronometro)
+        return predecir_lote(modelo, series, n_pasos, cronometro), None
+    
+    predicciones = [None] * len(series)
+    claves = [cache.clave(identidad, serie[-5:]) for serie in series]
+    tiempo_ahorrado = 0.0
+    pendientes = []
+    with medir(cronometro, "consulta_cache"):
+        for indice, clave in enumerate(claves):
+            guardado = cache.obtener(clave, n_pasos)
+            if guardado is None:
+                pendientes.append(indice)
+            else:
+                predicciones[indice], ahorrado = guardado
+                tiempo_ahorrado += ahorrado
+    
+    if pendientes:
+        inicio = time.perf_counter()
+        modelo = obtener_modelo(usuario_id, nombre_modelo, registro, cronometro)
+        calculadas = predecir_lote(modelo, [series[i] for i in pendientes], n_pasos, cronometro)
+        tiempo_calculo = (time.perf_counter() - inicio) / len(pendientes)
+        for indice, prediccion in zip(pendientes, calculadas):
+            predicciones[indice] = prediccion
+            cache.guardar(claves[indice], prediccion, tiempo_calculo)
+    
+    metadatos = {
+        "aciertos": len(series) - len(pendientes),
+        "consultas": len(series),
+        "tiempo_ahorrado": round(tiempo_ahorrado, 6),
+        "tasa_aciertos": cache.estadisticas()["tasa_aciertos"]
+    }
+    return predicciones, metadatos
+
+def ejecutar_prediccion(usuario_id, nombre_modelo, valores, n_pasos=7, registro=None, cache=None, cronometro=None):
+    """Busca el modelo, predice y arma la respuesta (sin tiempo de ejecucion)"""
+    if es_lote(valores):
+        return ejecutar_prediccion_lote(usuario_id, nombre_modelo, valores, n_pasos, registro, cache, cronometro)
+    
+    # Hacer predicciones
+    metadatos_cache = None
+    if cache is None:
+        modelo = obtener_modelo(usuario_id, nombre_modelo, registro, cronometro)
+        predicciones = predecir_multiples(modelo, valores, n_pasos, cronometro)
+    else:
+        if len(valores) < 5:
+            raise Exception("Se necesitan al menos 5 valores")
+        resultado_series, metadatos_cache = predecir_series(
+            usuario_id, nombre_modelo, [valores], n_pasos, registro, cache, cronometro
+        )
+        predicciones = resultado_series[0]
+    
+    resultado = {
+        "success": True,
+        "tipo": "predictivo",
+        "usuario_id": usuario_id,
+        "nombre_modelo": nombre_modelo,
+        "predicciones": predicciones,
+        "n_pasos": n_pasos,
+        "valores_entrada": eco_entrada(valores)
+    }
+    if metadatos_cache:
+        resultado["cache"] = metadatos_cache
+    return resultado
+
+def ejecutar_prediccion_lote(usuario_id, nombre_modelo, valores, n_pasos=7, registro=None, cache=None, cronometro=None):
+    """Predice varias series con el mismo modelo; cada resultado mantiene el formato individual"""
+    if isinstance(valores, dict):
+        variables, series = list(valores.keys()), list(valores.values())
+    else:
+        variables, series = [None] * len(valores), valores
+    
+    resultados = []
+    validas = []
+    for variable, serie in zip(variables, series):
+        resultado = {
+            "success": True,
+            "tipo": "predictivo",
+            "usuario_id": usuario_id,
+            "nombre_modelo": nombre_modelo,
+            "n_pasos": n_pasos,
+            "valores_entrada": eco_entrada(serie)
+        }
+        if variable is not None:
+            resultado["variable"] = variable
+        if len(serie) < 5:
+            resultado["success"] = False
+            resultado["error"] = "Se necesitan al menos 5 valores"
+        else:
+            validas.append(len(resultados))
+        resultados.append(resultado)
+    
+    metadatos_cache = None
+    if validas:
+        predicciones, metadatos_cache = predecir_series(
+            usuario_id, nombre_modelo, [series[i] for i in validas], n_pasos, registro, cache, cronometro
+        )
+        for indice, prediccion in zip(validas, predicciones):
+            resultados[indice]["predicciones"] = prediccion
+    else:
+        # Validar que el modelo existe aunque ninguna serie sea válida
+        obtener_modelo(usuario_id, nombre_modelo, registro, cronometro)
+    
+    respuesta = {
+        "success": True,
+        "tipo": "predictivo",
+        "usuario_id": usuario_id,
+        "nombre_modelo": nombre_modelo,
+        "lote": True,
+        "n_series": len(resultados),
+        "n_pasos": n_pasos,
+        "resultados": resultados
+    }
+    if metadatos_cache:
+        respuesta["cache"] = metadatos_cache
+    return respuesta
+
+def respuesta_error(error, tiempo_ejecucion, usuario_id=None, nombre_modelo=None):
+    """Arma la respuesta de error con el mismo formato que usa el backend"""
+    return {
+        "success": False,
+        "tipo": "predictivo",
+        "error": str(error),
+        "tiempo_ejecucion": tiempo_ejecucion,
+        "usuario_id": usuario_id,
+        "nombre_modelo": nombre_modelo
+    }
+
 if __name__ == "__main__":
     # INICIAR CRONÓMETRO AL INICIO DEL PROGRAMA
     tiempo_inicio = time.time()
+    cronometro = Cronometro(INICIO_NS)
+    cronometro.marcar("importaciones")
+    activar_perfil("predictor")
     
+    salida = sys.stdout
     try:
-        if len(sys.argv) < 4:
+        argumentos, silencioso, formato = leer_argumentos(sys.argv[1:])
+        if silencioso:
+            salida = silenciar()
+        if len(argumentos) < 3:
             raise Exception("Faltan argumentos: usuarioId, nombreModelo y valores")
         
-        # Parametros: usuarioId, nombreModelo, valores, [nPasos]
-        usuario_id = sys.argv[1]
-        nombre_modelo = sys.argv[2]
-        valores_str = sys.argv[3]
+        # Parametros: usuarioId, nombreModelo, valores (JSON, "-" para stdin o "@ruta"), [nPasos]
+        usuario_id = argumentos[0]
+        nombre_modelo = argumentos[1]
         # Leer n_pasos si se envía, si no usar 7 por defecto
-        if len(sys.argv) > 4:
+        if len(argumentos) > 3:
             try:
-                n_pasos = int(sys.argv[4])
+                n_pasos = int(argumentos[3])
                 if n_pasos < 1:
                     raise ValueError()
             except Exception:
@@ -100,36 +302,15 @@ if __name__ == "__main__":
         print(f"PREDICTOR - Usuario: {usuario_id}, Modelo: {nombre_modelo}")
         print(f"Prediciendo los siguientes {n_pasos} valores")
         
-        # Parsear valores
-        valores_str_limpio = valores_str.replace('\\"', '"')
-        try:
-            valores = json.loads(valores_str_limpio)
-        except json.JSONDecodeError as e:
-            raise Exception(f"Error parseando valores: {str(e)}")
-        
-        # Buscar y cargar modelo
-        ruta_modelo = buscar_modelo_predictivo(usuario_id, nombre_modelo)
-        modelo = cargar_modelo(ruta_modelo)
+        valores = leer_valores(argumentos[2], formato)
+        cronometro.marcar("parseo_argumentos")
         
-        # Hacer predicciones (siempre 7)
-        predicciones = predecir_multiples(modelo, valores, n_pasos)
+        resultado = ejecutar_prediccion(usuario_id, nombre_modelo, valores, n_pasos, cronometro=cronometro)
         
         # CALCULAR TIEMPO TRANSCURRIDO
         tiempo_fin = time.time()
-        tiempo_ejecucion = round(tiempo_fin - tiempo_inicio, 4)  # 4 decimales
-        
-        #   Resultado exitoso CON TIEMPO REAL
-        resultado = {
-            "success": True,
-            "tipo": "predictivo",
-            "usuario_id": usuario_id,
-            "nombre_modelo": nombre_modelo,
-            "predicciones": predicciones,
-            "tiempo_ejecucion": tiempo_ejecucion,  # ← AGREGAR TIEMPO REAL
-            "n_pasos": n_pasos,
-            "valores_entrada": valores
-        }
-        print(json.dumps(resultado))
+        resultado["tiempo_ejecucion"] = round(tiempo_fin - tiempo_inicio, 4)  # 4 decimales
+        print(serializar(resultado, cronometro), file=salida)
         
     except Exception as e:
         # ⏱ CALCULAR TIEMPO INCLUSO EN ERROR
@@ -137,13 +318,11 @@ if __name__ == "__main__":
         tiempo_ejecucion = round(tiempo_fin - tiempo_inicio, 4)
         
         #  Resultado con error Y TIEMPO
-        resultado = {
-            "success": False,
-            "tipo": "predictivo",
-            "error": str(e),
-            "tiempo_ejecucion": tiempo_ejecucion,  # ← AGREGAR TIEMPO INCLUSO EN ERROR
-            "usuario_id": usuario_id if 'usuario_id' in locals() else None,
-            "nombre_modelo": nombre_modelo if 'nombre_modelo' in locals() else None
-        }
-        print(json.dumps(resultado))
-        sys.exit(1)
\ No newline at end of file
+        resultado = respuesta_error(
+            e,
+            tiempo_ejecucion,
+            usuario_id if 'usuario_id' in locals() else None,
+            nombre_modelo if 'nombre_modelo' in locals() else None
+        )
+        print(serializar(resultado, cronometro), file=salida)
+        sys.exit(1)
@@ -0,0 +1,113 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Compartido.entrada_datos import validar_valores
+from Compartido.instrumentacion import Cronometro, activar_perfil
+from Compartido.registro_modelos import RegistroModelos
+from cache_resultados import CacheResultados
+from predictor import cargar_modelo, ejecutar_prediccion, respuesta_error
+
+# Servidor de inferencia de larga duración.
+# Protocolo: una petición JSON por línea en stdin y una respuesta JSON por línea en stdout.
+#   Petición:  {"id": 1, "usuario_id": "...", "nombre_modelo": "...", "valores": [...], "n_pasos": 7}
+#   Respuesta: mismo formato que predictor.py ("success", "predicciones", "tiempo_ejecucion", ...)
+#              más el "id" de la petición si se envió, los metadatos de "cache" y los "tiempos" por fase.
+#   Los valores no numéricos o no finitos (null, NaN, infinito) se rechazan con un error.
+#   {"operacion": "estadisticas"} devuelve los contadores del registro de modelos y de la cache.
+# Los mensajes de depuración se envían a stderr para no romper el protocolo.
+
+class ServidorPrediccion:
+    def __init__(self, registro=None, cache=None):
+        self.registro = registro if registro is not None else RegistroModelos(cargador=cargar_modelo)
+        self.cache = cache
+
+    def atender(self, peticion):
+        """Procesa una petición y devuelve la respuesta con el formato de predictor.py"""
+        if peticion.get("operacion") == "estadisticas":
+            resultado = {"success": True, "registro": self.registro.estadisticas()}
+            if self.cache is not None:
+                resultado["cache"] = self.cache.estadisticas()
+            if "id" in peticion:
+                resultado["id"] = peticion["id"]
+            return resultado
+
+        tiempo_inicio = time.time()
+        cronometro = Cronometro()
+        usuario_id = peticion.get("usuario_id")
+        nombre_modelo = peticion.get("nombre_modelo")
+        try:
+            if not usuario_id or not nombre_modelo or "valores" not in peticion:
+                raise Exception("Faltan argumentos: usuario_id, nombre_modelo y valores")
+            validar_valores(peticion["valores"])
+
+            try:
+                n_pasos = int(peticion.get("n_pasos", 7))
+                if n_pasos < 1:
+                    raise ValueError()
+            except Exception:
+                n_pasos = 7
+
+            resultado = ejecutar_prediccion(
+                usuario_id, nombre_modelo, peticion["valores"], n_pasos,
+                registro=self.registro, cache=self.cache, cronometro=cronometro
+            )
+            resultado["tiempo_ejecucion"] = round(time.time() - tiempo_inicio, 4)
+        except Exception as e:
+            resultado = respuesta_error(e, round(time.time() - tiempo_inicio, 4), usuario_id, nombre_modelo)
+        resultado["tiempos"] = cronometro.tiempos()
+
+        if "id" in peticion:
+            resultado["id"] = peticion["id"]
+        return resultado
+
+    def procesar_linea(self, linea):
+        """Decodifica una línea del protocolo y devuelve la respuesta serializada"""
+        try:
+            peticion = json.loads(linea)
+            if not isinstance(peticion, dict):
+                raise ValueError("La petición debe ser un objeto JSON")
+        except ValueError as e:
+            return json.dumps(respuesta_error(f"Petición inválida: {e}", 0.0))
+        return json.dumps(self.atender(peticion))
+
+    def servir(self, entrada=None, salida=None):
+        """Atiende peticiones hasta que se cierre la entrada"""
+        entrada = entrada or sys.stdin
+        salida = salida or sys.stdout
+        for linea in entrada:
+            linea = linea.strip()
+            if not linea:
+                continue
+            with contextlib.redirect_stdout(sys.stderr):
+                respuesta = self.procesar_linea(linea)
+            salida.write(respuesta + "\n")
+            salida.flush()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de predicción por stdin/stdout")
+    parser.add_argument("--max-modelos", type=int, default=200, help="Máximo de modelos en memoria")
+    parser.add_argument("--max-mb", type=float, default=512, help="Tamaño aproximado máximo en MB")
+    parser.add_argument("--ttl", type=float, default=None, help="Segundos de inactividad antes de expulsar un modelo")
+    parser.add_argument("--cache-max", type=int, default=10000, help="Pronósticos guardados en la cache (0 la desactiva)")
+    parser.add_argument("--cache-ttl", type=float, default=300, help="Segundos de vigencia de un pronóstico guardado")
+    args = parser.parse_args()
+
+    registro = RegistroModelos(
+        max_modelos=args.max_modelos,
+        max_bytes=int(args.max_mb * 1024 * 1024),
+        ttl=args.ttl,
+        cargador=cargar_modelo
+    )
+    cache = CacheResultados(args.cache_max, args.cache_ttl) if args.cache_max > 0 else None
+    activar_perfil("servidor_prediccion")
+    print("SERVIDOR DE PREDICCION - esperando peticiones en stdin", file=sys.stderr)
+    try:
+        ServidorPrediccion(registro, cache).servir()
+    except KeyboardInterrupt:
+        pass
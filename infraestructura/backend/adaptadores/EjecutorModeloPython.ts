@@ -1,15 +1,21 @@
-import { exec } from 'child_process';
+import { execFile } from 'child_process';
 import { promisify } from 'util';
+import net from 'net';
 import path from 'path';
 import fs from 'fs';
 
-const execPromise = promisify(exec);
+const execFilePromise = promisify(execFile);
+// Sin respuesta del pool en este tiempo (un trabajador colgado) la petición va a un proceso
+const TIEMPO_MAXIMO_POOL_MS = Number(process.env.ML_POOL_TIMEOUT_MS) || 30000;
 
 export class EjecutorModeloPython {
     private directorioBase: string;
+    // Socket de ModelosML/Compartido/pool_inferencia.py; sin él se lanza un proceso por petición
+    private rutaPool: string | undefined;
 
     constructor() {
         this.directorioBase = path.join(__dirname, '../../ModelosML');
+        this.rutaPool = process.env.ML_POOL_SOCKET;
     }
 
     private detectarTipoModelo(usuarioId: string, nombreModelo: string): { tipo: string, script: string } | null {
@@ -80,30 +86,8 @@ export class EjecutorModeloPython {
                 throw new Error(`Script no encontrado: ${configuracion.script}`);
             }
 
-            const valoresJson = JSON.stringify(valores);
-            const valoresEscapados = valoresJson.replace(/"/g, '\\"');
-
-            let comando = `python "${configuracion.script}" "${usuarioId}" "${nombreModelo}" "${valoresEscapados}"`;
-
-            if (configuracion.tipo === 'predictivo' && parametrosExtra?.nPasos) {
-                comando += ` ${parametrosExtra.nPasos}`;
-            }
-
-
-            const directorioTrabajo = path.dirname(configuracion.script);
-            const { stdout, stderr } = await execPromise(comando, {
-                cwd: directorioTrabajo,
-                encoding: 'utf8'
-            });
-
-            if (stderr) {
-                console.log('STDERR:', stderr);
-            }
-
-            const lineas = stdout.trim().split('\n');
-            const ultimaLinea = lineas[lineas.length - 1];
-
-            const resultado = JSON.parse(ultimaLinea);
+            const resultado = await this.ejecutarEnPool(configuracion.tipo, usuarioId, nombreModelo, valores, parametrosExtra)
+                ?? await this.ejecutarProceso(configuracion.script, configuracion.tipo, usuarioId, nombreModelo, valores, parametrosExtra);
 
             if (!resultado.success) {
                 throw new Error(resultado.error || 'Error desconocido');
@@ -119,6 +103,87 @@ export class EjecutorModeloPython {
         }
     }
 
+    // Petición al pool de inferencia; null (se lanza el script) si el pool no está configurado,
+    // no está corriendo, no responde a tiempo o está saturado (respuesta con reintentar)
+    private async ejecutarEnPool(tipo: string, usuarioId: string, nombreModelo: string, valores: number[], parametrosExtra?: any): Promise<any | null> {
+        if (!this.rutaPool) {
+            return null;
+        }
+        const peticion: any = { tipo, usuario_id: usuarioId, nombre_modelo: nombreModelo, valores };
+        if (tipo === 'predictivo' && parametrosExtra?.nPasos) {
+            peticion.n_pasos = parametrosExtra.nPasos;
+        }
+        try {
+            const respuesta = await this.solicitarPool(peticion);
+            if (respuesta.reintentar) {
+                console.log(`Pool de inferencia saturado (${respuesta.error}), se lanza el script`);
+                return null;
+            }
+            return respuesta;
+        } catch (error: any) {
+            console.log(`Pool de inferencia no disponible en ${this.rutaPool} (${error.code || error.message}), se lanza el script`);
+            return null;
+        }
+    }
+
+    private solicitarPool(peticion: any): Promise<any> {
+        return new Promise((resolve, reject) => {
+            const conexion = net.createConnection(this.rutaPool!);
+            let recibido = '';
+            conexion.setEncoding('utf8');
+            conexion.setTimeout(TIEMPO_MAXIMO_POOL_MS, () => {
+                conexion.destroy();
+                reject(Object.assign(new Error(`El pool de inferencia no respondió en ${TIEMPO_MAXIMO_POOL_MS} ms`), { code: 'ETIMEDOUT' }));
+            });
+            conexion.on('connect', () => conexion.write(JSON.stringify(peticion) + '\n'));
+            conexion.on('data', (parte: string) => {
+                recibido += parte;
+                const fin = recibido.indexOf('\n');
+                if (fin >= 0) {
+                    conexion.end();
+                    try {
+                        resolve(JSON.parse(recibido.slice(0, fin)));
+                    } catch (error) {
+                        reject(error);
+                    }
+                }
+            });
+            conexion.on('error', reject);
+            conexion.on('end', () => reject(new Error('El pool de inferencia cerró la conexión sin responder')));
+        });
+    }
+
+    private async ejecutarProceso(script: string, tipo: string, usuarioId: string, nombreModelo: string, valores: number[], parametrosExtra?: any): Promise<any> {
+        // Los valores van por stdin ("-") como JSON, sin el límite de tamaño de la línea de
+        // comandos: la respuesta repite la entrada tal cual (enteros incluidos) y un null o un
+        // texto se rechaza en lugar de llegar como NaN. --silencioso deja en stdout solo el
+        // JSON del resultado
+        const argumentos = [script, usuarioId, nombreModelo, '-'];
+
+        if (tipo === 'predictivo' && parametrosExtra?.nPasos) {
+            argumentos.push(String(parametrosExtra.nPasos));
+        }
+        argumentos.push('--formato', 'json', '--silencioso');
+
+        const directorioTrabajo = path.dirname(script);
+        const proceso = execFilePromise('python', argumentos, {
+            cwd: directorioTrabajo,
+            encoding: 'utf8',
+            maxBuffer: 64 * 1024 * 1024
+        });
+        proceso.child.stdin?.end(JSON.stringify(valores));
+        const { stdout, stderr } = await proceso;
+
+        if (stderr) {
+            console.log('STDERR:', stderr);
+        }
+
+        const lineas = stdout.trim().split('\n');
+        const ultimaLinea = lineas[lineas.length - 1];
+
+        return JSON.parse(ultimaLinea);
+    }
+
     async predecir(usuarioId: string, nombreModelo: string, valores: number[], nPasos: number ): Promise<any> {
         return await this.ejecutar(usuarioId, nombreModelo, valores, { nPasos });
     }